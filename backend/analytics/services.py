@@ -4,12 +4,12 @@ Business logic for analytics feature.
 import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
-from sqlalchemy import select, func, and_, distinct, case
+from sqlalchemy import select, func, and_, case
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.models import (
     Certification, Question, QuizSession, SessionAnswer,
-    AnalyticsCache
+    AnalyticsCache, TopicStats, QuestionStats
 )
 from analytics.schemas import (
     OverallStatsResponse, WeakAreaResponse, ProgressTrendItem,
@@ -22,20 +22,12 @@ async def calculate_certification_accuracy(
     certification_id: uuid.UUID
 ) -> Optional[float]:
     """Calculate overall accuracy for a certification."""
-    from sqlalchemy import case
     result = await db.execute(
         select(
-            func.count(SessionAnswer.id).label("total"),
-            func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-        )
-        .select_from(SessionAnswer)
-        .join(Question, SessionAnswer.question_id == Question.id)
-        .where(
-            and_(
-                Question.certification_id == certification_id,
-                SessionAnswer.is_correct.isnot(None)
-            )
+            func.sum(QuestionStats.attempts).label("total"),
+            func.sum(QuestionStats.correct).label("correct")
         )
+        .where(QuestionStats.certification_id == certification_id)
     )
     
     row = result.one()
@@ -49,22 +41,14 @@ async def get_overall_stats(
     certification_id: Optional[uuid.UUID] = None
 ) -> OverallStatsResponse:
     """Get overall statistics."""
-    # Base query conditions
-    conditions = [SessionAnswer.is_correct.isnot(None)]
-    
-    if certification_id:
-        conditions.append(Question.certification_id == certification_id)
-    
     # Total questions answered and correct
-    result = await db.execute(
-        select(
-            func.count(SessionAnswer.id).label("total"),
-            func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-        )
-        .select_from(SessionAnswer)
-        .join(Question, SessionAnswer.question_id == Question.id)
-        .where(and_(*conditions))
+    query = select(
+        func.sum(QuestionStats.attempts).label("total"),
+        func.sum(QuestionStats.correct).label("correct")
     )
+    if certification_id:
+        query = query.where(QuestionStats.certification_id == certification_id)
+    result = await db.execute(query)
     
     row = result.one()
     total_answered = row.total or 0
@@ -199,28 +183,25 @@ async def get_weak_areas(
     certification_id: Optional[uuid.UUID] = None,
     threshold: float = 60.0
 ) -> List[WeakAreaResponse]:
-    """Get topics with accuracy below threshold."""
+    """Get topics with accuracy below threshold, from the maintained topic stats."""
     conditions = [
-        Question.topic.isnot(None),
-        SessionAnswer.is_correct.isnot(None)
+        TopicStats.topic != "",
+        TopicStats.answered > 0
     ]
     
     if certification_id:
-        conditions.append(Question.certification_id == certification_id)
+        conditions.append(TopicStats.certification_id == certification_id)
     
     result = await db.execute(
         select(
-            Question.certification_id,
+            TopicStats.certification_id,
             Certification.name.label("cert_name"),
-            Question.topic,
-            func.count(SessionAnswer.id).label("total"),
-            func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
+            TopicStats.topic,
+            TopicStats.answered.label("total"),
+            TopicStats.correct
         )
-        .select_from(SessionAnswer)
-        .join(Question, SessionAnswer.question_id == Question.id)
-        .join(Certification, Question.certification_id == Certification.id)
+        .join(Certification, TopicStats.certification_id == Certification.id)
         .where(and_(*conditions))
-        .group_by(Question.certification_id, Certification.name, Question.topic)
     )
     
     weak_areas = []
@@ -295,12 +276,11 @@ async def get_performance_by_certification(
             Certification.id,
             Certification.name,
             Certification.total_questions,
-            func.count(distinct(SessionAnswer.question_id)).label("answered"),
-            func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
+            func.count(QuestionStats.question_id).label("answered"),
+            func.sum(QuestionStats.correct).label("correct")
         )
         .select_from(Certification)
-        .outerjoin(Question, Question.certification_id == Certification.id)
-        .outerjoin(SessionAnswer, SessionAnswer.question_id == Question.id)
+        .outerjoin(QuestionStats, QuestionStats.certification_id == Certification.id)
         .group_by(Certification.id, Certification.name, Certification.total_questions)
     )
     
@@ -331,12 +311,16 @@ async def calculate_exam_readiness(
     if not cert:
         return {"readiness_score": 0}
     
-    # Get all topics with their stats
+    # Get all topics with their stats in one pass over the question stats
     topics_result = await db.execute(
         select(
             Question.topic,
-            func.count(Question.id).label("total_questions")
+            func.count(Question.id).label("total_questions"),
+            func.count(QuestionStats.question_id).label("answered"),
+            func.coalesce(func.sum(QuestionStats.attempts), 0).label("attempts"),
+            func.coalesce(func.sum(QuestionStats.correct), 0).label("correct")
         )
+        .outerjoin(QuestionStats, QuestionStats.question_id == Question.id)
         .where(Question.certification_id == certification_id)
         .group_by(Question.topic)
     )
@@ -346,52 +330,16 @@ async def calculate_exam_readiness(
     topics_covered = 0
     topics_mastered = 0  # accuracy >= 70%
     total_topic_accuracy = 0
+    questions_answered = 0
     
     for row in topics_result:
         total_topics += 1
         topic_name = row.topic if row.topic else "Uncategorized"
         total_in_topic = row.total_questions
-        
-        # Get stats for this topic
-        if row.topic is not None:
-            stats_result = await db.execute(
-                select(
-                    func.count(distinct(SessionAnswer.question_id)).label("answered"),
-                    func.count(SessionAnswer.id).label("attempts"),
-                    func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-                )
-                .select_from(SessionAnswer)
-                .join(Question, SessionAnswer.question_id == Question.id)
-                .where(
-                    and_(
-                        Question.certification_id == certification_id,
-                        Question.topic == row.topic,
-                        SessionAnswer.is_correct.isnot(None)
-                    )
-                )
-            )
-        else:
-            stats_result = await db.execute(
-                select(
-                    func.count(distinct(SessionAnswer.question_id)).label("answered"),
-                    func.count(SessionAnswer.id).label("attempts"),
-                    func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-                )
-                .select_from(SessionAnswer)
-                .join(Question, SessionAnswer.question_id == Question.id)
-                .where(
-                    and_(
-                        Question.certification_id == certification_id,
-                        Question.topic.is_(None),
-                        SessionAnswer.is_correct.isnot(None)
-                    )
-                )
-            )
-        
-        stats_row = stats_result.one()
-        answered = stats_row.answered or 0
-        attempts = stats_row.attempts or 0
-        correct = stats_row.correct or 0
+        answered = row.answered
+        attempts = row.attempts
+        correct = row.correct
+        questions_answered += answered
         
         # Calculate topic coverage and accuracy
         topic_coverage = (answered / total_in_topic * 100) if total_in_topic > 0 else 0
@@ -424,13 +372,6 @@ async def calculate_exam_readiness(
     avg_topic_accuracy = (total_topic_accuracy / topics_covered) if topics_covered > 0 else 0
     
     # 4. Question Coverage (% of unique questions answered)
-    coverage_result = await db.execute(
-        select(func.count(distinct(SessionAnswer.question_id)))
-        .select_from(SessionAnswer)
-        .join(Question, SessionAnswer.question_id == Question.id)
-        .where(Question.certification_id == certification_id)
-    )
-    questions_answered = coverage_result.scalar() or 0
     question_coverage_score = (questions_answered / cert.total_questions * 100) if cert.total_questions > 0 else 0
     
     # Component weights
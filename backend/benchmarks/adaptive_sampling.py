@@ -0,0 +1,92 @@
+"""
+Benchmark adaptive session building: weighted sampling in SQL
+(``ORDER BY -ln(random()) / weight``) vs the in-memory Fenwick index used by
+``quiz.adaptive``, plus the cost of folding an answer into the index.
+
+    python -m benchmarks.adaptive_sampling --questions 20000 --topics 40
+"""
+import random
+import asyncio
+import argparse
+from datetime import datetime
+
+from sqlalchemy import text
+
+from shared.database import async_session
+from quiz.adaptive import AdaptiveSampler, BASE_WEIGHT, TOPIC_BOOST, RECENCY_DAYS, MIN_RECENCY
+from benchmarks.common import seeded_certification, seed_answers, time_async, print_results
+
+# Same weight as quiz.adaptive, computed per row
+WEIGHTED_SQL = text(f"""
+SELECT q.id
+FROM questions q
+LEFT JOIN question_stats qs ON qs.question_id = q.id
+LEFT JOIN topic_stats ts
+    ON ts.certification_id = q.certification_id AND ts.topic = COALESCE(q.topic, '')
+WHERE q.certification_id = :certification_id
+ORDER BY -ln(1 - random()) / (
+    (1 + {TOPIC_BOOST} * (COALESCE(ts.answered, 0) - COALESCE(ts.correct, 0) + 1)
+        / (COALESCE(ts.answered, 0) + 2.0))
+    * ({BASE_WEIGHT} + (COALESCE(qs.attempts, 0) - COALESCE(qs.correct, 0) + 1)
+        / (COALESCE(qs.attempts, 0) + 2.0))
+    * CASE WHEN qs.last_answered_at IS NULL THEN 1
+        ELSE GREATEST({MIN_RECENCY}, LEAST(1,
+            EXTRACT(EPOCH FROM now() - qs.last_answered_at) / 86400 / {RECENCY_DAYS}))
+      END
+)
+LIMIT :count
+""")
+
+
+async def main(args):
+    async with seeded_certification(args.questions, args.topics) as (certification_id, question_ids):
+        await seed_answers(certification_id, question_ids, args.answered)
+
+        async with async_session() as db:
+            sampler = AdaptiveSampler()
+            cold = await time_async(lambda: AdaptiveSampler().get_index(db, certification_id), 3)
+            index = await sampler.get_index(db, certification_id)
+
+            async def sql_weighted():
+                result = await db.execute(
+                    WEIGHTED_SQL, {"certification_id": certification_id, "count": args.count}
+                )
+                return result.scalars().all()
+
+            async def sampled():
+                index = await sampler.get_index(db, certification_id)
+                return index.sample(args.count)
+
+            async def sample_only():
+                return index.sample(args.count)
+
+            async def record_answer():
+                sampler.record_answers(certification_id, [{
+                    "question_id": random.choice(question_ids),
+                    "answered": 1,
+                    "correct": int(random.random() < 0.6),
+                    "answered_at": datetime.utcnow(),
+                }])
+
+            results = {
+                "adaptive: weighted ORDER BY": await time_async(sql_weighted, args.runs),
+                "adaptive: index (with version check)": await time_async(sampled, args.runs),
+                "adaptive: index draw only": await time_async(sample_only, args.runs),
+                "answer update": await time_async(record_answer, args.runs),
+                "index build (cold, per version)": cold,
+            }
+
+    print_results(
+        f"Adaptive sampling, {args.questions} questions / {args.topics} topics / {args.count} per session",
+        results
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--answered", type=float, default=0.5)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+"""
+Benchmark answer submission under concurrent load: the original
+fetch / select / insert-or-update / commit / refresh sequence against the
+single upsert statement used by ``quiz.services.submit_answer``.
+
+Each worker answers questions in its own session, re-answering a share of
+them so both the insert and the update paths are exercised.
+
+    python -m benchmarks.answer_submit --workers 32 --runs 50
+"""
+import uuid
+import random
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import select, delete, and_
+
+from shared.database import async_session
+from shared.models import Question, QuizSession, SessionAnswer
+from shared.answers import extract_answer_letters
+from quiz.services import submit_answer, add_session_questions
+from benchmarks.common import seeded_certification, time_concurrent, print_results
+
+
+async def original_submit(db, session: QuizSession, question_id: uuid.UUID, user_answer: str):
+    # The JSONB question list lookup this path used is kept in memory here
+    question_ids = [str(qid) for qid in session_question_ids[session.id]]
+    question = await db.get(Question, question_id)
+    existing = (await db.execute(
+        select(SessionAnswer).where(
+            and_(SessionAnswer.session_id == session.id, SessionAnswer.question_id == question_id)
+        )
+    )).scalar_one_or_none()
+    is_correct = extract_answer_letters(user_answer) == extract_answer_letters(question.correct_answer)
+    if existing:
+        if is_correct and not existing.is_correct:
+            session.correct_answers += 1
+        existing.user_answer = user_answer
+        existing.is_correct = is_correct
+        existing.answered_at = datetime.utcnow()
+        answer = existing
+    else:
+        answer = SessionAnswer(
+            session_id=session.id, question_id=question_id,
+            user_answer=user_answer, is_correct=is_correct
+        )
+        db.add(answer)
+        session.correct_answers += int(is_correct)
+    session.current_question_index = question_ids.index(str(question_id)) + 1
+    await db.commit()
+    await db.refresh(answer)
+
+
+# Question order of each benchmark session
+session_question_ids: Dict[uuid.UUID, List[uuid.UUID]] = {}
+
+
+async def create_sessions(certification_id: uuid.UUID, question_ids: List[uuid.UUID], workers: int, count: int):
+    sessions = []
+    async with async_session() as db:
+        for _ in range(workers):
+            picked = random.sample(question_ids, count)
+            session = QuizSession(
+                id=uuid.uuid4(),
+                certification_id=certification_id,
+                session_type="random",
+                total_questions=count,
+            )
+            db.add(session)
+            await db.flush()
+            await add_session_questions(db, session.id, picked)
+            session_question_ids[session.id] = picked
+            sessions.append(session)
+        await db.commit()
+    return sessions
+
+
+async def run_variant(submit, certification_id, question_ids, args):
+    sessions = await create_sessions(certification_id, question_ids, args.workers, args.count)
+    dbs = [async_session() for _ in sessions]
+    try:
+        for db, session in zip(dbs, sessions):
+            db.add(session)
+        
+        async def one_submit(worker: int):
+            session = sessions[worker]
+            answered = session.current_question_index
+            if answered and random.random() < args.resubmit:
+                position = random.randrange(answered)
+            else:
+                position = min(answered, session.total_questions - 1)
+            question_id = session_question_ids[session.id][position]
+            await submit(dbs[worker], session, question_id, random.choice("ABCD"))
+        
+        return await time_concurrent(one_submit, args.workers, args.runs)
+    finally:
+        for db in dbs:
+            await db.close()
+        async with async_session() as db:
+            await db.execute(delete(QuizSession).where(QuizSession.id.in_([s.id for s in sessions])))
+            await db.commit()
+
+
+async def main(args):
+    async with seeded_certification(args.questions, args.topics) as (certification_id, question_ids):
+        results = {
+            "fetch/select/write/refresh": await run_variant(
+                original_submit, certification_id, question_ids, args),
+            "single upsert statement": await run_variant(
+                lambda db, session, qid, answer: submit_answer(db, session, qid, answer),
+                certification_id, question_ids, args),
+        }
+    
+    print_results(
+        f"Answer submission, {args.workers} concurrent workers x {args.runs} submits",
+        results
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--count", type=int, default=60, help="questions per session")
+    parser.add_argument("--resubmit", type=float, default=0.2, help="share of submits that change an answer")
+    asyncio.run(main(parser.parse_args()))
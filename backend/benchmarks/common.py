@@ -0,0 +1,164 @@
+"""
+Shared helpers for benchmarks: a throwaway certification seeded with
+synthetic questions, and timing utilities.
+"""
+import time
+import asyncio
+import uuid
+import random
+import statistics
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import insert, delete
+
+from shared.database import async_session, engine, init_db
+from shared.migrations import rebuild_question_stats, rebuild_topic_stats
+from shared.models import Certification, Question, QuizSession, SessionAnswer
+from quiz.services import add_session_questions
+
+
+def synthetic_question(certification_id: uuid.UUID, number: int, topic: str) -> Dict:
+    """Build one synthetic question row."""
+    return {
+        "id": uuid.uuid4(),
+        "certification_id": certification_id,
+        "question_number": number,
+        "question_text": f"Benchmark question {number} about {topic}?",
+        "options": ["A. First", "B. Second", "C. Third", "D. Fourth"],
+        "correct_answer": "B. Second",
+        "correct_letters": "B",
+        "is_multi_select": False,
+        "explanation": "",
+        "topic": topic,
+        "has_images": False,
+    }
+
+
+@asynccontextmanager
+async def seeded_certification(questions: int, topics: int, batch_size: int = 1000):
+    """Create a certification with synthetic questions and delete it afterwards.
+    
+    Yields ``(certification_id, question_ids)``.
+    """
+    await init_db()
+    certification_id = uuid.uuid4()
+    topic_names = [f"Topic {t + 1:03d}" for t in range(topics)]
+    question_ids: List[uuid.UUID] = []
+    
+    async with async_session() as db:
+        db.add(Certification(
+            id=certification_id,
+            name=f"Benchmark {certification_id}",
+            slug=f"benchmark-{certification_id}",
+            pdf_path="",
+            total_questions=questions,
+            processing_status="completed",
+            processing_progress=100,
+        ))
+        await db.flush()
+        for start in range(0, questions, batch_size):
+            rows = [
+                synthetic_question(certification_id, n + 1, random.choice(topic_names))
+                for n in range(start, min(start + batch_size, questions))
+            ]
+            question_ids.extend(row["id"] for row in rows)
+            await db.execute(insert(Question), rows)
+        await db.commit()
+    print(f"Seeded {questions} questions across {topics} topics", flush=True)
+    
+    try:
+        yield certification_id, question_ids
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Certification).where(Certification.id == certification_id))
+            await db.commit()
+
+
+async def seed_answers(
+    certification_id: uuid.UUID,
+    question_ids: List[uuid.UUID],
+    fraction: float,
+    accuracy: float = 0.6,
+    batch_size: int = 1000
+) -> uuid.UUID:
+    """Answer a random ``fraction`` of the questions in one completed session.
+    
+    The answers are inserted directly, so question_stats and topic_stats are
+    rebuilt from them afterwards, as the stats migration does.
+    """
+    answered = random.sample(question_ids, int(len(question_ids) * fraction))
+    session_id = uuid.uuid4()
+    async with async_session() as db:
+        session = QuizSession(
+            id=session_id,
+            certification_id=certification_id,
+            session_type="random",
+            total_questions=len(answered),
+            status="completed",
+        )
+        db.add(session)
+        await db.flush()
+        await add_session_questions(db, session.id, answered)
+        for start in range(0, len(answered), batch_size):
+            await db.execute(insert(SessionAnswer), [
+                {
+                    "id": uuid.uuid4(),
+                    "session_id": session.id,
+                    "question_id": qid,
+                    "user_answer": "B",
+                    "is_correct": random.random() < accuracy,
+                }
+                for qid in answered[start:start + batch_size]
+            ])
+        await db.commit()
+    async with engine.begin() as conn:
+        await rebuild_question_stats(conn, certification_id)
+        await rebuild_topic_stats(conn, certification_id)
+    return session_id
+
+
+async def time_async(fn: Callable[[], Awaitable], runs: int) -> Dict[str, float]:
+    """Run ``fn`` ``runs`` times and return latency percentiles in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return latency_stats(samples)
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples in milliseconds."""
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+    }
+
+
+async def time_concurrent(
+    fn: Callable[[int], Awaitable],
+    workers: int,
+    runs: int
+) -> Dict[str, float]:
+    """Run ``fn(worker)`` ``runs`` times in each of ``workers`` concurrent tasks."""
+    samples: List[float] = []
+    
+    async def worker(n: int):
+        for _ in range(runs):
+            started = time.perf_counter()
+            await fn(n)
+            samples.append((time.perf_counter() - started) * 1000)
+    
+    await asyncio.gather(*(worker(n) for n in range(workers)))
+    return latency_stats(samples)
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Print a small results table."""
+    print(f"\n{title}")
+    print(f"{'variant':<32}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<32}{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['mean_ms']:>10}")
@@ -0,0 +1,103 @@
+"""
+Benchmark random question sampling: ``ORDER BY random()`` vs the in-memory
+question index used by ``quiz.sampling``.
+
+    python -m benchmarks.session_sampling --questions 20000 --topics 40
+"""
+import uuid
+import asyncio
+import argparse
+
+from sqlalchemy import select, func
+
+from shared.database import async_session
+from shared.models import Question
+from quiz.sampling import QuestionSampler
+from benchmarks.common import seeded_certification, time_async, print_results
+
+
+async def legacy_random(db, certification_id: uuid.UUID, count: int):
+    result = await db.execute(
+        select(Question.id)
+        .where(Question.certification_id == certification_id)
+        .order_by(func.random())
+        .limit(count)
+    )
+    return result.scalars().all()
+
+
+async def legacy_weak(db, certification_id: uuid.UUID, topics, count: int):
+    result = await db.execute(
+        select(Question.id)
+        .where(Question.certification_id == certification_id, Question.topic.in_(topics))
+        .order_by(func.random())
+        .limit(count)
+    )
+    return result.scalars().all()
+
+
+async def legacy_per_topic(db, certification_id: uuid.UUID, topics, per_topic: int):
+    ids = []
+    for topic in topics:
+        result = await db.execute(
+            select(Question.id)
+            .where(Question.certification_id == certification_id, Question.topic == topic)
+            .order_by(func.random())
+            .limit(per_topic)
+        )
+        ids.extend(result.scalars().all())
+    return ids
+
+
+async def main(args):
+    async with seeded_certification(args.questions, args.topics) as (certification_id, _):
+        async with async_session() as db:
+            topic_rows = await db.execute(
+                select(Question.topic).where(Question.certification_id == certification_id).distinct()
+            )
+            topics = [row[0] for row in topic_rows]
+            weak_topics = topics[:max(1, len(topics) // 5)]
+            per_topic = max(1, args.count // len(topics))
+            
+            sampler = QuestionSampler()
+            cold = await time_async(lambda: QuestionSampler().get_index(db, certification_id), 3)
+            await sampler.get_index(db, certification_id)
+            
+            async def sampled_random():
+                index = await sampler.get_index(db, certification_id)
+                return index.sample(args.count)
+            
+            async def sampled_weak():
+                index = await sampler.get_index(db, certification_id)
+                return index.sample(args.count, weak_topics)
+            
+            async def sampled_per_topic():
+                index = await sampler.get_index(db, certification_id)
+                return [qid for t in topics for qid in index.sample(per_topic, [t])]
+            
+            results = {
+                "random: ORDER BY random()": await time_async(
+                    lambda: legacy_random(db, certification_id, args.count), args.runs),
+                "random: index": await time_async(sampled_random, args.runs),
+                "weak_areas: ORDER BY random()": await time_async(
+                    lambda: legacy_weak(db, certification_id, weak_topics, args.count), args.runs),
+                "weak_areas: index": await time_async(sampled_weak, args.runs),
+                "per-topic: ORDER BY random()": await time_async(
+                    lambda: legacy_per_topic(db, certification_id, topics, per_topic), args.runs),
+                "per-topic: index": await time_async(sampled_per_topic, args.runs),
+                "index build (cold, per version)": cold,
+            }
+    
+    print_results(
+        f"Session sampling, {args.questions} questions / {len(topics)} topics / {args.count} per session",
+        results
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
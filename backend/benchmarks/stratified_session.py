@@ -0,0 +1,110 @@
+"""
+Benchmark stratified session building: the original 2T+1 round trips,
+the per-topic accuracy loop with in-memory sampling, and the single
+statement used by ``quiz.services.build_stratified_question_ids``.
+
+    python -m benchmarks.stratified_session --questions 20000 --topics 60
+"""
+import uuid
+import asyncio
+import argparse
+
+from sqlalchemy import select, func, and_, case
+
+from shared.database import async_session
+from shared.models import Question, SessionAnswer
+from quiz.sampling import QuestionSampler
+from quiz.services import build_stratified_question_ids
+from benchmarks.common import seeded_certification, seed_answers, time_async, print_results
+
+
+async def topic_priorities(db, certification_id: uuid.UUID):
+    """Topic query plus one accuracy query per topic (shared by both loop variants)."""
+    topics_result = await db.execute(
+        select(Question.topic, func.count(Question.id).label("total_questions"))
+        .where(Question.certification_id == certification_id)
+        .group_by(Question.topic)
+    )
+    topics_data = []
+    for row in topics_result.all():
+        acc_row = (await db.execute(
+            select(
+                func.count(SessionAnswer.id).label("answered"),
+                func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
+            )
+            .select_from(SessionAnswer)
+            .join(Question, SessionAnswer.question_id == Question.id)
+            .where(
+                and_(
+                    Question.certification_id == certification_id,
+                    Question.topic == row.topic if row.topic is not None else Question.topic.is_(None),
+                    SessionAnswer.is_correct.isnot(None)
+                )
+            )
+        )).one()
+        answered = acc_row.answered or 0
+        priority = 1000 if answered == 0 else 100 - (acc_row.correct or 0) / answered * 100
+        topics_data.append({"topic": row.topic, "total": row.total_questions, "priority": priority})
+    topics_data.sort(key=lambda x: x["priority"], reverse=True)
+    return topics_data
+
+
+def quotas(topics_data, question_count: int):
+    base = max(1, question_count // len(topics_data))
+    remaining = question_count - base * len(topics_data)
+    for i, info in enumerate(topics_data):
+        yield info["topic"], min(base + (1 if i < remaining else 0), info["total"])
+
+
+async def original_2t_plus_1(db, certification_id: uuid.UUID, question_count: int):
+    ids = []
+    for topic, quota in quotas(await topic_priorities(db, certification_id), question_count):
+        result = await db.execute(
+            select(Question.id)
+            .where(
+                Question.certification_id == certification_id,
+                Question.topic == topic if topic is not None else Question.topic.is_(None)
+            )
+            .order_by(func.random())
+            .limit(quota)
+        )
+        ids.extend(result.scalars().all())
+    return ids[:question_count]
+
+
+async def main(args):
+    async with seeded_certification(args.questions, args.topics) as (certification_id, question_ids):
+        await seed_answers(certification_id, question_ids, args.answered)
+        sampler = QuestionSampler()
+        
+        async with async_session() as db:
+            async def loop_with_index():
+                topics_data = await topic_priorities(db, certification_id)
+                index = await sampler.get_index(db, certification_id)
+                return [
+                    qid for topic, quota in quotas(topics_data, args.count)
+                    for qid in index.sample(quota, [topic])
+                ][:args.count]
+            
+            results = {
+                "2T+1 queries, ORDER BY random()": await time_async(
+                    lambda: original_2t_plus_1(db, certification_id, args.count), args.runs),
+                "T+1 queries, in-memory index": await time_async(loop_with_index, args.runs),
+                "single statement": await time_async(
+                    lambda: build_stratified_question_ids(db, certification_id, args.count), args.runs),
+            }
+    
+    print_results(
+        f"Stratified session, {args.questions} questions / {args.topics} topics / {args.count} per session",
+        results
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=60)
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--answered", type=float, default=0.3, help="fraction of questions answered")
+    parser.add_argument("--runs", type=int, default=30)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""
+Benchmark quiz suggestions: the original five sequential queries, the single
+statement built by ``quiz.services.suggestion_inputs_query`` and a Redis
+cache hit through ``quiz.services.get_suggestions``.
+
+    python -m benchmarks.suggestions --questions 20000 --topics 40
+"""
+import uuid
+import asyncio
+import argparse
+
+from sqlalchemy import select, func, and_
+
+from shared import cache
+from shared.database import async_session
+from shared.models import Question, QuizSession, BookmarkedQuestion
+from quiz.services import get_weak_topics, get_suggestions, suggestion_inputs_query
+from quiz.stats import invalidate_suggestions_cache
+from benchmarks.common import seeded_certification, seed_answers, time_async, print_results
+
+
+async def original_inputs(db, certification_id: uuid.UUID):
+    weak_topics = await get_weak_topics(db, certification_id)
+    weak_count = None
+    if weak_topics:
+        weak_count = (await db.execute(
+            select(func.count()).select_from(Question)
+            .where(and_(Question.certification_id == certification_id, Question.topic.in_(weak_topics)))
+        )).scalar()
+    session = (await db.execute(
+        select(QuizSession)
+        .where(and_(QuizSession.certification_id == certification_id, QuizSession.status == "in_progress"))
+        .order_by(QuizSession.started_at.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    bookmarks = (await db.execute(
+        select(func.count()).select_from(BookmarkedQuestion)
+        .join(Question, BookmarkedQuestion.question_id == Question.id)
+        .where(Question.certification_id == certification_id)
+    )).scalar()
+    total = (await db.execute(
+        select(func.count()).select_from(Question).where(Question.certification_id == certification_id)
+    )).scalar()
+    return weak_topics, weak_count, session, bookmarks, total
+
+
+async def main(args):
+    await cache.init_redis()
+    async with seeded_certification(args.questions, args.topics) as (certification_id, question_ids):
+        await seed_answers(certification_id, question_ids, args.answered, accuracy=0.5)
+
+        async with async_session() as db:
+            async def single_statement():
+                return (await db.execute(suggestion_inputs_query(certification_id))).one()
+
+            async def uncached():
+                await invalidate_suggestions_cache(certification_id)
+                return await get_suggestions(db, certification_id)
+
+            await get_suggestions(db, certification_id)
+            results = {
+                "inputs: five queries": await time_async(
+                    lambda: original_inputs(db, certification_id), args.runs),
+                "inputs: single statement": await time_async(single_statement, args.runs),
+                "get_suggestions: cache miss": await time_async(uncached, args.runs),
+                "get_suggestions: cache hit": await time_async(
+                    lambda: get_suggestions(db, certification_id), args.runs),
+            }
+        await invalidate_suggestions_cache(certification_id)
+    await cache.close_redis()
+
+    print_results(f"Suggestions, {args.questions} questions / {args.topics} topics", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--answered", type=float, default=0.3)
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,236 @@
+"""
+Portable certification archives: streamed export and bulk restore.
+
+An archive is a zip with ``manifest.json``, ``questions.jsonl`` (one question
+per line, images described inline) and the image files under ``images/``.
+Export writes the zip incrementally into small chunks so neither the archive
+nor the question bank is held in memory; restore keeps certification and
+question IDs so environments can be seeded with identical data.
+"""
+import io
+import os
+import json
+import uuid
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, Dict, Any, List
+
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from shared.config import settings
+from shared.database import async_session
+from shared.models import Certification, Question, QuestionImage
+from shared.answers import answer_metadata
+from certifications.importers import IMPORT_BATCH_SIZE
+
+ARCHIVE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+QUESTIONS_NAME = "questions.jsonl"
+IMAGES_PREFIX = "images/"
+# Bytes accumulated before a chunk is sent to the client
+STREAM_CHUNK_SIZE = 64 * 1024
+# Questions fetched per round trip while exporting
+EXPORT_FETCH_SIZE = 500
+
+
+class ArchiveError(ValueError):
+    """Raised when an archive cannot be restored."""
+
+
+class ArchiveConflictError(ArchiveError):
+    """Raised when the archived certification already exists."""
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink; zipfile falls back to streaming mode."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def _question_to_record(question: Question) -> Dict[str, Any]:
+    """Serialize a question (and its image metadata) for ``questions.jsonl``."""
+    return {
+        "id": str(question.id),
+        "question_number": question.question_number,
+        "question_text": question.question_text,
+        "options": list(question.options),
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation,
+        "has_images": question.has_images,
+        "topic": question.topic,
+        "difficulty": question.difficulty,
+        "images": [
+            {
+                "id": str(img.id),
+                "filename": os.path.basename(img.image_path),
+                "image_order": img.image_order,
+                "position_in_pdf": img.position_in_pdf,
+                "width": img.width,
+                "height": img.height,
+            }
+            for img in question.images
+        ],
+    }
+
+
+async def stream_certification_archive(certification: Certification) -> AsyncIterator[bytes]:
+    """Yield a certification's archive as zip chunks.
+
+    Uses its own session so the stream outlives the request's session.
+    """
+    buffer = _ChunkBuffer()
+    # Page images can be linked to several questions; store each file once
+    image_paths: Dict[str, None] = {}
+
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        manifest = {
+            "version": ARCHIVE_FORMAT_VERSION,
+            "exported_at": datetime.utcnow().isoformat(),
+            "certification": {
+                "id": str(certification.id),
+                "name": certification.name,
+                "slug": certification.slug,
+                "description": certification.description,
+                "total_questions": certification.total_questions,
+            },
+        }
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+
+        async with async_session() as db:
+            result = await db.stream_scalars(
+                select(Question)
+                .where(Question.certification_id == certification.id)
+                .options(selectinload(Question.images))
+                .order_by(Question.question_number)
+                .execution_options(yield_per=EXPORT_FETCH_SIZE)
+            )
+            with zf.open(QUESTIONS_NAME, "w") as entry:
+                async for question in result:
+                    entry.write((json.dumps(_question_to_record(question)) + "\n").encode())
+                    image_paths.update(dict.fromkeys(img.image_path for img in question.images))
+                    if buffer.size >= STREAM_CHUNK_SIZE:
+                        yield buffer.drain()
+
+        # Image files are copied in chunks after the question stream
+        images_root = os.path.join(settings.data_path, "images")
+        for image_path in image_paths:
+            source = os.path.join(images_root, image_path)
+            if not os.path.exists(source):
+                print(f"[EXPORT WARN] Missing image file {source}", flush=True)
+                continue
+            with open(source, "rb") as src, zf.open(IMAGES_PREFIX + os.path.basename(image_path), "w") as entry:
+                while chunk := src.read(STREAM_CHUNK_SIZE):
+                    entry.write(chunk)
+                    if buffer.size >= STREAM_CHUNK_SIZE:
+                        yield buffer.drain()
+
+    yield buffer.drain()
+
+
+def read_archive_manifest(archive: zipfile.ZipFile) -> Dict[str, Any]:
+    """Read and check an archive's manifest."""
+    try:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+    except KeyError:
+        raise ArchiveError("Archive has no manifest.json")
+    except json.JSONDecodeError:
+        raise ArchiveError("Archive manifest is not valid JSON")
+    if manifest.get("version") != ARCHIVE_FORMAT_VERSION:
+        raise ArchiveError(f"Unsupported archive version: {manifest.get('version')}")
+    if QUESTIONS_NAME not in archive.namelist():
+        raise ArchiveError("Archive has no questions.jsonl")
+    return manifest
+
+
+async def restore_archive_questions(
+    db: AsyncSession,
+    certification: Certification,
+    archive: zipfile.ZipFile,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> Dict[str, int]:
+    """Bulk insert an archive's questions and images, keeping their IDs."""
+    images_dir = os.path.join(settings.data_path, "images", str(certification.id))
+    names = set(archive.namelist())
+    stats = {"questions": 0, "images": 0}
+    question_rows: List[Dict[str, Any]] = []
+    image_rows: List[Dict[str, Any]] = []
+    now = datetime.utcnow()
+
+    async def flush_batch():
+        if question_rows:
+            await db.execute(insert(Question), question_rows)
+        if image_rows:
+            await db.execute(insert(QuestionImage), image_rows)
+        stats["questions"] += len(question_rows)
+        stats["images"] += len(image_rows)
+        question_rows.clear()
+        image_rows.clear()
+
+    with archive.open(QUESTIONS_NAME) as entry:
+        for line_no, line in enumerate(io.TextIOWrapper(entry, encoding="utf-8"), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                question_id = uuid.UUID(record["id"])
+                question_rows.append({
+                    "id": question_id,
+                    "certification_id": certification.id,
+                    "question_number": int(record["question_number"]),
+                    "question_text": record["question_text"],
+                    "options": record["options"],
+                    "correct_answer": record["correct_answer"],
+                    **answer_metadata(record["question_text"], record["correct_answer"]),
+                    "explanation": record.get("explanation") or "",
+                    "has_images": bool(record.get("images")),
+                    "topic": record.get("topic"),
+                    "difficulty": record.get("difficulty"),
+                    "created_at": now,
+                })
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                raise ArchiveError(f"Invalid question at line {line_no}: {e}")
+
+            for img in record.get("images") or []:
+                filename = os.path.basename(img["filename"])
+                member = IMAGES_PREFIX + filename
+                if member not in names:
+                    raise ArchiveError(f"Image {filename} missing from archive")
+                os.makedirs(images_dir, exist_ok=True)
+                with archive.open(member) as src, open(os.path.join(images_dir, filename), "wb") as dst:
+                    while chunk := src.read(STREAM_CHUNK_SIZE):
+                        dst.write(chunk)
+                image_rows.append({
+                    "id": uuid.UUID(img["id"]),
+                    "question_id": question_id,
+                    "image_path": f"{certification.id}/{filename}",
+                    "image_order": img.get("image_order") or 1,
+                    "position_in_pdf": img.get("position_in_pdf"),
+                    "width": img.get("width"),
+                    "height": img.get("height"),
+                    "created_at": now,
+                })
+
+            if len(question_rows) >= batch_size:
+                await flush_batch()
+
+    await flush_batch()
+    certification.total_questions = stats["questions"]
+    return stats
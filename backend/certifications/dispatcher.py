@@ -0,0 +1,163 @@
+"""
+Process-wide LLM dispatcher shared by all PDF processing jobs.
+
+Each processing job runs in its own thread and event loop, so slots are
+handed out with thread-safe futures. Jobs are served by weighted fair
+queuing: every grant advances the job's virtual time by ``1 / weight``, and
+the waiting job with the lowest virtual time gets the next free slot.
+"""
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from shared.config import settings
+
+# Weight multipliers for job priorities (higher is served more often)
+PRIORITY_WEIGHTS = {"high": 4.0, "normal": 1.0, "low": 0.25}
+# Jobs with at most this many blocks get a small-job boost
+SMALL_JOB_BLOCKS = 50
+SMALL_JOB_BOOST = 2.0
+
+
+def job_weight(priority: str, total_blocks: int) -> float:
+    """Compute the fair-share weight of a job from its priority and size."""
+    weight = PRIORITY_WEIGHTS.get(priority, 1.0)
+    if total_blocks <= SMALL_JOB_BLOCKS:
+        weight *= SMALL_JOB_BOOST
+    return weight
+
+
+class _JobState:
+    """Queue and accounting for one job."""
+
+    def __init__(self, weight: float, vtime: float):
+        self.weight = weight
+        self.vtime = vtime
+        self.in_flight = 0
+        self.granted = 0
+        self.waiters: deque = deque()
+
+
+class LLMDispatcher:
+    """Fair, priority-aware limiter for concurrent LLM calls across jobs."""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self._max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _JobState] = {}
+        self._in_flight = 0
+        self._vclock = 0.0
+
+    @property
+    def max_concurrency(self) -> int:
+        """Total concurrent LLM calls allowed for the provider."""
+        if self._max_concurrency:
+            return self._max_concurrency
+        if settings.llm_provider == "local":
+            return settings.llm_local_max_concurrency
+        return settings.llm_max_concurrency
+
+    def register_job(self, job_id: str, weight: float = 1.0) -> None:
+        """Register (or re-weight) a job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                self._jobs[job_id] = _JobState(weight, self._vclock)
+            else:
+                job.weight = weight
+
+    def remove_job(self, job_id: str) -> None:
+        """Drop a job, cancelling calls still waiting for a slot.
+
+        Calls already holding a slot keep it until they finish.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                for fut in job.waiters:
+                    fut.cancel()
+
+    async def acquire(self, job_id: str) -> None:
+        """Wait for a slot for the given job."""
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = _JobState(1.0, self._vclock)
+            if not job.waiters and not job.in_flight:
+                # An idle job restarts at the current virtual time instead of
+                # spending credit accumulated while it had nothing queued
+                job.vtime = max(job.vtime, self._vclock)
+            job.waiters.append(fut)
+            self._grant_locked()
+
+        try:
+            await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            with self._lock:
+                if fut in job.waiters:
+                    job.waiters.remove(fut)
+                elif fut.done() and not fut.cancelled():
+                    # Slot was granted just before cancellation; give it back
+                    self._release_locked(job)
+            raise
+
+    def release(self, job_id: str) -> None:
+        """Return a slot taken by ``acquire``."""
+        with self._lock:
+            self._release_locked(self._jobs.get(job_id))
+
+    @asynccontextmanager
+    async def slot(self, job_id: str):
+        """Hold one LLM slot for the duration of the block."""
+        await self.acquire(job_id)
+        try:
+            yield
+        finally:
+            self.release(job_id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return current capacity usage and per-job queue state."""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "jobs": {
+                    job_id: {
+                        "weight": job.weight,
+                        "queued": len(job.waiters),
+                        "in_flight": job.in_flight,
+                        "granted": job.granted,
+                    }
+                    for job_id, job in self._jobs.items()
+                },
+            }
+
+    def _release_locked(self, job: Optional[_JobState]) -> None:
+        self._in_flight -= 1
+        if job is not None:
+            job.in_flight -= 1
+        self._grant_locked()
+
+    def _grant_locked(self) -> None:
+        while self._in_flight < self.max_concurrency:
+            candidates = [j for j in self._jobs.values() if j.waiters]
+            if not candidates:
+                return
+            job = min(candidates, key=lambda j: j.vtime)
+            fut = job.waiters.popleft()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            self._vclock = job.vtime
+            job.vtime += 1.0 / job.weight
+            job.in_flight += 1
+            job.granted += 1
+            self._in_flight += 1
+            fut.set_result(True)
+
+
+# Shared by every processing job in this process
+llm_dispatcher = LLMDispatcher()
@@ -0,0 +1,375 @@
+"""
+Structured question bank import (JSON Lines, CSV, Anki) bypassing PDF parsing.
+
+Records are read lazily from the uploaded file, validated, and written with
+multi-row INSERTs in batches, so large banks never sit in memory at once.
+"""
+import io
+import os
+import re
+import csv
+import html
+import json
+import uuid
+import base64
+import sqlite3
+import zipfile
+import tempfile
+from datetime import datetime
+from typing import Iterator, Iterable, Tuple, Dict, Any, List, Optional, BinaryIO
+
+from PIL import Image
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import settings
+from shared.models import Certification, Question, QuestionImage
+from shared.answers import extract_answer_letters, answer_metadata
+
+IMPORT_FORMATS = ("jsonl", "csv", "anki")
+# Rows per multi-row INSERT
+IMPORT_BATCH_SIZE = 1000
+# Error messages returned to the caller (the rest are only counted)
+MAX_REPORTED_ERRORS = 50
+
+OPTION_LETTERS = "ABCDEFGH"
+LABELED_OPTION_PATTERN = re.compile(r"^\s*\(?([A-Ha-h])[\.\):]\s+(.+)$")
+IMG_SRC_PATTERN = re.compile(r"<img[^>]+src=[\"']([^\"']+)[\"']", re.IGNORECASE)
+# Separator between fields of an Anki note
+ANKI_FIELD_SEPARATOR = "\x1f"
+
+
+class ImportRecordError(ValueError):
+    """Raised when a single record cannot be imported."""
+
+
+def detect_import_format(filename: str) -> Optional[str]:
+    """Guess the import format from a file name."""
+    ext = os.path.splitext(filename.lower())[1]
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    if ext in (".apkg", ".txt", ".tsv"):
+        return "anki"
+    return None
+
+
+def _normalize_options(raw_options: Any) -> List[str]:
+    """Return options labeled "A. text", "B. text", ... in order."""
+    if isinstance(raw_options, dict):
+        items = [str(raw_options[k]) for k in sorted(raw_options)]
+    elif isinstance(raw_options, list):
+        items = [str(o) for o in raw_options]
+    elif isinstance(raw_options, str):
+        items = raw_options.split("|")
+    else:
+        raise ImportRecordError("options must be a list, object or '|'-separated string")
+
+    options = []
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        m = LABELED_OPTION_PATTERN.match(item)
+        text = m.group(2).strip() if m else item
+        options.append(text)
+
+    if len(options) < 2:
+        raise ImportRecordError("fewer than two options")
+    if len(options) > len(OPTION_LETTERS):
+        raise ImportRecordError(f"more than {len(OPTION_LETTERS)} options")
+    return [f"{OPTION_LETTERS[i]}. {text}" for i, text in enumerate(options)]
+
+
+def _normalize_correct_answer(raw_answer: Any, options: List[str]) -> str:
+    """Return the correct answer as "B. text" (or "A. x, C. y" for multi-select).
+
+    Accepts letters ("B", "A,C"), labeled answers ("B. text"), option
+    indexes or the full text of the correct option.
+    """
+    by_letter = {o[0]: o for o in options}
+    if isinstance(raw_answer, int):
+        raw_answer = [raw_answer]
+    if isinstance(raw_answer, list):
+        letters = set()
+        for item in raw_answer:
+            if isinstance(item, int) and 0 <= item < len(options):
+                letters.add(OPTION_LETTERS[item])
+            else:
+                letters |= extract_answer_letters(str(item))
+    else:
+        answer = str(raw_answer or "").strip()
+        if not answer:
+            raise ImportRecordError("missing correct answer")
+        # Answer given as the text of an option
+        matches = {o[0] for o in options if o[3:].strip().lower() == answer.lower()}
+        letters = matches or extract_answer_letters(answer)
+
+    if not letters or not letters <= set(by_letter):
+        raise ImportRecordError("correct answer letters not among options")
+    return ", ".join(by_letter[letter] for letter in sorted(letters))
+
+
+def _decode_image(raw: Any, index: int) -> Dict[str, Any]:
+    """Decode an image given as {"filename", "data"|"content"} or a data URI."""
+    if isinstance(raw, str):
+        raw = {"data": raw}
+    if not isinstance(raw, dict):
+        raise ImportRecordError("images must be objects or base64 strings")
+    content = raw.get("content")
+    if content is None:
+        data = str(raw.get("data") or "")
+        if data.startswith("data:"):
+            data = data.split(",", 1)[-1]
+        try:
+            content = base64.b64decode(data, validate=True)
+        except ValueError:
+            raise ImportRecordError(f"image {index} is not valid base64")
+    if not content:
+        raise ImportRecordError(f"image {index} is empty")
+    return {"filename": raw.get("filename") or f"image_{index}.png", "content": content}
+
+
+def normalize_record(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a raw record and convert it to question column values."""
+    question_text = str(raw.get("question") or raw.get("question_text") or "").strip()
+    if not question_text:
+        raise ImportRecordError("missing question text")
+
+    options = _normalize_options(raw.get("options"))
+    correct_answer = _normalize_correct_answer(raw.get("correct_answer", raw.get("answer")), options)
+
+    topic = (str(raw.get("topic") or "").strip() or None)
+    difficulty = (str(raw.get("difficulty") or "").strip() or None)
+    return {
+        "question_text": question_text,
+        "options": options,
+        "correct_answer": correct_answer,
+        **answer_metadata(question_text, correct_answer),
+        "explanation": str(raw.get("explanation") or "").strip(),
+        "topic": topic[:200] if topic else None,
+        "difficulty": difficulty[:50] if difficulty else None,
+        "images": [_decode_image(img, i) for i, img in enumerate(raw.get("images") or [], 1)],
+    }
+
+
+def iter_jsonl_records(fileobj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, record) from a JSON Lines stream."""
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig")
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ImportRecordError(f"invalid JSON: {e.msg}")
+
+
+def iter_csv_records(fileobj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, record) from a CSV stream with a header row.
+
+    Options come from ``option_a`` .. ``option_h`` columns or a single
+    ``options`` column separated by ``|``.
+    """
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(stream)
+    for row in reader:
+        row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k is not None}
+        if not row.get("options"):
+            row["options"] = [
+                row[f"option_{letter.lower()}"] for letter in OPTION_LETTERS
+                if row.get(f"option_{letter.lower()}")
+            ]
+        yield reader.line_num, row
+
+
+def _html_to_lines(value: str) -> List[str]:
+    """Convert an Anki HTML field to plain text lines."""
+    value = re.sub(r"<\s*(br|/div|/p|/li)\s*/?>", "\n", value, flags=re.IGNORECASE)
+    value = html.unescape(re.sub(r"<[^>]+>", "", value))
+    return [line.strip() for line in value.split("\n") if line.strip()]
+
+
+def _anki_note_to_record(fields: List[str], media: Dict[str, bytes]) -> Dict[str, Any]:
+    """Build a raw record from an Anki note's front and back fields.
+
+    The front holds the question followed by lettered options; the back's
+    first line is the answer and the remaining lines the explanation.
+    """
+    if len(fields) < 2:
+        raise ImportRecordError("note has fewer than two fields")
+    front, back = fields[0], fields[1]
+
+    question_lines, options = [], []
+    for line in _html_to_lines(front):
+        if LABELED_OPTION_PATTERN.match(line):
+            options.append(line)
+        elif options:
+            options[-1] += " " + line
+        else:
+            question_lines.append(line)
+
+    back_lines = _html_to_lines(back)
+    images = [
+        {"filename": os.path.basename(src), "content": media[src]}
+        for src in IMG_SRC_PATTERN.findall(front) if src in media
+    ]
+    return {
+        "question": "\n".join(question_lines),
+        "options": options,
+        "correct_answer": back_lines[0] if back_lines else "",
+        "explanation": "\n".join(back_lines[1:]),
+        "images": images,
+    }
+
+
+def iter_anki_records(fileobj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (note number, record) from an Anki ``.apkg`` or text export.
+
+    Text exports are tab-separated "front<TAB>back" lines; ``#`` header
+    lines are skipped.
+    """
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        yield from _iter_apkg_records(fileobj)
+        return
+    fileobj.seek(0)
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    for line_no, row in enumerate(csv.reader(stream, delimiter="\t"), 1):
+        if not row or row[0].startswith("#"):
+            continue
+        try:
+            yield line_no, _anki_note_to_record(row, {})
+        except ImportRecordError as e:
+            yield line_no, e
+
+
+def _iter_apkg_records(fileobj: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield records from an Anki package (zip with a SQLite collection)."""
+    with zipfile.ZipFile(fileobj) as archive:
+        names = set(archive.namelist())
+        collection_name = next(
+            (n for n in ("collection.anki21", "collection.anki2") if n in names), None
+        )
+        if collection_name is None:
+            raise ImportRecordError("Anki package has no legacy collection (export with 'support older Anki versions')")
+
+        # Media map: zip member name -> original file name
+        media_map = json.loads(archive.read("media")) if "media" in names else {}
+        media = {filename: archive.read(member) for member, filename in media_map.items() if member in names}
+
+        # sqlite3 needs a real file
+        with tempfile.NamedTemporaryFile(suffix=".anki2") as tmp:
+            tmp.write(archive.read(collection_name))
+            tmp.flush()
+            conn = sqlite3.connect(tmp.name)
+            try:
+                for note_no, (flds,) in enumerate(conn.execute("SELECT flds FROM notes ORDER BY id"), 1):
+                    try:
+                        yield note_no, _anki_note_to_record(flds.split(ANKI_FIELD_SEPARATOR), media)
+                    except ImportRecordError as e:
+                        yield note_no, e
+            finally:
+                conn.close()
+
+
+def iter_import_records(fileobj: BinaryIO, import_format: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (position, raw record or ImportRecordError) for a file."""
+    if import_format == "jsonl":
+        return iter_jsonl_records(fileobj)
+    if import_format == "csv":
+        return iter_csv_records(fileobj)
+    if import_format == "anki":
+        return iter_anki_records(fileobj)
+    raise ValueError(f"Unsupported import format: {import_format}")
+
+
+def _save_image(images_dir: str, question_number: int, order: int, image: Dict[str, Any]) -> Dict[str, Any]:
+    """Write an image file and return its filename and dimensions."""
+    ext = os.path.splitext(image["filename"])[1].lower() or ".png"
+    filename = f"imported_q{question_number}_{order}{ext}"
+    with open(os.path.join(images_dir, filename), "wb") as f:
+        f.write(image["content"])
+    try:
+        with Image.open(io.BytesIO(image["content"])) as img:
+            width, height = img.size
+    except Exception:
+        width = height = None
+    return {"filename": filename, "width": width, "height": height}
+
+
+async def import_question_bank(
+    db: AsyncSession,
+    certification: Certification,
+    records: Iterable[Tuple[int, Any]],
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """Validate records and bulk insert them as questions of a certification.
+
+    Invalid records are skipped and reported; valid ones are inserted with
+    one multi-row INSERT per batch for questions and one for their images.
+    """
+    images_dir = os.path.join(settings.data_path, "images", str(certification.id))
+    stats: Dict[str, Any] = {"imported": 0, "skipped": 0, "images": 0, "errors": []}
+    question_rows: List[Dict[str, Any]] = []
+    image_rows: List[Dict[str, Any]] = []
+    question_number = certification.total_questions or 0
+    now = datetime.utcnow()
+
+    async def flush_batch():
+        if question_rows:
+            await db.execute(insert(Question), question_rows)
+        if image_rows:
+            await db.execute(insert(QuestionImage), image_rows)
+        stats["imported"] += len(question_rows)
+        stats["images"] += len(image_rows)
+        question_rows.clear()
+        image_rows.clear()
+
+    for position, raw in records:
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            if not isinstance(raw, dict):
+                raise ImportRecordError("record must be an object")
+            record = normalize_record(raw)
+        except ImportRecordError as e:
+            stats["skipped"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append(f"record {position}: {e}")
+            continue
+
+        question_number += 1
+        question_id = uuid.uuid4()
+        images = record.pop("images")
+        question_rows.append({
+            **record,
+            "id": question_id,
+            "certification_id": certification.id,
+            "question_number": question_number,
+            "has_images": bool(images),
+            "created_at": now,
+        })
+        if images:
+            os.makedirs(images_dir, exist_ok=True)
+        for order, image in enumerate(images, 1):
+            saved = _save_image(images_dir, question_number, order, image)
+            image_rows.append({
+                "id": uuid.uuid4(),
+                "question_id": question_id,
+                "image_path": f"{certification.id}/{saved['filename']}",
+                "image_order": order,
+                "position_in_pdf": None,
+                "width": saved["width"],
+                "height": saved["height"],
+                "created_at": now,
+            })
+
+        if len(question_rows) >= batch_size:
+            await flush_batch()
+
+    await flush_batch()
+    certification.total_questions = question_number
+    return stats
@@ -0,0 +1,261 @@
+"""
+LLM invocation for PDF processing, with record/replay support.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+from shared.config import settings
+
+# Models per provider and routing tier; "strong" is also the single-tier default
+MODEL_TIERS = {
+    "openai": {"fast": "gpt-4.1-nano", "strong": "gpt-4.1-mini"},
+    "gemini": {"fast": "gemini-2.0-flash-lite", "strong": "gemini-2.0-flash"},
+}
+
+# Timeout for hosted provider calls; local servers use llm_local_timeout
+HOSTED_TIMEOUT_SECONDS = 60
+
+
+class LLMArchive:
+    """Append-only JSONL archive of prompt/response pairs.
+
+    Entries are keyed by provider, model and the fully rendered prompt, so a
+    replayed run only hits entries recorded with the same pipeline settings.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str) -> str:
+        """Build the archive key for a prompt."""
+        content = f"{provider}\x00{model}\x00{prompt}"
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load archive entries from disk (once)."""
+        if self._entries is None:
+            entries: Dict[str, Dict[str, Any]] = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        entries[entry["key"]] = entry
+            self._entries = entries
+        return self._entries
+
+    def lookup(self, provider: str, model: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Return the recorded entry for a prompt, if any."""
+        with self._lock:
+            return self._load().get(self.make_key(provider, model, prompt))
+
+    def record(self, provider: str, model: str, prompt: str, response: str, latency_ms: int):
+        """Append a prompt/response pair to the archive."""
+        entry = {
+            "key": self.make_key(provider, model, prompt),
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "response": response,
+            "latency_ms": latency_ms,
+            "recorded_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._load()[entry["key"]] = entry
+
+
+_archive: Optional[LLMArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[LLMArchive]:
+    """Get the shared archive when record or replay mode is enabled."""
+    global _archive
+    if settings.llm_archive_mode not in ("record", "replay"):
+        return None
+    with _archive_lock:
+        if _archive is None:
+            path = settings.llm_archive_path or os.path.join(settings.data_path, "llm_archive.jsonl")
+            _archive = LLMArchive(path)
+        return _archive
+
+
+def resolve_provider() -> Optional[str]:
+    """Pick the provider to use based on settings.
+
+    API keys are not required in replay mode since no provider is contacted,
+    nor for a local OpenAI-compatible server.
+    """
+    replaying = settings.llm_archive_mode == "replay"
+    if settings.llm_provider == "local":
+        return "local"
+    if settings.llm_provider == "gemini" and (settings.google_api_key or replaying):
+        return "gemini"
+    if settings.openai_api_key or replaying:
+        return "openai"
+    return None
+
+
+def get_model_tiers(provider: str) -> List[Tuple[str, str]]:
+    """Return the (tier, model) pairs to try in order.
+
+    With tiered routing enabled a cheaper model is tried first and only
+    results failing validation escalate to the strong model.
+    """
+    if provider == "local":
+        tiers = {"fast": settings.llm_local_model, "strong": settings.llm_local_model}
+    else:
+        tiers = MODEL_TIERS[provider]
+    fast_model = settings.llm_fast_model or tiers["fast"]
+    strong_model = settings.llm_strong_model or tiers["strong"]
+    if settings.llm_tiered_routing and fast_model != strong_model:
+        return [("fast", fast_model), ("strong", strong_model)]
+    return [("strong", strong_model)]
+
+
+class RoutingStats:
+    """Thread-safe per-tier call, escalation and latency counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, int]] = {}
+
+    def record(self, tier: str, latency_ms: int, accepted: bool, escalated: bool):
+        """Record the outcome of one call on a tier."""
+        with self._lock:
+            stats = self._tiers.setdefault(tier, {
+                "calls": 0, "accepted": 0, "escalated": 0, "total_latency_ms": 0
+            })
+            stats["calls"] += 1
+            stats["accepted"] += int(accepted)
+            stats["escalated"] += int(escalated)
+            stats["total_latency_ms"] += latency_ms
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return counters plus escalation rate and mean latency per tier."""
+        with self._lock:
+            result = {}
+            for tier, stats in self._tiers.items():
+                calls = stats["calls"]
+                result[tier] = {
+                    **stats,
+                    "escalation_rate": round(stats["escalated"] / calls, 3) if calls else 0.0,
+                    "avg_latency_ms": round(stats["total_latency_ms"] / calls, 1) if calls else 0.0,
+                }
+            return result
+
+
+# Process-wide routing stats across all ingestion jobs
+routing_stats = RoutingStats()
+
+
+def build_llm(provider: str, model: str, timeout: Optional[int] = None):
+    """Create a LangChain chat model for the given provider.
+
+    ``timeout`` bounds each HTTP request made by the client and defaults to
+    the provider's timeout.
+    """
+    if timeout is None:
+        timeout = settings.llm_local_timeout if provider == "local" else HOSTED_TIMEOUT_SECONDS
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model=model,
+            temperature=0,
+            google_api_key=settings.google_api_key,
+            timeout=timeout
+        )
+    from langchain_openai import ChatOpenAI
+    if provider == "local":
+        return ChatOpenAI(
+            temperature=0,
+            model_name=model,
+            openai_api_key=settings.llm_local_api_key,
+            base_url=settings.llm_local_base_url,
+            timeout=timeout,
+            max_retries=0
+        )
+    return ChatOpenAI(
+        temperature=0,
+        model_name=model,
+        openai_api_key=settings.openai_api_key,
+        timeout=timeout
+    )
+
+
+async def invoke_llm(
+    prompt_template,
+    inputs: Dict[str, str],
+    timeout: Optional[int] = None,
+    model: Optional[str] = None
+) -> Optional[str]:
+    """Render the prompt and return the raw LLM response text.
+
+    ``model`` defaults to the provider's strong tier and ``timeout`` to the
+    provider's timeout.
+
+    In record mode every call is appended to the archive; in replay mode the
+    archived response is served instead, optionally delayed by the recorded
+    latency scaled by ``llm_replay_latency_scale``.
+    """
+    from langchain_core.output_parsers import StrOutputParser
+
+    provider = resolve_provider()
+    if not provider:
+        print("[TASK ERROR] No LLM API key configured", flush=True)
+        return None
+    if model is None:
+        model = get_model_tiers(provider)[-1][1]
+    if timeout is None:
+        timeout = settings.llm_local_timeout if provider == "local" else HOSTED_TIMEOUT_SECONDS
+
+    archive = get_archive()
+    prompt = prompt_template.format(**inputs)
+
+    if archive and settings.llm_archive_mode == "replay":
+        entry = archive.lookup(provider, model, prompt)
+        if entry is None:
+            print(f"[TASK WARN] No archived response for prompt ({provider}/{model})", flush=True)
+            return None
+        if settings.llm_replay_latency_scale > 0:
+            await asyncio.sleep(entry.get("latency_ms", 0) / 1000 * settings.llm_replay_latency_scale)
+        return entry["response"]
+
+    llm = build_llm(provider, model, timeout)
+    chain = prompt_template | llm | StrOutputParser()
+
+    # Run the synchronous invoke in a worker thread so the event loop stays free
+    # (explanations can be generated on demand from request handlers)
+    started = time.perf_counter()
+    call = asyncio.ensure_future(asyncio.to_thread(chain.invoke, inputs))
+    try:
+        raw_response = await asyncio.wait_for(asyncio.shield(call), timeout=timeout)
+    except asyncio.TimeoutError:
+        # The thread cannot be cancelled and client retries can outlast the
+        # deadline: wait for the client's own timeout to end it so the
+        # caller's dispatcher slot covers the request until it really stops
+        await asyncio.gather(call, return_exceptions=True)
+        raise
+    latency_ms = int((time.perf_counter() - started) * 1000)
+
+    if archive and settings.llm_archive_mode == "record":
+        archive.record(provider, model, prompt, raw_response, latency_ms)
+
+    return raw_response
@@ -0,0 +1,113 @@
+"""
+Minimal OpenAI-compatible chat completions server for offline ingestion tests.
+
+Answers question-parsing prompts with a deterministic JSON parse of the block
+(first option marked correct) and explanation prompts with a fixed text, so
+the full pipeline can run with ``LLM_PROVIDER=local`` and predictable latency:
+
+    python -m certifications.llm_stub_server --port 8080 --latency-ms 50
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+OPTION_PATTERN = re.compile(r"^\s*\(?([A-Ha-h])[\.\):]\s+(.+)$")
+
+
+def _stub_question(block: str) -> Dict[str, Any]:
+    """Build a question JSON from a raw question block."""
+    question_lines: List[str] = []
+    options: List[str] = []
+    for line in block.strip().split("\n"):
+        m = OPTION_PATTERN.match(line)
+        if m:
+            options.append(f"{m.group(1).upper()}. {m.group(2).strip()}")
+        elif options:
+            options[-1] += " " + line.strip()
+        elif line.strip():
+            question_lines.append(line.strip())
+    if not options:
+        options = ["A. True", "B. False"]
+    return {
+        "question": " ".join(question_lines) or block.strip()[:200],
+        "options": options,
+        "correct_answer": options[0],
+        "explanation": "Stub explanation.",
+        "topic": "General",
+    }
+
+
+def build_completion(prompt: str) -> str:
+    """Return the stub completion text for a prompt."""
+    marker = "Question text + options:"
+    if marker in prompt:
+        block = prompt.split(marker, 1)[1].rsplit("Respond only with valid JSON:", 1)[0]
+        return json.dumps(_stub_question(block))
+    return "Stub explanation."
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    latency_ms = 0
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        content = build_completion(prompt)
+        response = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "local-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency_ms: int = 0) -> ThreadingHTTPServer:
+    """Start the stub server in a daemon thread and return it.
+
+    Use ``server.server_address`` for the bound port and ``server.shutdown()``
+    to stop it.
+    """
+    handler = type("StubHandler", (_StubHandler,), {"latency_ms": latency_ms})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    handler = type("StubHandler", (_StubHandler,), {"latency_ms": args.latency_ms})
+    print(f"Stub LLM server listening on http://{args.host}:{args.port}/v1", flush=True)
+    ThreadingHTTPServer((args.host, args.port), handler).serve_forever()
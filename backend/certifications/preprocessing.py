@@ -0,0 +1,263 @@
+"""
+Text preprocessing applied to extracted PDF pages before block splitting.
+"""
+import os
+import re
+import json
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from shared.config import settings
+
+# A line is boilerplate when it repeats on at least this fraction of pages
+BOILERPLATE_MIN_PAGE_FRACTION = 0.5
+# Repetition is meaningless on very short documents
+BOILERPLATE_MIN_PAGES = 3
+# Only the first/last lines of a page are header/footer candidates
+BOILERPLATE_ZONE_LINES = 3
+# Rough characters-per-token ratio used to report prompt savings
+CHARS_PER_TOKEN = 4
+
+# Markers the block splitter (certifications.tasks) cuts questions on, tried
+# in order with re.IGNORECASE; lines containing one are never boilerplate
+QUESTION_SPLIT_PATTERNS = [
+    r"(Question\s*#\s*\d+)",
+    r"(Question\s+\d+)",
+    r"(Q\s*\d+[\.\):])",
+    r"(QUESTION\s*:?\s*\d+)",
+    r"(?:^|\n)(\d+\.\s+)",
+    r"(?:^|\n)(\d+\)\s+)",
+]
+
+# Lines that start questions, options or answer keys are never boilerplate
+PROTECTED_LINE_PATTERNS = [
+    r"^question\s*#?\s*:?\s*\d+",
+    r"^q\s*\d+[\.\):]",
+    r"^\d+[\.\)]",
+    r"^[a-h][\.\)]\s",
+    r"^(correct\s+)?answers?\s*:",
+    r"^explanation",
+]
+
+
+def _normalize_line(line: str) -> str:
+    """Normalize a line so page-varying numbers compare equal."""
+    line = re.sub(r"\s+", " ", line.strip().lower())
+    return re.sub(r"\d+", "#", line)
+
+
+def _is_protected(line: str) -> bool:
+    """Check whether a line looks like question content or holds a split marker."""
+    if any(re.search(p, line, re.IGNORECASE) for p in QUESTION_SPLIT_PATTERNS):
+        return True
+    stripped = line.strip().lower()
+    return any(re.match(p, stripped) for p in PROTECTED_LINE_PATTERNS)
+
+
+def _zone_indexes(line_count: int) -> List[int]:
+    """Indexes of header/footer lines on a page."""
+    zone = set(range(min(BOILERPLATE_ZONE_LINES, line_count)))
+    zone.update(range(max(0, line_count - BOILERPLATE_ZONE_LINES), line_count))
+    return sorted(zone)
+
+
+def strip_repeated_boilerplate(
+    pages_data: List[Dict[str, Any]],
+    min_page_fraction: float = BOILERPLATE_MIN_PAGE_FRACTION
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Remove headers, footers, watermarks and page numbers repeated across pages.
+
+    Returns the cleaned pages (same shape as ``extract_text_with_pages``) and
+    stats with the number of lines, characters and estimated tokens removed.
+    """
+    stats = {"pages": len(pages_data), "lines_removed": 0, "chars_saved": 0, "tokens_saved": 0}
+    if len(pages_data) < BOILERPLATE_MIN_PAGES:
+        return pages_data, stats
+
+    # Count on how many pages each normalized header/footer line appears
+    page_lines = [pd["text"].split("\n") for pd in pages_data]
+    counts: Counter = Counter()
+    for lines in page_lines:
+        seen = {
+            _normalize_line(lines[i]) for i in _zone_indexes(len(lines))
+            if lines[i].strip() and not _is_protected(lines[i])
+        }
+        counts.update(seen)
+
+    min_pages = max(BOILERPLATE_MIN_PAGES, int(len(pages_data) * min_page_fraction))
+    boilerplate = {line for line, count in counts.items() if count >= min_pages}
+    if not boilerplate:
+        return pages_data, stats
+
+    cleaned_pages = []
+    for pd, lines in zip(pages_data, page_lines):
+        zone = set(_zone_indexes(len(lines)))
+        kept = []
+        for i, line in enumerate(lines):
+            if i in zone and line.strip() and not _is_protected(line) and _normalize_line(line) in boilerplate:
+                stats["lines_removed"] += 1
+                stats["chars_saved"] += len(line) + 1
+                continue
+            kept.append(line)
+        text = "\n".join(kept).strip()
+        if text:
+            cleaned_pages.append({**pd, "text": text})
+
+    stats["tokens_saved"] = stats["chars_saved"] // CHARS_PER_TOKEN
+    return cleaned_pages, stats
+
+
+def count_split_markers(pages_data: List[Dict[str, Any]]) -> int:
+    """Count lines the block splitter could cut a question on."""
+    return sum(
+        1 for pd in pages_data for line in pd["text"].split("\n")
+        if any(re.search(p, line, re.IGNORECASE) for p in QUESTION_SPLIT_PATTERNS)
+    )
+
+
+# Paged layouts ({"name", "pages": [{"page", "text"}]} per line) whose question
+# markers must survive boilerplate stripping
+BOILERPLATE_FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "boilerplate_pages.jsonl")
+
+
+def load_boilerplate_fixtures(path: str = BOILERPLATE_FIXTURES_PATH) -> List[Dict[str, Any]]:
+    """Load paged layouts for the boilerplate check."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate_boilerplate(layouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Strip each layout and report removed lines, split markers and blocks.
+
+    A layout passes when stripping keeps every split marker and the block
+    count the splitter produces.
+    """
+    from certifications.tasks import split_into_question_blocks_with_pages
+
+    report = []
+    for layout in layouts:
+        cleaned, stats = strip_repeated_boilerplate(layout["pages"])
+        markers = (count_split_markers(layout["pages"]), count_split_markers(cleaned))
+        blocks = (
+            len(split_into_question_blocks_with_pages(layout["pages"])),
+            len(split_into_question_blocks_with_pages(cleaned)),
+        )
+        report.append({
+            "name": layout["name"],
+            "lines_removed": stats["lines_removed"],
+            "split_markers_before": markers[0],
+            "split_markers_after": markers[1],
+            "blocks_before": blocks[0],
+            "blocks_after": blocks[1],
+            "ok": markers[0] == markers[1] and blocks[0] == blocks[1],
+        })
+    return report
+
+
+# Labeled blocks used to track prefilter precision/recall
+PREFILTER_FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "prefilter_blocks.jsonl")
+
+OPTION_LINE_PATTERN = re.compile(r"^\s*\(?([A-Ha-h])[\.\):]\s+\S", re.MULTILINE)
+INLINE_OPTIONS_PATTERN = re.compile(r"\b[Aa][\.\)]\s+\S.*?\b[Bb][\.\)]\s+\S", re.DOTALL)
+QUESTION_NUMBER_PATTERN = re.compile(r"^\s*(question\s*#?\s*:?\s*\d+|q\s*\d+[\.\):]|\d+[\.\)]\s)", re.IGNORECASE)
+QUESTION_KEYWORD_PATTERN = re.compile(
+    r"\b(which|what|how|why|when|where|choose|select|true or false|most|best)\b", re.IGNORECASE
+)
+DOT_LEADER_PATTERN = re.compile(r"\.{4,}\s*\d+\s*$", re.MULTILINE)
+ANSWER_KEY_PATTERN = re.compile(r"\b\d+\s*[\.\)\-:]?\s*[A-E]\b(?![\.\)]\s*\w{2})")
+
+
+def score_question_block(text: str) -> float:
+    """Score how likely a block is a multiple-choice question (0..1).
+
+    Cheap local heuristics: option markers, question marks and keywords,
+    question numbering and length, minus penalties for tables of contents and
+    answer keys.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return 0.0
+
+    score = 0.0
+    option_letters = {m.upper() for m in OPTION_LINE_PATTERN.findall(stripped)}
+    if len(option_letters) >= 2:
+        score += 0.5
+    elif INLINE_OPTIONS_PATTERN.search(stripped):
+        score += 0.35
+    if "?" in stripped:
+        score += 0.2
+    if QUESTION_KEYWORD_PATTERN.search(stripped):
+        score += 0.15
+    if QUESTION_NUMBER_PATTERN.match(stripped):
+        score += 0.15
+
+    # Tables of contents: several lines ending in dot leaders and page numbers
+    if len(DOT_LEADER_PATTERN.findall(stripped)) >= 2:
+        score -= 0.6
+    # Answer keys: many "12. B" pairs and little else
+    words = len(stripped.split())
+    key_pairs = len(ANSWER_KEY_PATTERN.findall(stripped))
+    if key_pairs >= 5 and key_pairs * 2 >= words * 0.6:
+        score -= 0.6
+    if len(stripped) < 40:
+        score -= 0.3
+
+    return max(0.0, min(1.0, score))
+
+
+def is_probable_question(text: str, threshold: Optional[float] = None) -> bool:
+    """Check whether a block is worth an LLM call.
+
+    ``threshold`` defaults to ``settings.question_prefilter_threshold``.
+    """
+    if threshold is None:
+        threshold = settings.question_prefilter_threshold
+    return score_question_block(text) >= threshold
+
+
+def load_prefilter_fixtures(path: str = PREFILTER_FIXTURES_PATH) -> List[Dict[str, Any]]:
+    """Load labeled blocks ({"text", "is_question"} per line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate_prefilter(
+    samples: List[Dict[str, Any]],
+    threshold: Optional[float] = None
+) -> Dict[str, float]:
+    """Compute precision/recall of the prefilter against labeled blocks.
+
+    Positives are real questions: precision is the share of kept blocks that
+    are questions, recall the share of questions that were kept.
+    """
+    tp = fp = fn = tn = 0
+    for sample in samples:
+        predicted = is_probable_question(sample["text"], threshold)
+        if predicted and sample["is_question"]:
+            tp += 1
+        elif predicted:
+            fp += 1
+        elif sample["is_question"]:
+            fn += 1
+        else:
+            tn += 1
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "samples": len(samples),
+        "true_positives": tp,
+        "false_positives": fp,
+        "false_negatives": fn,
+        "true_negatives": tn,
+        "precision": round(precision, 3),
+        "recall": round(recall, 3),
+    }
+
+
+if __name__ == "__main__":
+    # python -m certifications.preprocessing
+    print(json.dumps({
+        "prefilter": evaluate_prefilter(load_prefilter_fixtures()),
+        "boilerplate": evaluate_boilerplate(load_boilerplate_fixtures()),
+    }, indent=2))
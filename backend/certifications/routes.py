@@ -4,21 +4,30 @@ API routes for certifications feature.
 import os
 import uuid
 import asyncio
-from typing import List
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, BackgroundTasks
+from typing import List, Optional
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.dependencies import get_db
 from shared.config import settings
 from certifications.schemas import (
     CertificationResponse, CertificationListResponse,
-    UploadResponse, ProcessingStatusResponse, QuestionResponse
+    UploadResponse, ProcessingStatusResponse, QuestionResponse,
+    RoutingStatsResponse, DispatcherStatusResponse, ImportResponse,
+    RestoreResponse
 )
 from certifications.services import (
     create_certification, get_certification, list_certifications,
-    delete_certification, get_questions_for_certification
+    delete_certification, get_questions_for_certification,
+    control_processing_job, import_certification_bank,
+    restore_certification_archive
 )
 from certifications.tasks import process_pdf_background
+from certifications.importers import detect_import_format, ImportRecordError
+from certifications.archive import stream_certification_archive, ArchiveError, ArchiveConflictError
+from certifications.llm import routing_stats
+from certifications.dispatcher import llm_dispatcher
 
 
 router = APIRouter()
@@ -28,9 +37,14 @@ router = APIRouter()
 async def upload_certification(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    priority: str = Query("normal", pattern="^(high|normal|low)$"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upload a PDF and start processing."""
+    """Upload a PDF and start processing.
+    
+    ``priority`` sets the job's share of LLM capacity when several uploads
+    are processed at once (small jobs are also favored automatically).
+    """
     # Validate file type
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
@@ -73,7 +87,7 @@ async def upload_certification(
         asyncio.set_event_loop(loop)
         try:
             print(f"[ROUTE] Starting event loop for {certification.id}", flush=True)
-            loop.run_until_complete(process_pdf_background(certification.id, pdf_path))
+            loop.run_until_complete(process_pdf_background(certification.id, pdf_path, priority))
             print(f"[ROUTE] Event loop completed for {certification.id}", flush=True)
         except Exception as e:
             print(f"[ROUTE ERROR] Exception in run_processing: {e}", flush=True)
@@ -92,6 +106,76 @@ async def upload_certification(
     )
 
 
+@router.post("/import", response_model=ImportResponse)
+async def import_certification(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(jsonl|csv|anki)$"),
+    name: Optional[str] = Query(None, max_length=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """Import a structured question bank (JSON Lines, CSV or Anki) without LLM parsing.
+    
+    The format is inferred from the file extension unless given. Invalid
+    records are skipped and reported; the certification is ready to study
+    as soon as the request returns.
+    """
+    import_format = format or detect_import_format(file.filename or "")
+    if not import_format:
+        raise HTTPException(status_code=400, detail="Unknown import format; pass format=jsonl|csv|anki")
+    
+    cert_name = name or os.path.splitext(file.filename or "imported")[0].replace("_", " ").replace("-", " ")
+    try:
+        certification, stats = await import_certification_bank(db, cert_name, file.file, import_format)
+    except ImportRecordError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if stats["imported"] == 0:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "No valid questions found", "errors": stats["errors"]}
+        )
+    
+    return ImportResponse(certification_id=certification.id, format=import_format, **stats)
+
+
+@router.post("/restore", response_model=RestoreResponse)
+async def restore_certification(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """Restore a certification archive produced by the export endpoint.
+    
+    Certification and question IDs are kept, so sessions and links created
+    against the source environment stay valid.
+    """
+    try:
+        certification, stats = await restore_certification_archive(db, file.file)
+    except ArchiveConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return RestoreResponse(certification_id=certification.id, **stats)
+
+
+@router.get("/{certification_id}/export")
+async def export_certification(
+    certification_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a certification's questions and images as a zip archive."""
+    certification = await get_certification(db, certification_id)
+    
+    if not certification:
+        raise HTTPException(status_code=404, detail="Certification not found")
+    
+    return StreamingResponse(
+        stream_certification_archive(certification),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{certification.slug}.zip"'}
+    )
+
+
 @router.get("/{certification_id}/status", response_model=ProcessingStatusResponse)
 async def get_processing_status(
     certification_id: uuid.UUID,
@@ -109,8 +193,14 @@ async def get_processing_status(
             message = f"Processing question {certification.processing_current_block} of {certification.processing_total_blocks}..."
         else:
             message = f"Processing... {certification.processing_progress}%"
+        if certification.quizzable:
+            message += f" {certification.total_questions} questions ready to study."
     elif certification.processing_status == "completed":
         message = f"Processing complete! {certification.total_questions} questions extracted."
+    elif certification.processing_status == "paused":
+        message = f"Processing paused at question {certification.processing_current_block or 0} of {certification.processing_total_blocks or 0}."
+    elif certification.processing_status == "cancelled":
+        message = f"Processing cancelled. {certification.total_questions} questions extracted."
     elif certification.processing_status == "failed":
         message = "Processing failed."
     else:
@@ -121,6 +211,7 @@ async def get_processing_status(
         status=certification.processing_status,
         progress=certification.processing_progress,
         message=message,
+        quizzable=certification.quizzable,
         total_questions=certification.total_questions,
         questions_extracted=certification.total_questions if certification.processing_status != "pending" else 0,
         total_blocks=certification.processing_total_blocks,
@@ -128,6 +219,58 @@ async def get_processing_status(
     )
 
 
+@router.post("/{certification_id}/pause", response_model=ProcessingStatusResponse)
+async def pause_processing(
+    certification_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Pause PDF processing after the in-flight block completes."""
+    return await _control_processing(db, certification_id, "pause")
+
+
+@router.post("/{certification_id}/resume", response_model=ProcessingStatusResponse)
+async def resume_processing(
+    certification_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Resume paused PDF processing."""
+    return await _control_processing(db, certification_id, "resume")
+
+
+@router.post("/{certification_id}/cancel", response_model=ProcessingStatusResponse)
+async def cancel_processing(
+    certification_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel PDF processing; questions already extracted are kept."""
+    return await _control_processing(db, certification_id, "cancel")
+
+
+async def _control_processing(db: AsyncSession, certification_id: uuid.UUID, action: str):
+    """Apply a job control action and return the resulting status."""
+    try:
+        certification = await control_processing_job(db, certification_id, action)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not certification:
+        raise HTTPException(status_code=404, detail="Certification not found")
+    
+    return await get_processing_status(certification_id, db)
+
+
+@router.get("/llm/routing-stats", response_model=RoutingStatsResponse)
+async def get_llm_routing_stats():
+    """Get per-tier LLM call counts, escalation rates and latency since startup."""
+    return RoutingStatsResponse(tiers=routing_stats.snapshot())
+
+
+@router.get("/llm/dispatcher", response_model=DispatcherStatusResponse)
+async def get_llm_dispatcher_status():
+    """Get shared LLM capacity usage and per-job queues."""
+    return DispatcherStatusResponse(**llm_dispatcher.snapshot())
+
+
 @router.get("", response_model=List[CertificationListResponse])
 async def list_all_certifications(db: AsyncSession = Depends(get_db)):
     """List all certifications with stats."""
@@ -228,5 +371,6 @@ async def update_certification_name(
         slug=certification.slug,
         total_questions=certification.total_questions,
         processing_status=certification.processing_status,
+        quizzable=certification.quizzable,
         created_at=certification.created_at,
     )
@@ -2,7 +2,7 @@
 Pydantic schemas for certifications feature.
 """
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -28,6 +28,7 @@ class CertificationResponse(CertificationBase):
     updated_at: datetime
     processing_status: str
     processing_progress: int
+    quizzable: bool = False
     
     class Config:
         from_attributes = True
@@ -40,6 +41,7 @@ class CertificationListResponse(BaseModel):
     slug: str
     total_questions: int
     processing_status: str
+    quizzable: bool = False
     created_at: datetime
     last_studied: Optional[datetime] = None
     accuracy: Optional[float] = None
@@ -55,12 +57,30 @@ class UploadResponse(BaseModel):
     message: str
 
 
+class ImportResponse(BaseModel):
+    """Schema for structured question bank import result."""
+    certification_id: UUID
+    format: str
+    imported: int
+    skipped: int
+    images: int = 0
+    errors: List[str] = []
+
+
+class RestoreResponse(BaseModel):
+    """Schema for certification archive restore result."""
+    certification_id: UUID
+    questions: int
+    images: int
+
+
 class ProcessingStatusResponse(BaseModel):
     """Schema for processing status response."""
     certification_id: UUID
     status: str
     progress: int
     message: str
+    quizzable: bool = False
     total_questions: Optional[int] = None
     questions_extracted: Optional[int] = None
     total_blocks: Optional[int] = None
@@ -68,6 +88,18 @@ class ProcessingStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
+class RoutingStatsResponse(BaseModel):
+    """Schema for LLM routing statistics per model tier."""
+    tiers: Dict[str, Dict[str, float]]
+
+
+class DispatcherStatusResponse(BaseModel):
+    """Schema for shared LLM dispatcher state."""
+    max_concurrency: int
+    in_flight: int
+    jobs: Dict[str, Dict[str, float]]
+
+
 class QuestionImageResponse(BaseModel):
     """Schema for question image."""
     id: UUID
@@ -5,7 +5,7 @@ import os
 import re
 import uuid
 import asyncio
-from typing import List, Optional
+from typing import List, Optional, Tuple, Dict, Any, BinaryIO
 from datetime import datetime
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,7 +13,15 @@ from sqlalchemy.orm import selectinload
 
 from shared.models import Certification, Question, QuestionImage, QuizSession
 from shared.config import settings
+from shared.question_cache import invalidate_question_payloads
 from certifications.schemas import CertificationListResponse
+from certifications.importers import iter_import_records, import_question_bank
+from certifications.archive import (
+    ArchiveError, ArchiveConflictError, read_archive_manifest,
+    restore_archive_questions
+)
+from quiz.sampling import question_sampler
+from quiz.adaptive import adaptive_sampler
 
 
 def generate_slug(name: str) -> str:
@@ -29,10 +37,16 @@ async def create_certification(
     db: AsyncSession,
     name: str,
     pdf_path: str,
-    description: Optional[str] = None
+    description: Optional[str] = None,
+    certification_id: Optional[uuid.UUID] = None,
+    slug: Optional[str] = None
 ) -> Certification:
-    """Create a new certification record."""
-    slug = generate_slug(name)
+    """Create a new certification record.
+    
+    ``certification_id`` and ``slug`` are kept when restoring an archive
+    (the slug still gets a suffix if it is taken).
+    """
+    slug = slug or generate_slug(name)
     
     # Check if slug exists and make it unique
     base_slug = slug
@@ -47,6 +61,7 @@ async def create_certification(
         counter += 1
     
     certification = Certification(
+        id=certification_id or uuid.uuid4(),
         name=name,
         slug=slug,
         description=description,
@@ -107,6 +122,7 @@ async def list_certifications(db: AsyncSession) -> List[CertificationListRespons
             slug=cert.slug,
             total_questions=cert.total_questions,
             processing_status=cert.processing_status,
+            quizzable=cert.quizzable,
             created_at=cert.created_at,
             last_studied=last_studied,
             accuracy=accuracy
@@ -133,6 +149,141 @@ async def update_processing_status(
         await db.commit()
 
 
+# Allowed source statuses and resulting status for each job control action
+JOB_CONTROL_TRANSITIONS = {
+    "pause": ({"pending", "processing"}, "paused"),
+    "resume": ({"paused"}, "processing"),
+    "cancel": ({"pending", "processing", "paused"}, "cancelled"),
+}
+
+
+async def control_processing_job(
+    db: AsyncSession,
+    certification_id: uuid.UUID,
+    action: str
+) -> Optional[Certification]:
+    """Pause, resume or cancel PDF processing for a certification.
+    
+    Only the status is updated here; the background job picks it up between
+    blocks, letting the in-flight LLM call drain first.
+    """
+    certification = await get_certification(db, certification_id)
+    if not certification:
+        return None
+    
+    allowed, new_status = JOB_CONTROL_TRANSITIONS[action]
+    if certification.processing_status not in allowed:
+        raise ValueError(f"Cannot {action} processing while it is {certification.processing_status}")
+    
+    certification.processing_status = new_status
+    certification.updated_at = datetime.utcnow()
+    await db.commit()
+    
+    return certification
+
+
+async def import_certification_bank(
+    db: AsyncSession,
+    name: str,
+    fileobj: BinaryIO,
+    import_format: str
+) -> Tuple[Certification, Dict[str, Any]]:
+    """Create a certification from a structured question bank file.
+    
+    The certification is removed again when the file yields no valid
+    questions or the import fails.
+    """
+    certification = await create_certification(db, name=name, pdf_path="")
+    try:
+        stats = await import_question_bank(
+            db, certification, iter_import_records(fileobj, import_format)
+        )
+    except Exception:
+        await db.rollback()
+        await delete_certification(db, certification.id)
+        raise
+    
+    if stats["imported"] == 0:
+        await db.rollback()
+        await delete_certification(db, certification.id)
+        return certification, stats
+    
+    certification.processing_status = "completed"
+    certification.processing_progress = 100
+    certification.updated_at = datetime.utcnow()
+    await db.commit()
+    question_sampler.invalidate(certification.id)
+    adaptive_sampler.invalidate(certification.id)
+    
+    print(
+        f"[IMPORT] {certification.id}: {stats['imported']} questions imported "
+        f"({stats['skipped']} skipped, {stats['images']} images) from {import_format}",
+        flush=True
+    )
+    return certification, stats
+
+
+async def restore_certification_archive(
+    db: AsyncSession,
+    fileobj: BinaryIO
+) -> Tuple[Certification, Dict[str, int]]:
+    """Restore a certification exported with ``stream_certification_archive``.
+    
+    Certification and question IDs are preserved, so restoring the same
+    archive twice into one database is rejected.
+    """
+    import zipfile
+    if not zipfile.is_zipfile(fileobj):
+        raise ArchiveError("Not a certification archive (expected a zip file)")
+    fileobj.seek(0)
+    
+    with zipfile.ZipFile(fileobj) as archive:
+        manifest = read_archive_manifest(archive)
+        info = manifest["certification"]
+        certification_id = uuid.UUID(info["id"])
+        if await get_certification(db, certification_id):
+            raise ArchiveConflictError(f"Certification {certification_id} already exists")
+        
+        certification = await create_certification(
+            db,
+            name=info["name"],
+            pdf_path="",
+            description=info.get("description"),
+            certification_id=certification_id,
+            slug=info.get("slug")
+        )
+        try:
+            stats = await restore_archive_questions(db, certification, archive)
+        except Exception:
+            await db.rollback()
+            await delete_certification(db, certification_id)
+            raise
+    
+    certification.processing_status = "completed"
+    certification.processing_progress = 100
+    certification.updated_at = datetime.utcnow()
+    await db.commit()
+    # A restore can reuse the IDs of a deleted certification and its questions
+    await invalidate_question_payloads(await get_certification_question_ids(db, certification.id))
+    question_sampler.invalidate(certification.id)
+    adaptive_sampler.invalidate(certification.id)
+    
+    print(
+        f"[IMPORT] {certification.id}: restored {stats['questions']} questions "
+        f"and {stats['images']} images from archive",
+        flush=True
+    )
+    return certification, stats
+
+
+async def get_certification_question_ids(db: AsyncSession, certification_id: uuid.UUID) -> List[uuid.UUID]:
+    """Get the IDs of a certification's questions."""
+    result = await db.execute(
+        select(Question.id).where(Question.certification_id == certification_id)
+    )
+    return list(result.scalars().all())
+
+
 async def delete_certification(db: AsyncSession, certification_id: uuid.UUID) -> bool:
     """Delete a certification and all related data."""
     certification = await get_certification(db, certification_id)
@@ -149,9 +300,15 @@ async def delete_certification(db: AsyncSession, certification_id: uuid.UUID) ->
     if os.path.exists(images_dir):
         shutil.rmtree(images_dir)
     
+    # Cached payloads of the deleted questions must not be served again
+    question_ids = await get_certification_question_ids(db, certification_id)
+    
     # Delete from database (cascades to related tables)
     await db.delete(certification)
     await db.commit()
+    await invalidate_question_payloads(question_ids)
+    question_sampler.invalidate(certification_id)
+    adaptive_sampler.invalidate(certification_id)
     
     return True
 
@@ -4,9 +4,11 @@ Background tasks for PDF processing.
 import os
 import re
 import json
+import time
 import hashlib
 import asyncio
-from typing import List, Optional, Dict, Any
+from collections import deque
+from typing import List, Optional, Dict, Any, Deque, Tuple
 from uuid import UUID
 import logging
 
@@ -17,9 +19,24 @@ import fitz  # PyMuPDF
 
 from shared.config import settings
 from shared.cache import get_cached, set_cached, get_cache_key
+from shared.question_cache import (
+    build_question_payload, store_question_payloads, invalidate_question_payloads
+)
 from shared.database import async_session
 from shared.models import Certification, Question, QuestionImage
 from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from shared.answers import extract_answer_letters, extract_option_letters, answer_metadata
+from certifications.llm import (
+    invoke_llm, resolve_provider, get_model_tiers, RoutingStats, routing_stats
+)
+from certifications.dispatcher import llm_dispatcher, job_weight, PRIORITY_WEIGHTS
+from quiz.stats import invalidate_topics_cache
+from quiz.sampling import question_sampler
+from quiz.adaptive import adaptive_sampler
+from certifications.preprocessing import (
+    strip_repeated_boilerplate, is_probable_question, OPTION_LINE_PATTERN, QUESTION_SPLIT_PATTERNS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -155,18 +172,9 @@ def extract_embedded_images(pdf_path: str, output_dir: str) -> List[Dict[str, An
 
 def split_into_question_blocks(text: str) -> List[str]:
     """Split text into question blocks using regex patterns."""
-    patterns = [
-        r"(Question\s*#\s*\d+)",
-        r"(Question\s+\d+)",
-        r"(Q\s*\d+[\.\):])",
-        r"(QUESTION\s*:?\s*\d+)",
-        r"(?:^|\n)(\d+\.\s+)",
-        r"(?:^|\n)(\d+\)\s+)",
-    ]
-    
     blocks = []
     
-    for pattern in patterns:
+    for pattern in QUESTION_SPLIT_PATTERNS:
         raw_blocks = re.split(pattern, text, flags=re.IGNORECASE)
         if len(raw_blocks) > 1:
             for i in range(1, len(raw_blocks), 2):
@@ -192,26 +200,20 @@ def split_into_question_blocks_with_pages(
     
     Returns a list of dicts with 'text' and 'pages' (set of page numbers).
     """
-    # Build full text with page markers
+    # Build full text with page markers. Each marker goes at the end of its
+    # page's first line so line-anchored split patterns still see the start
+    # of the page (e.g. "\n12. ") once headers have been stripped.
     PAGE_MARKER = "\x00PAGE_{page}\x00"
     full_text = ""
     for pd in pages_data:
         marker = PAGE_MARKER.replace("{page}", str(pd["page"]))
-        full_text += marker + pd["text"] + "\n"
+        first_line, newline, rest = pd["text"].partition("\n")
+        full_text += first_line + marker + newline + rest + "\n"
     
     # Split into blocks using existing logic
-    patterns = [
-        r"(Question\s*#\s*\d+)",
-        r"(Question\s+\d+)",
-        r"(Q\s*\d+[\.\):])",
-        r"(QUESTION\s*:?\s*\d+)",
-        r"(?:^|\n)(\d+\.\s+)",
-        r"(?:^|\n)(\d+\)\s+)",
-    ]
-    
     raw_blocks_with_markers: List[str] = []
     
-    for pattern in patterns:
+    for pattern in QUESTION_SPLIT_PATTERNS:
         raw_blocks = re.split(pattern, full_text, flags=re.IGNORECASE)
         if len(raw_blocks) > 1:
             for i in range(1, len(raw_blocks), 2):
@@ -246,33 +248,59 @@ def split_into_question_blocks_with_pages(
     return result
 
 
-async def parse_question_with_llm(block: str, existing_topics: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
-    """Parse a question block using LLM with caching."""
+def validate_parsed_question(
+    result: Dict[str, Any],
+    block: str,
+    required: List[str]
+) -> List[str]:
+    """Check a parsed question against its source block.
+    
+    Returns a list of problems (empty when valid): missing or empty fields,
+    an option count that differs from the option markers in the source, and
+    correct-answer letters that are not among the parsed options.
+    """
+    missing = [k for k in required if not result.get(k)]
+    if missing:
+        return [f"empty fields: {', '.join(missing)}"]
+    
+    options = result["options"]
+    if not isinstance(options, list) or len(options) < 2:
+        return ["fewer than two options"]
+    
+    problems = []
+    source_letters = {m.upper() for m in OPTION_LINE_PATTERN.findall(block)}
+    if len(source_letters) >= 2 and len(source_letters) != len(options):
+        problems.append(f"{len(options)} options parsed but {len(source_letters)} in source")
+    
+    answer_letters = extract_answer_letters(str(result["correct_answer"]))
+    if not answer_letters or not answer_letters <= extract_option_letters(options):
+        problems.append("correct answer letters not among options")
+    
+    return problems
+
+
+async def parse_question_with_llm(
+    block: str,
+    existing_topics: Optional[List[str]] = None,
+    include_explanation: bool = True,
+    stats: Optional[RoutingStats] = None
+) -> Optional[Dict[str, Any]]:
+    """Parse a question block using LLM with caching.
+    
+    With ``include_explanation=False`` the prompt only asks for question,
+    options, correct answer and topic; the explanation is returned empty and
+    generated later by ``generate_explanation``.
+    
+    With tiered routing the fast model is tried first and the result is only
+    escalated to the strong model when it fails ``validate_parsed_question``.
+    Per-tier calls, escalations and latency are recorded in ``routing_stats``
+    (and ``stats`` when given).
+    """
     # Skip cache for now to avoid Redis event loop issues
     
     # Parse with LLM
     try:
-        from langchain_openai import ChatOpenAI
-        from langchain_google_genai import ChatGoogleGenerativeAI
         from langchain_core.prompts import PromptTemplate
-        from langchain_core.output_parsers import StrOutputParser
-        
-        # Select LLM provider
-        if settings.google_api_key and settings.llm_provider == "gemini":
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash",
-                temperature=0,
-                google_api_key=settings.google_api_key
-            )
-        elif settings.openai_api_key:
-            llm = ChatOpenAI(
-                temperature=0,
-                model_name="gpt-4.1-mini",
-                openai_api_key=settings.openai_api_key
-            )
-        else:
-            print("[TASK ERROR] No LLM API key configured", flush=True)
-            return None
         
         # Build topic instruction based on existing topics
         if existing_topics:
@@ -290,16 +318,20 @@ async def parse_question_with_llm(block: str, existing_topics: Optional[List[str
                 '"Data Pipelines", "Security", etc.) - choose a concise, relevant topic based on the question content'
             )
         
+        if include_explanation:
+            explanation_instruction = '"explanation": a detailed explanation of why the answer is correct\n'
+        else:
+            explanation_instruction = ""
+        
         prompt_template = PromptTemplate(
-            input_variables=["input_text", "topic_instruction"],
+            input_variables=["input_text", "explanation_instruction", "topic_instruction"],
             template="""
 You are an expert teacher. Given a multiple-choice question with its options, respond in JSON format as follows:
 
 "question": the question text 
 "options": a list of options as strings, each starting with a letter label (A., B., C., ...) — if the input options do not have letters, add them in this format 
 "correct_answer": the letter(s) and text of the correct option(s). For single-answer questions use e.g. "B. Example answer". For multiple-answer questions (e.g. "choose two", "select all that apply") list ALL correct options separated by commas, e.g. "A. First answer, C. Third answer" 
-"explanation": a detailed explanation of why the answer is correct
-{topic_instruction}
+{explanation_instruction}{topic_instruction}
 
 Question text + options: 
 {input_text}
@@ -308,38 +340,213 @@ Respond only with valid JSON:
 """
         )
         
-        chain = prompt_template | llm | StrOutputParser()
-        
-        # Use synchronous invoke directly (LangChain handles this)
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(chain.invoke, {
-                "input_text": block.strip(),
-                "topic_instruction": topic_instruction,
-            })
-            raw_response = future.result(timeout=60)
+        provider = resolve_provider()
+        if not provider:
+            print("[TASK ERROR] No LLM API key configured", flush=True)
+            return None
         
-        # Clean and parse JSON
-        raw_response = raw_response.replace("```json", "").replace("```", "").strip()
-        result = json.loads(raw_response)
+        inputs = {
+            "input_text": block.strip(),
+            "explanation_instruction": explanation_instruction,
+            "topic_instruction": topic_instruction,
+        }
+        required = ["question", "options", "correct_answer"]
+        if include_explanation:
+            required.append("explanation")
         
-        # Validate required fields
-        if all(k in result for k in ["question", "options", "correct_answer", "explanation"]):
-            return result
-        else:
-            print(f"[TASK WARN] Missing required fields in LLM response", flush=True)
-            return None
+        tiers = get_model_tiers(provider)
+        for tier_index, (tier, model) in enumerate(tiers):
+            is_last = tier_index == len(tiers) - 1
+            started = time.perf_counter()
+            try:
+                raw_response = await invoke_llm(prompt_template, inputs, model=model)
+                # Clean and parse JSON
+                if raw_response is not None:
+                    raw_response = raw_response.replace("```json", "").replace("```", "").strip()
+                    result = json.loads(raw_response)
+                else:
+                    result = None
+            except json.JSONDecodeError as e:
+                print(f"[TASK ERROR] JSON parsing error ({tier} tier): {e}", flush=True)
+                result = None
+            except Exception as e:
+                if is_last:
+                    raise
+                print(f"[TASK ERROR] LLM error ({tier} tier): {e}", flush=True)
+                result = None
+            latency_ms = int((time.perf_counter() - started) * 1000)
+            
+            # Validate required fields
+            has_required = isinstance(result, dict) and all(k in result for k in required)
+            problems = validate_parsed_question(result, block, required) if has_required else [
+                "missing required fields"
+            ]
+            # Soft checks only escalate; the last tier keeps any complete response
+            accepted = not problems or (is_last and has_required)
+            for tracker in (routing_stats, stats):
+                if tracker is not None:
+                    tracker.record(tier, latency_ms, accepted=accepted, escalated=not accepted and not is_last)
             
-    except json.JSONDecodeError as e:
-        print(f"[TASK ERROR] JSON parsing error: {e}", flush=True)
+            if accepted:
+                if problems:
+                    print(f"[TASK WARN] Accepted {tier} tier result despite: {'; '.join(problems)}", flush=True)
+                if not include_explanation:
+                    result["explanation"] = ""
+                return result
+            
+            if is_last:
+                print(f"[TASK WARN] Missing required fields in LLM response", flush=True)
+            else:
+                print(f"[TASK] Escalating from {tier} tier: {'; '.join(problems)}", flush=True)
+        
         return None
+            
     except Exception as e:
         print(f"[TASK ERROR] LLM parsing error: {e}", flush=True)
         return None
 
 
-async def process_pdf_background(certification_id: UUID, pdf_path: str):
-    """Background task to process a PDF and extract questions."""
+EXPLANATION_TEMPLATE = """
+You are an expert teacher. Given a multiple-choice question, its options and the correct answer, write a detailed explanation of why the answer is correct and why the other options are not.
+
+Question:
+{question_text}
+
+Options:
+{options}
+
+Correct answer: {correct_answer}
+
+Respond only with the explanation text:
+"""
+
+
+# Dispatcher job shared by explanations generated on demand from the quiz
+ON_DEMAND_EXPLANATIONS_JOB = "explanations:on-demand"
+
+
+def explanations_job_id(certification_id: UUID) -> str:
+    """Dispatcher job of a certification's deferred explanation phase."""
+    return f"{certification_id}:explanations"
+
+
+async def generate_explanation(
+    question_text: str,
+    options: List[str],
+    correct_answer: str,
+    job_id: str = ON_DEMAND_EXPLANATIONS_JOB
+) -> Optional[str]:
+    """Generate the explanation for an already-parsed question.
+    
+    The call holds a ``llm_dispatcher`` slot of ``job_id``, registered with
+    low priority so explanations yield to question extraction.
+    """
+    try:
+        from langchain_core.prompts import PromptTemplate
+        
+        prompt_template = PromptTemplate(
+            input_variables=["question_text", "options", "correct_answer"],
+            template=EXPLANATION_TEMPLATE
+        )
+        llm_dispatcher.register_job(job_id, PRIORITY_WEIGHTS["low"])
+        async with llm_dispatcher.slot(job_id):
+            raw_response = await invoke_llm(prompt_template, {
+                "question_text": question_text.strip(),
+                "options": "\n".join(options),
+                "correct_answer": correct_answer,
+            })
+        if not raw_response or not raw_response.strip():
+            return None
+        return raw_response.strip()
+    except Exception as e:
+        print(f"[TASK ERROR] Explanation generation error: {e}", flush=True)
+        return None
+
+
+async def generate_missing_explanations(
+    certification_id: UUID,
+    session_factory,
+    redis_client=None
+) -> int:
+    """Fill in empty explanations for a certification (deferred phase two).
+    
+    Runs after the certification is already quizzable; each explanation is
+    committed as soon as it is generated and its cached payload dropped.
+    ``redis_client`` must belong to the caller's event loop.
+    """
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Question.id)
+            .where(
+                Question.certification_id == certification_id,
+                Question.explanation == ""
+            )
+            .order_by(Question.question_number)
+        )
+        question_ids = [row[0] for row in result.all()]
+        print(f"[TASK] Generating {len(question_ids)} deferred explanations", flush=True)
+        
+        generated = 0
+        # Low priority, so other certifications' extraction is served first
+        job_id = explanations_job_id(certification_id)
+        try:
+            for question_id in question_ids:
+                question = await db.get(Question, question_id)
+                # Skip questions deleted or explained on demand in the meantime
+                if not question or question.explanation:
+                    continue
+                explanation = await generate_explanation(
+                    question.question_text, list(question.options), question.correct_answer, job_id
+                )
+                if explanation:
+                    question.explanation = explanation
+                    await db.commit()
+                    await invalidate_question_payloads([question_id], redis_client)
+                    generated += 1
+        finally:
+            llm_dispatcher.remove_job(job_id)
+        
+        print(f"[TASK] Deferred explanations complete: {generated}/{len(question_ids)} generated", flush=True)
+        return generated
+
+
+# Seconds between status checks while a job is paused
+JOB_PAUSE_POLL_SECONDS = 1.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a processing job once it was cancelled or its certification deleted."""
+    pass
+
+
+async def checkpoint_job(db, cert: Certification, wait: bool = True) -> None:
+    """Apply pause/cancel requests made through the certification status.
+    
+    Control endpoints only update ``processing_status``; the job re-reads it
+    between blocks so requests work from any API worker. While paused the job
+    dispatches nothing and polls until resumed (skipped when ``wait=False``).
+    Raises ``JobCancelled`` when the job is cancelled or the row was deleted.
+    """
+    while True:
+        try:
+            await db.refresh(cert, ["processing_status"])
+        except InvalidRequestError:
+            raise JobCancelled("certification deleted")
+        
+        if cert.processing_status == "cancelled":
+            raise JobCancelled("cancelled")
+        if cert.processing_status != "paused" or not wait:
+            return
+        await asyncio.sleep(JOB_PAUSE_POLL_SECONDS)
+
+
+async def process_pdf_background(certification_id: UUID, pdf_path: str, priority: str = "normal"):
+    """Background task to process a PDF and extract questions.
+    
+    LLM calls go through the process-wide ``llm_dispatcher``, which shares
+    provider capacity fairly between concurrent jobs; ``priority`` ("high",
+    "normal" or "low") and the job size set this job's share.
+    """
     import sys
     from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
     
@@ -350,6 +557,9 @@ async def process_pdf_background(certification_id: UUID, pdf_path: str):
     DATABASE_URL = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
     task_engine = create_async_engine(DATABASE_URL, echo=False)
     task_session_factory = async_sessionmaker(task_engine, class_=AsyncSession, expire_on_commit=False)
+    # Redis clients are bound to an event loop, so the job needs its own
+    import redis.asyncio as redis
+    task_redis = redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
     
     try:
         async with task_session_factory() as db:
@@ -360,6 +570,8 @@ async def process_pdf_background(certification_id: UUID, pdf_path: str):
                     print(f"[TASK ERROR] Certification {certification_id} not found", flush=True)
                     return
                 
+                # Honor a pause or cancel requested before the job started
+                await checkpoint_job(db, cert)
                 cert.processing_status = "processing"
                 cert.processing_progress = 0
                 await db.commit()
@@ -370,6 +582,15 @@ async def process_pdf_background(certification_id: UUID, pdf_path: str):
                 pages_data = extract_text_with_pages(pdf_path)
                 total_chars = sum(len(pd["text"]) for pd in pages_data)
                 print(f"[TASK] Extracted {total_chars} characters from {len(pages_data)} pages", flush=True)
+                
+                # Drop headers, footers and page numbers repeated on most pages
+                if settings.boilerplate_stripping_enabled:
+                    pages_data, boilerplate_stats = strip_repeated_boilerplate(pages_data)
+                    print(
+                        f"[TASK] Stripped {boilerplate_stats['lines_removed']} boilerplate lines "
+                        f"({boilerplate_stats['chars_saved']} chars, ~{boilerplate_stats['tokens_saved']} tokens)",
+                        flush=True
+                    )
                 cert.processing_progress = 10
                 await db.commit()
                 
@@ -390,8 +611,17 @@ async def process_pdf_background(certification_id: UUID, pdf_path: str):
                 # Split into question blocks with page tracking
                 print("[TASK] Splitting text into question blocks", flush=True)
                 blocks_with_pages = split_into_question_blocks_with_pages(pages_data)
+                print(f"[TASK] Found {len(blocks_with_pages)} question blocks", flush=True)
+                
+                # Route obvious non-questions (TOC, intros, answer keys) away from the LLM
+                if settings.question_prefilter_threshold > 0:
+                    candidate_count = len(blocks_with_pages)
+                    blocks_with_pages = [
+                        b for b in blocks_with_pages
+                        if is_probable_question(b["text"])
+                    ]
+                    print(f"[TASK] Prefilter kept {len(blocks_with_pages)} of {candidate_count} blocks", flush=True)
                 total_blocks = len(blocks_with_pages)
-                print(f"[TASK] Found {total_blocks} question blocks", flush=True)
                 
                 if total_blocks == 0:
                     cert.processing_status = "failed"
@@ -400,87 +630,152 @@ async def process_pdf_background(certification_id: UUID, pdf_path: str):
                     print("[TASK ERROR] No question blocks found in PDF", flush=True)
                     return
                 
-                # Process each block
+                # Process blocks through the shared dispatcher, keeping a window of
+                # blocks in flight and writing results back in block order
+                job_routing_stats = RoutingStats()
                 questions_created = 0
                 extracted_topics: List[str] = []  # Track topics for consistency
                 cert.processing_total_blocks = total_blocks
                 cert.processing_current_block = 0
                 await db.commit()
                 
-                for i, block_info in enumerate(blocks_with_pages):
-                    block = block_info["text"]
-                    block_pages = block_info["pages"]
-                    print(f"[TASK] Processing block {i+1}/{total_blocks} (pages: {block_pages})...", flush=True)
-                    cert.processing_current_block = i + 1
-                    
-                    try:
-                        question_data = await parse_question_with_llm(block, existing_topics=extracted_topics or None)
-                    except Exception as llm_err:
-                        print(f"[TASK ERROR] LLM failed for block {i+1}: {llm_err}", flush=True)
-                        question_data = None
-                    
-                    if question_data:
-                        # Find embedded images on the pages this question spans
-                        question_images: List[Dict[str, Any]] = []
-                        for page_num in block_pages:
-                            if page_num in images_by_page:
-                                question_images.extend(images_by_page[page_num])
+                job_id = str(certification_id)
+                llm_dispatcher.register_job(job_id, job_weight(priority, total_blocks))
+                window = max(1, settings.llm_job_window)
+                in_flight: Deque[Tuple[int, Dict[str, Any], asyncio.Task]] = deque()
+                
+                async def parse_block(block_text: str, topics: List[str]) -> Optional[Dict[str, Any]]:
+                    async with llm_dispatcher.slot(job_id):
+                        return await parse_question_with_llm(
+                            block_text,
+                            existing_topics=topics or None,
+                            include_explanation=not settings.llm_deferred_explanations,
+                            stats=job_routing_stats
+                        )
+                
+                try:
+                    next_block = 0
+                    while next_block < total_blocks or in_flight:
+                        # Fill the window; while paused only drain what is already submitted
+                        while next_block < total_blocks and len(in_flight) < window:
+                            # Stop dispatching while paused; stop for good when cancelled or deleted
+                            await checkpoint_job(db, cert, wait=not in_flight)
+                            if cert.processing_status == "paused":
+                                break
+                            block_info = blocks_with_pages[next_block]
+                            print(f"[TASK] Dispatching block {next_block+1}/{total_blocks} (pages: {block_info['pages']})...", flush=True)
+                            task = asyncio.create_task(parse_block(block_info["text"], list(extracted_topics)))
+                            in_flight.append((next_block, block_info, task))
+                            next_block += 1
+                        if not in_flight:
+                            continue
                         
-                        has_imgs = len(question_images) > 0
+                        i, block_info, task = in_flight.popleft()
+                        block_pages = block_info["pages"]
+                        try:
+                            question_data = await task
+                        except Exception as llm_err:
+                            print(f"[TASK ERROR] LLM failed for block {i+1}: {llm_err}", flush=True)
+                            question_data = None
                         
-                        # Create question
-                        question = Question(
-                            certification_id=certification_id,
-                            question_number=i + 1,
-                            question_text=question_data["question"],
-                            options=question_data["options"],
-                            correct_answer=question_data["correct_answer"],
-                            explanation=question_data["explanation"],
-                            topic=question_data.get("topic"),
-                            has_images=has_imgs
-                        )
-                        db.add(question)
-                        await db.flush()
+                        # Drop the result if the job was cancelled or deleted meanwhile
+                        await checkpoint_job(db, cert, wait=False)
+                        cert.processing_current_block = i + 1
                         
-                        # Create QuestionImage records for each embedded image
-                        if has_imgs:
-                            for img_order, img in enumerate(question_images, 1):
-                                relative_path = f"{certification_id}/{img['filename']}"
-                                qi = QuestionImage(
-                                    question_id=question.id,
-                                    image_path=relative_path,
-                                    image_order=img_order,
-                                    position_in_pdf=f"page_{img['page']}",
-                                    width=img["width"],
-                                    height=img["height"]
-                                )
-                                db.add(qi)
+                        if question_data:
+                            # Find embedded images on the pages this question spans
+                            question_images: List[Dict[str, Any]] = []
+                            for page_num in block_pages:
+                                if page_num in images_by_page:
+                                    question_images.extend(images_by_page[page_num])
+                            
+                            has_imgs = len(question_images) > 0
+                            question_image_rows: List[QuestionImage] = []
+                            
+                            # Create question
+                            question = Question(
+                                certification_id=certification_id,
+                                question_number=i + 1,
+                                question_text=question_data["question"],
+                                options=question_data["options"],
+                                correct_answer=question_data["correct_answer"],
+                                **answer_metadata(question_data["question"], question_data["correct_answer"]),
+                                explanation=question_data["explanation"],
+                                topic=question_data.get("topic"),
+                                has_images=has_imgs
+                            )
+                            db.add(question)
                             await db.flush()
-                            print(f"[TASK]   -> {len(question_images)} image(s) linked", flush=True)
+                            
+                            # Create QuestionImage records for each embedded image
+                            if has_imgs:
+                                for img_order, img in enumerate(question_images, 1):
+                                    relative_path = f"{certification_id}/{img['filename']}"
+                                    qi = QuestionImage(
+                                        question_id=question.id,
+                                        image_path=relative_path,
+                                        image_order=img_order,
+                                        position_in_pdf=f"page_{img['page']}",
+                                        width=img["width"],
+                                        height=img["height"]
+                                    )
+                                    db.add(qi)
+                                    question_image_rows.append(qi)
+                                await db.flush()
+                                print(f"[TASK]   -> {len(question_images)} image(s) linked", flush=True)
+                            
+                            created_payload = build_question_payload(question, question_image_rows)
+                            questions_created += 1
+                            cert.total_questions = questions_created
+                            # Track extracted topic for future questions
+                            topic = question_data.get("topic")
+                            if topic and topic not in extracted_topics:
+                                extracted_topics.append(topic)
+                            print(f"[TASK] Question {i+1} created (topic: {topic or 'N/A'}, known topics: {len(extracted_topics)})", flush=True)
+                        else:
+                            created_payload = None
+                            print(f"[TASK WARN] Block {i+1} skipped (no valid question)", flush=True)
                         
-                        questions_created += 1
-                        cert.total_questions = questions_created
-                        # Track extracted topic for future questions
-                        topic = question_data.get("topic")
-                        if topic and topic not in extracted_topics:
-                            extracted_topics.append(topic)
-                        print(f"[TASK] Question {i+1} created (topic: {topic or 'N/A'}, known topics: {len(extracted_topics)})", flush=True)
-                    else:
-                        print(f"[TASK WARN] Block {i+1} skipped (no valid question)", flush=True)
-                    
-                    # Update progress
-                    progress = 20 + int((i + 1) / total_blocks * 70)
-                    cert.processing_progress = progress
-                    await db.commit()
+                        # Update progress
+                        progress = 20 + int((i + 1) / total_blocks * 70)
+                        cert.processing_progress = progress
+                        await db.commit()
+                        
+                        # Warm the payload cache and drop the cached topic list once committed
+                        if created_payload:
+                            try:
+                                await store_question_payloads([created_payload], task_redis)
+                                await invalidate_topics_cache(certification_id, task_redis)
+                            except Exception as cache_err:
+                                print(f"[TASK WARN] Could not update quiz caches: {cache_err}", flush=True)
+                finally:
+                    # Cancel blocks still waiting for a slot and let started calls drain
+                    llm_dispatcher.remove_job(job_id)
+                    if in_flight:
+                        await asyncio.gather(*(t for _, _, t in in_flight), return_exceptions=True)
                 
                 # Update certification with final count
                 cert.total_questions = questions_created
                 cert.processing_status = "completed"
                 cert.processing_progress = 100
                 await db.commit()
+                # Indexes are thread-safe; drop the ones built while questions landed
+                question_sampler.invalidate(certification_id)
+                adaptive_sampler.invalidate(certification_id)
                 
                 print(f"[TASK] Processing complete: {questions_created} questions created", flush=True)
+                print(f"[TASK] LLM routing stats: {json.dumps(job_routing_stats.snapshot())}", flush=True)
+                
+                # Phase two: explanations were skipped during extraction
+                if settings.llm_deferred_explanations:
+                    try:
+                        await generate_missing_explanations(certification_id, task_session_factory, task_redis)
+                    except Exception as exp_err:
+                        print(f"[TASK ERROR] Deferred explanation phase failed: {exp_err}", flush=True)
                 
+            except JobCancelled as cancelled:
+                await db.rollback()
+                print(f"[TASK] Processing stopped for {certification_id}: {cancelled}", flush=True)
             except Exception as e:
                 print(f"[TASK ERROR] Error processing PDF: {e}", flush=True)
                 import traceback
@@ -492,8 +787,9 @@ async def process_pdf_background(certification_id: UUID, pdf_path: str):
                         cert.processing_progress = 100
                         await error_db.commit()
         
-        # Dispose engine when done
+        # Dispose engine and Redis client when done
         await task_engine.dispose()
+        await task_redis.close()
         
     except Exception as outer_e:
         print(f"[TASK OUTER ERROR] {outer_e}", flush=True)
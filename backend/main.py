@@ -1,6 +1,7 @@
 """
 Certification Assistant Backend - FastAPI Application
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -24,9 +25,20 @@ async def lifespan(app: FastAPI):
     # Initialize Redis
     await init_redis()
     
+    # Write live quiz sessions behind to Postgres, replaying any left unflushed
+    flusher = None
+    if settings.live_sessions_enabled:
+        from quiz.live_sessions import run_live_session_flusher
+        flusher = asyncio.create_task(run_live_session_flusher())
+    
     yield
     
     # Cleanup resources on shutdown
+    if flusher:
+        from quiz.live_sessions import flush_live_sessions
+        flusher.cancel()
+        await flush_live_sessions()
+    
     from shared.cache import close_redis
     await close_redis()
 
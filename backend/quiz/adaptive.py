@@ -0,0 +1,254 @@
+"""
+Adaptive question selection weighted by the learner's answer history.
+
+Each question's weight combines its smoothed error rate, how long ago it was
+last answered, and the weakness of its topic:
+
+    weight = topic_factor(topic) * (BASE_WEIGHT + error(question)) * recency(question)
+
+Weights live in one Fenwick tree per topic plus a tree over topics, so a
+draw and an answer update both cost O(log n). Alias tables would make draws
+O(1) but need an O(n) rebuild on every answer, which rules out the
+incremental refresh this index gets as answers arrive.
+"""
+import time
+import uuid
+import random
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.models import Certification, Question, QuestionStats, TopicStats
+from quiz.stats import topic_key
+
+# Added to every question's error so mastered questions still come up
+BASE_WEIGHT = 0.1
+# How much a fully failed topic multiplies its questions' weights
+TOPIC_BOOST = 2.0
+# Days after which a question no longer counts as recently seen
+RECENCY_DAYS = 3.0
+# Weight kept by a question answered moments ago
+MIN_RECENCY = 0.05
+# Seconds before an index is reloaded so recency decay is re-applied
+ADAPTIVE_INDEX_TTL = 600
+MAX_ADAPTIVE_CERTIFICATIONS = 64
+
+
+def error_rate(attempts: int, correct: int) -> float:
+    """Laplace-smoothed error rate (0.5 for unseen questions)."""
+    attempts = max(0, attempts)
+    return (attempts - min(max(0, correct), attempts) + 1) / (attempts + 2)
+
+
+def recency_factor(last_answered_at: Optional[datetime], now: datetime) -> float:
+    """Down-weight questions answered recently."""
+    if last_answered_at is None:
+        return 1.0
+    age_days = max(0.0, (now - last_answered_at).total_seconds() / 86400)
+    return max(MIN_RECENCY, min(1.0, age_days / RECENCY_DAYS))
+
+
+class FenwickTree:
+    """Prefix sums over non-negative weights with O(log n) update and search."""
+
+    def __init__(self, weights: List[float]):
+        self.size = len(weights)
+        self.weights = list(weights)
+        self._tree = [0.0] + self.weights
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+        self.total = sum(self.weights)
+
+    def set(self, index: int, weight: float) -> None:
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def find(self, value: float) -> int:
+        """Index whose cumulative weight range contains ``value``."""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self._tree[nxt] <= value:
+                pos = nxt
+                value -= self._tree[nxt]
+            step >>= 1
+        return min(pos, self.size - 1)
+
+
+class _TopicPool:
+    """Questions of one topic with their history and weights."""
+
+    def __init__(self, question_ids: List[uuid.UUID], stats: List[List], answered: int, correct: int, now: datetime):
+        self.question_ids = question_ids
+        # Per question: [attempts, correct, last_answered_at]
+        self.stats = stats
+        self.answered = answered
+        self.correct = correct
+        self.tree = FenwickTree([self.own_weight(i, now) for i in range(len(question_ids))])
+
+    @property
+    def factor(self) -> float:
+        return 1.0 + TOPIC_BOOST * error_rate(self.answered, self.correct)
+
+    def own_weight(self, i: int, now: datetime) -> float:
+        attempts, correct, last_answered_at = self.stats[i]
+        return (BASE_WEIGHT + error_rate(attempts, correct)) * recency_factor(last_answered_at, now)
+
+
+class AdaptiveQuestionIndex:
+    """Weighted question pools of one certification."""
+
+    def __init__(self, version: Tuple[int, Optional[datetime]], pools: Dict[str, _TopicPool]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.topics = list(pools)
+        self.pools = [pools[t] for t in self.topics]
+        self.positions: Dict[uuid.UUID, Tuple[int, int]] = {
+            qid: (t, i) for t, pool in enumerate(self.pools) for i, qid in enumerate(pool.question_ids)
+        }
+        self.topic_tree = FenwickTree([pool.factor * pool.tree.total for pool in self.pools])
+        self._lock = threading.Lock()
+
+    def sample(self, count: int) -> List[uuid.UUID]:
+        """Draw up to ``count`` distinct questions with probability proportional to weight.
+
+        Drawn questions are zeroed for the rest of the draw and restored
+        afterwards; each draw costs O(log n).
+        """
+        picked: List[Tuple[int, int, float]] = []
+        with self._lock:
+            try:
+                while len(picked) < count and self.topic_tree.total > 1e-9:
+                    t = self.topic_tree.find(random.random() * self.topic_tree.total)
+                    pool = self.pools[t]
+                    if pool.tree.total <= 1e-9:
+                        self.topic_tree.set(t, 0.0)
+                        continue
+                    i = pool.tree.find(random.random() * pool.tree.total)
+                    weight = pool.tree.weights[i]
+                    if weight <= 0:
+                        continue
+                    picked.append((t, i, weight))
+                    self._set_weight(t, i, 0.0)
+            finally:
+                for t, i, weight in reversed(picked):
+                    self._set_weight(t, i, weight)
+        return [self.pools[t].question_ids[i] for t, i, _ in picked]
+
+    def record_answer(self, question_id: uuid.UUID, answered: int, correct: int, answered_at: datetime) -> None:
+        """Fold an answer's attempt and correct-count deltas into the weights."""
+        with self._lock:
+            position = self.positions.get(question_id)
+            if position is None:
+                return
+            t, i = position
+            pool = self.pools[t]
+            stats = pool.stats[i]
+            stats[0] += answered
+            stats[1] = max(0, stats[1] + correct)
+            stats[2] = answered_at
+            pool.answered += answered
+            pool.correct = max(0, pool.correct + correct)
+            self._set_weight(t, i, pool.own_weight(i, answered_at))
+
+    def _set_weight(self, t: int, i: int, weight: float) -> None:
+        pool = self.pools[t]
+        pool.tree.set(i, weight)
+        self.topic_tree.set(t, pool.factor * max(0.0, pool.tree.total))
+
+
+class AdaptiveSampler:
+    """Process-wide cache of adaptive indexes, refreshed as answers arrive."""
+
+    def __init__(self, max_entries: int = MAX_ADAPTIVE_CERTIFICATIONS):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[uuid.UUID, AdaptiveQuestionIndex]" = OrderedDict()
+
+    async def get_index(self, db: AsyncSession, certification_id: uuid.UUID) -> AdaptiveQuestionIndex:
+        """Return the current index for a certification, (re)loading it if stale."""
+        version_row = (await db.execute(
+            select(Certification.total_questions, Certification.updated_at)
+            .where(Certification.id == certification_id)
+        )).one_or_none()
+        version = tuple(version_row) if version_row else (0, None)
+
+        with self._lock:
+            index = self._indexes.get(certification_id)
+            if (
+                index is not None and index.version == version
+                and time.monotonic() - index.loaded_at < ADAPTIVE_INDEX_TTL
+            ):
+                self._indexes.move_to_end(certification_id)
+                return index
+
+        index = await self._load(db, certification_id, version)
+        with self._lock:
+            self._indexes[certification_id] = index
+            self._indexes.move_to_end(certification_id)
+            while len(self._indexes) > self._max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    async def _load(self, db: AsyncSession, certification_id: uuid.UUID, version) -> AdaptiveQuestionIndex:
+        questions = await db.execute(
+            select(
+                Question.id, Question.topic,
+                QuestionStats.attempts, QuestionStats.correct, QuestionStats.last_answered_at
+            )
+            .outerjoin(QuestionStats, QuestionStats.question_id == Question.id)
+            .where(Question.certification_id == certification_id)
+        )
+        topic_rows = await db.execute(
+            select(TopicStats.topic, TopicStats.answered, TopicStats.correct)
+            .where(TopicStats.certification_id == certification_id)
+        )
+        topic_totals = {row.topic: (row.answered, row.correct) for row in topic_rows}
+
+        grouped: Dict[str, Tuple[List[uuid.UUID], List[List]]] = {}
+        for row in questions:
+            ids, stats = grouped.setdefault(topic_key(row.topic), ([], []))
+            ids.append(row.id)
+            stats.append([row.attempts or 0, row.correct or 0, row.last_answered_at])
+
+        now = datetime.utcnow()
+        pools = {
+            topic: _TopicPool(ids, stats, *topic_totals.get(topic, (0, 0)), now)
+            for topic, (ids, stats) in grouped.items()
+        }
+        return AdaptiveQuestionIndex(version, pools)
+
+    def record_answers(self, certification_id: uuid.UUID, answers: List[Dict]) -> None:
+        """Apply answers to a cached index, if the certification has one.
+
+        ``answers`` are the deltas passed to ``record_question_answers``.
+        """
+        with self._lock:
+            index = self._indexes.get(certification_id)
+        if index is None:
+            return
+        for answer in answers:
+            index.record_answer(
+                answer["question_id"], answer["answered"], answer["correct"],
+                answer.get("answered_at") or datetime.utcnow()
+            )
+
+    def invalidate(self, certification_id: uuid.UUID) -> None:
+        """Drop a certification's index."""
+        with self._lock:
+            self._indexes.pop(certification_id, None)
+
+
+adaptive_sampler = AdaptiveSampler()
@@ -0,0 +1,319 @@
+"""
+Live quiz session state in Redis with write-behind to Postgres.
+
+When ``live_sessions_enabled`` is set, answers to an in-progress session are
+graded against the question payload cache and recorded in Redis only:
+
+- ``live_session:{id}`` hash: certification and counters
+- ``live_session:{id}:answers`` hash: question ID -> answer JSON
+- ``live_session:{id}:positions`` hash: question ID -> position in the session
+- ``live_session:{id}:dirty`` set: answers not yet written to Postgres
+- ``live_sessions:active`` sorted set: session IDs by last activity
+
+Dirty answers are flushed with one multi-row upsert when the session is
+completed, periodically by a background loop, and before idle sessions are
+dropped from Redis. Answers stay in the dirty set until their flush has
+committed, so the loop's first pass on startup replays whatever a crashed
+process left unflushed.
+"""
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from shared import cache
+from shared.config import settings
+from shared.database import async_session
+from shared.models import QuizSession, SessionAnswer, SessionQuestion
+from shared.question_cache import get_question_payloads
+from quiz.services import get_session, grade_answer, store_graded_answers
+from quiz.stats import invalidate_topics_cache
+
+LIVE_SESSION_PREFIX = "live_session"
+ACTIVE_SESSIONS_KEY = "live_sessions:active"
+
+# Stores an answer and adjusts the correct count against the previous answer.
+# Returns nil when the session is not live so the caller can seed it, and
+# {0, 0} without recording when the question has no known position.
+RECORD_ANSWER_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+local position = redis.call('HGET', KEYS[5], ARGV[1])
+if not position then return {0, 0} end
+local delta = tonumber(ARGV[3])
+local previous = redis.call('HGET', KEYS[2], ARGV[1])
+if previous and cjson.decode(previous)['is_correct'] then delta = delta - 1 end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('SADD', KEYS[3], ARGV[1])
+local correct = redis.call('HINCRBY', KEYS[1], 'correct_answers', delta)
+redis.call('HSET', KEYS[1], 'current_question_index', tonumber(position) + 1)
+redis.call('ZADD', KEYS[4], ARGV[4], ARGV[5])
+return {1, correct}
+"""
+
+# Drops a session's keys unless it saw activity after the cutoff or still has
+# unflushed answers
+DROP_SESSION_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[4], ARGV[2])
+if score and tonumber(score) > tonumber(ARGV[1]) then return 0 end
+if redis.call('SCARD', KEYS[3]) > 0 then return 0 end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3], KEYS[5])
+redis.call('ZREM', KEYS[4], ARGV[2])
+return 1
+"""
+
+# Clears flushed answers from the dirty set unless they were re-answered
+# while the flush ran (ARGV holds member, flushed value pairs; "" for an
+# answer that was already gone)
+CLEAR_FLUSHED_SCRIPT = """
+local cleared = 0
+for i = 1, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i]) or ''
+    if current == ARGV[i + 1] then
+        cleared = cleared + redis.call('SREM', KEYS[2], ARGV[i])
+    end
+end
+return cleared
+"""
+
+
+def live_sessions_enabled() -> bool:
+    """Whether live session state is kept in Redis."""
+    return settings.live_sessions_enabled and cache.redis_client is not None
+
+
+def _keys(session_id) -> list:
+    base = f"{LIVE_SESSION_PREFIX}:{session_id}"
+    return [base, f"{base}:answers", f"{base}:dirty", ACTIVE_SESSIONS_KEY, f"{base}:positions"]
+
+
+async def seed_live_session(db: AsyncSession, session: QuizSession) -> None:
+    """Copy a session's stored state into Redis without overwriting live fields."""
+    state_key, answers_key, _, active_key, positions_key = _keys(session.id)
+    positions = await db.execute(
+        select(SessionQuestion.question_id, SessionQuestion.position)
+        .where(SessionQuestion.session_id == session.id)
+    )
+    result = await db.execute(
+        select(SessionAnswer.question_id, SessionAnswer.user_answer,
+               SessionAnswer.is_correct, SessionAnswer.answered_at,
+               SessionAnswer.time_spent_seconds)
+        .where(SessionAnswer.session_id == session.id)
+    )
+
+    pipe = cache.redis_client.pipeline(transaction=True)
+    for row in result:
+        pipe.hsetnx(answers_key, str(row.question_id), json.dumps({
+            "user_answer": row.user_answer,
+            "is_correct": bool(row.is_correct),
+            "answered_at": row.answered_at.isoformat(),
+            "time_spent_seconds": row.time_spent_seconds,
+        }))
+    position_map = {str(row.question_id): row.position for row in positions}
+    if position_map:
+        pipe.hset(positions_key, mapping=position_map)
+    pipe.hsetnx(state_key, "certification_id", str(session.certification_id))
+    pipe.hsetnx(state_key, "correct_answers", session.correct_answers)
+    pipe.hsetnx(state_key, "current_question_index", session.current_question_index)
+    pipe.zadd(active_key, {str(session.id): time.time()})
+    await pipe.execute()
+
+
+async def record_live_answer(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    question_id: uuid.UUID,
+    user_answer: str,
+    time_spent_seconds: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Grade an answer and record it in the session's live state.
+
+    Postgres is only read the first time a session is seen, or for a
+    question appended to the session after it went live. Returns None when
+    the session does not exist.
+    """
+    client = cache.redis_client
+    keys = _keys(session_id)
+    payloads = await get_question_payloads(db, [question_id])
+    payload = payloads.get(question_id)
+    if not payload:
+        raise ValueError("Question not found")
+    is_correct = grade_answer(user_answer, payload)
+    answer = json.dumps({
+        "user_answer": user_answer,
+        "is_correct": is_correct,
+        "answered_at": datetime.utcnow().isoformat(),
+        "time_spent_seconds": time_spent_seconds,
+    })
+
+    for _ in range(3):
+        recorded = await client.register_script(RECORD_ANSWER_SCRIPT)(
+            keys=keys,
+            args=[str(question_id), answer, int(is_correct), time.time(), str(session_id)]
+        )
+        if recorded is None:
+            session = await get_session(db, session_id, with_answers=False)
+            if not session:
+                return None
+            if session.status != "in_progress":
+                raise ValueError("Session is not active")
+            await seed_live_session(db, session)
+            continue
+        if recorded[0]:
+            break
+        # Questions appended to a "full" session after it went live
+        position = await db.scalar(
+            select(SessionQuestion.position)
+            .where(SessionQuestion.session_id == session_id, SessionQuestion.question_id == question_id)
+        )
+        if position is None:
+            raise ValueError("Question is not part of this session")
+        await client.hset(keys[4], str(question_id), position)
+    else:
+        raise ValueError("Session is not active")
+
+    return {
+        "question_id": question_id,
+        "user_answer": user_answer,
+        "is_correct": is_correct,
+        "correct_answer": payload["correct_answer"],
+        "explanation": payload["explanation"],
+    }
+
+
+async def get_live_answers(
+    session_id: uuid.UUID,
+    question_ids: Optional[List[uuid.UUID]] = None
+) -> Optional[Dict[uuid.UUID, str]]:
+    """Get a live session's answers by question ID, or None if it is not live.
+
+    ``question_ids`` limits the lookup to part of the session.
+    """
+    state_key, answers_key = _keys(session_id)[:2]
+    pipe = cache.redis_client.pipeline(transaction=True)
+    pipe.exists(state_key)
+    if question_ids is None:
+        pipe.hgetall(answers_key)
+    else:
+        pipe.hmget(answers_key, [str(qid) for qid in question_ids] or ["-"])
+    exists, answers = await pipe.execute()
+    if not exists:
+        return None
+    if question_ids is not None:
+        answers = {str(qid): value for qid, value in zip(question_ids, answers) if value is not None}
+    return {uuid.UUID(qid): json.loads(value)["user_answer"] for qid, value in answers.items()}
+
+
+async def apply_live_state(session: QuizSession) -> None:
+    """Overlay live counters on a session loaded from Postgres."""
+    correct, index = await cache.redis_client.hmget(
+        _keys(session.id)[0], "correct_answers", "current_question_index"
+    )
+    if correct is not None:
+        set_committed_value(session, "correct_answers", int(correct))
+        set_committed_value(session, "current_question_index", int(index))
+
+
+async def flush_live_session(db: AsyncSession, session_id: uuid.UUID) -> int:
+    """Write a session's unflushed answers and counters to Postgres.
+    
+    Returns the number of answers written. Answers are only removed from the
+    dirty set once the transaction has committed, so a crash at any point
+    leaves them to be retried by a later flush.
+    """
+    client = cache.redis_client
+    state_key, answers_key, dirty_key = _keys(session_id)[:3]
+    
+    pipe = client.pipeline(transaction=True)
+    pipe.smembers(dirty_key)
+    pipe.hgetall(state_key)
+    members, state = await pipe.execute()
+    if not members and not state:
+        return 0
+    
+    members = list(members)
+    values = await client.hmget(answers_key, members) if members else []
+    try:
+        session = await get_session(db, session_id, with_answers=False)
+        if not session:
+            return 0
+        
+        graded: Dict[uuid.UUID, Dict[str, Any]] = {}
+        if members:
+            payloads = await get_question_payloads(db, [uuid.UUID(m) for m in members])
+            for member, value in zip(members, values):
+                qid = uuid.UUID(member)
+                # Questions deleted since the answer was recorded are dropped
+                if value is None or qid not in payloads:
+                    continue
+                item = json.loads(value)
+                graded[qid] = {
+                    **item,
+                    "answered_at": datetime.fromisoformat(item["answered_at"]),
+                    "topic": payloads[qid].get("topic"),
+                }
+            if graded:
+                await store_graded_answers(db, session, graded)
+        
+        if state:
+            session.correct_answers = int(state["correct_answers"])
+            session.current_question_index = int(state["current_question_index"])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    
+    if members:
+        flushed = [arg for member, value in zip(members, values) for arg in (member, value or "")]
+        await client.register_script(CLEAR_FLUSHED_SCRIPT)(keys=[answers_key, dirty_key], args=flushed)
+    if graded:
+        await invalidate_topics_cache(session.certification_id)
+    return len(graded)
+
+
+async def close_live_session(db: AsyncSession, session_id: uuid.UUID) -> None:
+    """Flush a session and drop its live state, e.g. before completing it."""
+    await flush_live_session(db, session_id)
+    await cache.redis_client.register_script(DROP_SESSION_SCRIPT)(
+        keys=_keys(session_id), args=[time.time() + 1, str(session_id)]
+    )
+
+
+async def flush_live_sessions(session_factory=async_session) -> int:
+    """Flush every live session and drop the ones idle past the timeout."""
+    client = cache.redis_client
+    cutoff = time.time() - settings.live_session_idle_timeout
+    drop_session = client.register_script(DROP_SESSION_SCRIPT)
+    flushed = 0
+
+    for session_id, last_active in await client.zrange(ACTIVE_SESSIONS_KEY, 0, -1, withscores=True):
+        try:
+            async with session_factory() as db:
+                flushed += await flush_live_session(db, uuid.UUID(session_id))
+            if last_active <= cutoff:
+                await drop_session(keys=_keys(session_id), args=[cutoff, session_id])
+        except Exception as e:
+            print(f"[LIVE SESSIONS ERROR] Flush of session {session_id} failed: {e}", flush=True)
+
+    return flushed
+
+
+async def run_live_session_flusher() -> None:
+    """Flush live sessions every ``live_session_flush_interval`` seconds.
+
+    The first pass runs immediately, recovering state left by a previous
+    process.
+    """
+    while True:
+        try:
+            flushed = await flush_live_sessions()
+            if flushed:
+                print(f"[LIVE SESSIONS] Flushed {flushed} answers", flush=True)
+        except Exception as e:
+            print(f"[LIVE SESSIONS ERROR] Flush pass failed: {e}", flush=True)
+        await asyncio.sleep(settings.live_session_flush_interval)
@@ -0,0 +1,32 @@
+"""
+Rebuild the maintained answer statistics (question_stats and topic_stats)
+from the full answer history, e.g. after restoring data or changing how
+answers are graded:
+
+    python -m quiz.rebuild_stats [--certification-id UUID]
+
+Cached topic lists expire within ``TOPICS_CACHE_TTL`` seconds.
+"""
+import uuid
+import asyncio
+import argparse
+from typing import Optional
+
+from shared.database import engine, init_db
+from shared.migrations import rebuild_question_stats, rebuild_topic_stats
+
+
+async def rebuild_stats(certification_id: Optional[uuid.UUID] = None) -> None:
+    """Recompute question and topic stats in one transaction."""
+    await init_db()
+    async with engine.begin() as conn:
+        questions = await rebuild_question_stats(conn, certification_id)
+        topics = await rebuild_topic_stats(conn, certification_id)
+    print(f"[STATS] Rebuilt stats for {questions} questions and {topics} topics", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild question and topic answer stats")
+    parser.add_argument("--certification-id", type=uuid.UUID, default=None)
+    args = parser.parse_args()
+    asyncio.run(rebuild_stats(args.certification_id))
@@ -3,45 +3,29 @@ API routes for quiz feature.
 """
 import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from shared.dependencies import get_db
+from shared.models import Question
+from shared.question_cache import warm_question_payloads
 from quiz.schemas import (
     SessionCreate, SessionResponse, AnswerSubmit, AnswerResponse,
+    AnswerBatchSubmit, AnswerBatchResponse,
     SessionResultsResponse, SuggestionsResponse, BookmarkCreate,
-    BookmarkResponse, QuestionWithAnswerResponse, TopicsResponse, TopicInfo
+    BookmarkResponse, QuestionWithAnswerResponse, QuestionWindowResponse,
+    TopicsResponse, TopicInfo
 )
-import re
-
 from quiz.services import (
-    create_session, get_session, get_session_questions,
-    submit_answer, complete_session, get_suggestions,
+    create_session, get_session, get_session_question_payloads,
+    get_session_question_window,
+    submit_answer, submit_answers_batch, complete_session, get_suggestions, ensure_explanation,
     add_bookmark, remove_bookmark, list_bookmarks, get_topics_for_certification
 )
-
-
-def _is_multi_select(question_text: str, correct_answer: str) -> bool:
-    """Detect if a question requires multiple answers."""
-    text_lower = question_text.lower()
-    # Check question text for multi-select indicators
-    multi_patterns = [
-        r'choose\s+(two|three|four|five|2|3|4|5)',
-        r'select\s+(two|three|four|five|2|3|4|5)',
-        r'select\s+all\s+that\s+apply',
-        r'choose\s+all\s+that\s+apply',
-        r'pick\s+(two|three|four|five|2|3|4|5)',
-        r'\(choose\s+\d+\)',
-        r'\(select\s+\d+\)',
-    ]
-    for pattern in multi_patterns:
-        if re.search(pattern, text_lower):
-            return True
-    # Check correct_answer for multiple letters
-    letters = re.findall(r'(?:^|,\s*)([A-Za-z])(?:\.|\b)', correct_answer)
-    if len(letters) > 1:
-        return True
-    return False
+from quiz.live_sessions import (
+    live_sessions_enabled, record_live_answer, get_live_answers, apply_live_state,
+    flush_live_session, close_live_session
+)
 
 
 router = APIRouter()
@@ -83,11 +67,14 @@ async def get_session_details(
     db: AsyncSession = Depends(get_db)
 ):
     """Get quiz session details."""
-    session = await get_session(db, session_id)
+    session = await get_session(db, session_id, with_answers=False)
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    if live_sessions_enabled():
+        await apply_live_state(session)
+    
     return SessionResponse.model_validate(session)
 
 
@@ -96,46 +83,52 @@ async def get_questions_for_session(
     session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all questions for a session with answer status."""
-    session = await get_session(db, session_id)
+    """Get all questions for a session with answer status.
+    
+    Question content comes from the payload cache; only answers and
+    bookmarks are read per request.
+    """
+    session = await get_session(db, session_id, with_answers=False)
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    questions = await get_session_questions(db, session)
+    answers = await get_live_answers(session_id) if live_sessions_enabled() else None
+    questions = await get_session_question_payloads(db, session, answers)
+    
+    return [QuestionWithAnswerResponse(**q) for q in questions]
+
+
+@router.get("/sessions/{session_id}/questions/window", response_model=QuestionWindowResponse)
+async def get_question_window_for_session(
+    session_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    offset: Optional[int] = Query(None, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+    prefetch: int = Query(5, ge=0, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a window of a session's questions with answer status.
+    
+    Defaults to the window starting at the current question. The next
+    ``prefetch`` question IDs are returned and their payloads warmed in the
+    cache after the response, so fetching the next window stays fast.
+    """
+    session = await get_session(db, session_id, with_answers=False)
     
-    # Build answer lookup
-    answers_lookup = {
-        str(a.question_id): a for a in session.answers
-    }
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
     
-    return [
-        QuestionWithAnswerResponse(
-            id=q.id,
-            question_number=q.question_number,
-            question_text=q.question_text,
-            options=q.options if isinstance(q.options, list) else list(q.options),
-            correct_answer=q.correct_answer,
-            explanation=q.explanation,
-            has_images=q.has_images,
-            is_multi_select=_is_multi_select(q.question_text, q.correct_answer),
-            images=[
-                {
-                    "id": str(img.id),
-                    "image_path": img.image_path,
-                    "image_order": img.image_order,
-                    "position_in_pdf": img.position_in_pdf,
-                    "width": img.width,
-                    "height": img.height
-                }
-                for img in q.images
-            ],
-            is_bookmarked=q.bookmark is not None,
-            user_answer=answers_lookup.get(str(q.id), {}).user_answer if str(q.id) in answers_lookup else None,
-            is_answered=str(q.id) in answers_lookup
-        )
-        for q in questions
-    ]
+    load_answers = None
+    if live_sessions_enabled():
+        await apply_live_state(session)
+        load_answers = lambda question_ids: get_live_answers(session_id, question_ids)
+    
+    window = await get_session_question_window(db, session, offset, limit, prefetch, load_answers)
+    if window["prefetch_ids"]:
+        background_tasks.add_task(warm_question_payloads, window["prefetch_ids"])
+    
+    return QuestionWindowResponse(**window)
 
 
 @router.post("/sessions/{session_id}/answers", response_model=AnswerResponse)
@@ -144,8 +137,64 @@ async def submit_session_answer(
     data: AnswerSubmit,
     db: AsyncSession = Depends(get_db)
 ):
-    """Submit an answer for a question in a session."""
-    session = await get_session(db, session_id)
+    """Submit an answer for a question in a session.
+    
+    With live sessions enabled the answer is recorded in Redis and written
+    to Postgres later.
+    """
+    try:
+        if live_sessions_enabled():
+            result = await record_live_answer(
+                db=db,
+                session_id=session_id,
+                question_id=data.question_id,
+                user_answer=data.user_answer,
+                time_spent_seconds=data.time_spent_seconds
+            )
+            if result is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+        else:
+            session = await get_session(db, session_id, with_answers=False)
+            
+            if not session:
+                raise HTTPException(status_code=404, detail="Session not found")
+            
+            if session.status != "in_progress":
+                raise HTTPException(status_code=400, detail="Session is not active")
+            
+            result = await submit_answer(
+                db=db,
+                session=session,
+                question_id=data.question_id,
+                user_answer=data.user_answer,
+                time_spent_seconds=data.time_spent_seconds
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not result["explanation"]:
+        # Deferred explanations are generated on first view
+        question = await db.get(Question, data.question_id)
+        if question:
+            result["explanation"] = await ensure_explanation(db, question)
+    
+    return AnswerResponse(**result)
+
+
+@router.post("/sessions/{session_id}/answers/batch", response_model=AnswerBatchResponse)
+async def submit_session_answers_batch(
+    session_id: uuid.UUID,
+    data: AnswerBatchSubmit,
+    db: AsyncSession = Depends(get_db)
+):
+    """Submit many answers at once, e.g. when an offline or exam-mode session is flushed.
+    
+    Explanations are returned as stored; missing ones are not generated here.
+    """
+    if live_sessions_enabled():
+        await close_live_session(db, session_id)
+    
+    session = await get_session(db, session_id, with_answers=False)
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -154,29 +203,15 @@ async def submit_session_answer(
         raise HTTPException(status_code=400, detail="Session is not active")
     
     try:
-        answer = await submit_answer(
+        result = await submit_answers_batch(
             db=db,
             session=session,
-            question_id=data.question_id,
-            user_answer=data.user_answer,
-            time_spent_seconds=data.time_spent_seconds
-        )
-        
-        # Get question for response
-        question = await db.get(
-            __import__("shared.models", fromlist=["Question"]).Question,
-            data.question_id
-        )
-        
-        return AnswerResponse(
-            question_id=answer.question_id,
-            user_answer=answer.user_answer,
-            is_correct=answer.is_correct,
-            correct_answer=question.correct_answer if question else "",
-            explanation=question.explanation if question else ""
+            answers=[a.model_dump() for a in data.answers]
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    return AnswerBatchResponse(**result)
 
 
 @router.post("/sessions/{session_id}/complete", response_model=SessionResultsResponse)
@@ -185,6 +220,9 @@ async def complete_quiz_session(
     db: AsyncSession = Depends(get_db)
 ):
     """Complete a quiz session and get results."""
+    if live_sessions_enabled():
+        await close_live_session(db, session_id)
+    
     session = await get_session(db, session_id)
     
     if not session:
@@ -207,6 +245,9 @@ async def get_session_results(
 ):
     """Get results for a completed session."""
     from quiz.services import build_session_results
+    if live_sessions_enabled():
+        await flush_live_session(db, session_id)
+    
     session = await get_session(db, session_id)
     
     if not session:
@@ -0,0 +1,110 @@
+"""
+In-memory question ID index for drawing random session questions.
+
+Replaces ``ORDER BY random() LIMIT n`` (a scan and sort of every matching
+question) with per-certification, per-topic ID arrays loaded once and
+sampled in O(n) for n drawn questions. Entries are keyed by the
+certification's question count and ``updated_at``, so questions landing
+during ingestion or import rebuild the index on the next draw.
+"""
+import uuid
+import random
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Iterable, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.models import Certification, Question
+
+# Certifications whose index is kept per process
+MAX_INDEXED_CERTIFICATIONS = 64
+
+
+class CertificationQuestionIndex:
+    """Question IDs of one certification grouped by topic."""
+
+    def __init__(self, version: Tuple[int, Optional[datetime]], rows: Iterable[Tuple[uuid.UUID, Optional[str]]]):
+        self.version = version
+        self.by_topic: Dict[Optional[str], List[uuid.UUID]] = {}
+        for question_id, topic in rows:
+            self.by_topic.setdefault(topic, []).append(question_id)
+
+    @property
+    def total(self) -> int:
+        return sum(len(ids) for ids in self.by_topic.values())
+
+    def topic_size(self, topic: Optional[str]) -> int:
+        return len(self.by_topic.get(topic, ()))
+
+    def sample(self, count: int, topics: Optional[Iterable[Optional[str]]] = None) -> List[uuid.UUID]:
+        """Draw up to ``count`` distinct IDs uniformly from the given topics (default: all).
+
+        Indexes are drawn from the virtual concatenation of the topic arrays,
+        so nothing proportional to the bank size is copied.
+        """
+        pools = [
+            self.by_topic[t] for t in (self.by_topic if topics is None else topics)
+            if self.by_topic.get(t)
+        ]
+        if not pools:
+            return []
+        bounds = []
+        size = 0
+        for pool in pools:
+            size += len(pool)
+            bounds.append(size)
+
+        picked = []
+        for index in random.sample(range(size), min(count, size)):
+            p = bisect.bisect_right(bounds, index)
+            offset = index - (bounds[p - 1] if p else 0)
+            picked.append(pools[p][offset])
+        return picked
+
+
+class QuestionSampler:
+    """Process-wide cache of certification indexes."""
+
+    def __init__(self, max_entries: int = MAX_INDEXED_CERTIFICATIONS):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[uuid.UUID, CertificationQuestionIndex]" = OrderedDict()
+
+    async def get_index(self, db: AsyncSession, certification_id: uuid.UUID) -> CertificationQuestionIndex:
+        """Return the current index for a certification, (re)loading it if stale."""
+        version_row = (await db.execute(
+            select(Certification.total_questions, Certification.updated_at)
+            .where(Certification.id == certification_id)
+        )).one_or_none()
+        version = tuple(version_row) if version_row else (0, None)
+
+        with self._lock:
+            index = self._indexes.get(certification_id)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(certification_id)
+                return index
+
+        result = await db.execute(
+            select(Question.id, Question.topic)
+            .where(Question.certification_id == certification_id)
+        )
+        index = CertificationQuestionIndex(version, result.all())
+
+        with self._lock:
+            self._indexes[certification_id] = index
+            self._indexes.move_to_end(certification_id)
+            while len(self._indexes) > self._max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def invalidate(self, certification_id: uuid.UUID) -> None:
+        """Drop a certification's index."""
+        with self._lock:
+            self._indexes.pop(certification_id, None)
+
+
+question_sampler = QuestionSampler()
@@ -10,7 +10,7 @@ from pydantic import BaseModel, Field
 class SessionCreate(BaseModel):
     """Schema for creating a quiz session."""
     certification_id: UUID
-    session_type: str = Field(..., pattern="^(weak_areas|continue|review|random|full|stratified)$")
+    session_type: str = Field(..., pattern="^(weak_areas|continue|review|random|full|stratified|due|adaptive)$")
     question_count: Optional[int] = 20
     questions_per_topic: Optional[int] = None  # For stratified mode
 
@@ -60,6 +60,20 @@ class AnswerResponse(BaseModel):
     explanation: str
 
 
+class AnswerBatchSubmit(BaseModel):
+    """Schema for submitting many answers at once (offline/exam modes)."""
+    answers: List[AnswerSubmit] = Field(..., min_length=1, max_length=500)
+
+
+class AnswerBatchResponse(BaseModel):
+    """Schema for batch answer response."""
+    session_id: UUID
+    answered: int
+    correct: int
+    correct_answers: int  # session total after the batch
+    results: List[AnswerResponse]
+
+
 class TopicStat(BaseModel):
     """Per-topic statistics."""
     topic: str
@@ -132,3 +146,14 @@ class QuestionWithAnswerResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class QuestionWindowResponse(BaseModel):
+    """Schema for a window of a session's questions."""
+    session_id: UUID
+    total_questions: int
+    current_question_index: int
+    offset: int
+    questions: List[QuestionWithAnswerResponse]
+    next_offset: Optional[int] = None
+    prefetch_ids: List[UUID] = []
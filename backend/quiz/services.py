@@ -3,52 +3,29 @@ Business logic for quiz feature.
 """
 import uuid
 import random
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
 from datetime import datetime
-from sqlalchemy import select, func, and_, case
+from sqlalchemy import select, insert, func, and_, case, literal, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-import re
-
+from shared.answers import extract_answer_letters
+from shared.question_cache import get_question_payloads, invalidate_question_payloads
+from shared.cache import get_cached, set_cached
 from shared.models import (
     Certification, Question, QuizSession, SessionAnswer,
-    BookmarkedQuestion
+    SessionQuestion, BookmarkedQuestion, TopicStats, QuestionStats
 )
 from quiz.schemas import QuizSuggestion
-
-
-def _extract_answer_letters(answer: str) -> set[str]:
-    """Extract answer letters from an answer string.
-    Handles formats like 'B', 'A,C', 'A, C', 'A. Foo, C. Bar', 'AC',
-    'A. Foo\\nC. Bar', 'A. Foo and C. Bar'."""
-    # Split by comma, newline, or ' and '
-    parts = re.split(r'[,\n]| and ', answer)
-    letters = set()
-    for part in parts:
-        part = part.strip()
-        if not part:
-            continue
-        m = re.match(r'^([A-Za-z])(?:\.|\b)', part)
-        if m:
-            letters.add(m.group(1).upper())
-    if letters:
-        return letters
-    # Fallback: consecutive uppercase letters (e.g. "AC")
-    stripped = answer.strip().upper()
-    if stripped.isalpha() and len(stripped) <= 6:
-        return set(stripped)
-    # Last resort: first character
-    if stripped:
-        return {stripped[0]}
-    return set()
-
-
-def check_answer_correct(user_answer: str, correct_answer: str) -> bool:
-    """Check if user answer matches correct answer, supporting multi-select."""
-    user_letters = _extract_answer_letters(user_answer)
-    correct_letters = _extract_answer_letters(correct_answer)
-    return user_letters == correct_letters
+from quiz.sampling import question_sampler
+from quiz.adaptive import adaptive_sampler
+from quiz.stats import (
+    record_topic_answers, record_question_answers, invalidate_topics_cache,
+    invalidate_suggestions_cache, first_review, question_stats_set_clause,
+    topic_key, topics_cache_key, suggestions_cache_key, TOPICS_CACHE_TTL, SUGGESTIONS_CACHE_TTL
+)
 
 
 async def get_weak_topics(
@@ -56,87 +33,163 @@ async def get_weak_topics(
     certification_id: uuid.UUID,
     threshold: float = 60.0
 ) -> List[str]:
-    """Get topics with accuracy below threshold."""
-    # Get all answered questions with their topics
+    """Get topics with accuracy below threshold, from the maintained topic stats."""
     result = await db.execute(
-        select(
-            Question.topic,
-            func.count(SessionAnswer.id).label("total"),
-            func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-        )
-        .join(SessionAnswer, SessionAnswer.question_id == Question.id)
+        select(TopicStats.topic, TopicStats.answered, TopicStats.correct)
         .where(
             and_(
-                Question.certification_id == certification_id,
-                Question.topic.isnot(None),
-                SessionAnswer.is_correct.isnot(None)
+                TopicStats.certification_id == certification_id,
+                TopicStats.topic != "",
+                TopicStats.answered > 0
             )
         )
-        .group_by(Question.topic)
     )
     
-    weak_topics = []
-    for row in result:
-        if row.total > 0:
-            accuracy = (row.correct / row.total) * 100
-            if accuracy < threshold:
-                weak_topics.append(row.topic)
-    
-    return weak_topics
+    return [
+        row.topic for row in result
+        if row.correct / row.answered * 100 < threshold
+    ]
 
 
 async def get_topics_for_certification(
     db: AsyncSession,
     certification_id: uuid.UUID
 ) -> List[Dict[str, Any]]:
-    """Get all topics for a certification with question counts and accuracy."""
+    """Get all topics for a certification with question counts and accuracy.
+    
+    Question counts and the maintained topic_stats counters are read in one
+    query; the result is cached until an answer is submitted or questions
+    are added.
+    """
     from quiz.schemas import TopicInfo
     
-    # Get topics with counts and accuracy
+    cache_key = topics_cache_key(certification_id)
+    cached = await get_cached(cache_key)
+    if cached is not None:
+        return [TopicInfo(**t) for t in cached]
+    
+    topic = func.coalesce(Question.topic, "")
+    counts = (
+        select(topic.label("topic"), func.count(Question.id).label("question_count"))
+        .where(Question.certification_id == certification_id)
+        .group_by(topic)
+        .subquery()
+    )
     result = await db.execute(
-        select(
-            Question.topic,
-            func.count(Question.id).label("question_count")
+        select(counts.c.topic, counts.c.question_count, TopicStats.answered, TopicStats.correct)
+        .outerjoin(
+            TopicStats,
+            and_(
+                TopicStats.certification_id == certification_id,
+                TopicStats.topic == counts.c.topic
+            )
         )
-        .where(Question.certification_id == certification_id)
-        .group_by(Question.topic)
-        .order_by(func.count(Question.id).desc())
+        .order_by(counts.c.question_count.desc())
     )
     
     topics = []
     for row in result:
-        topic_name = row.topic if row.topic else "Uncategorized"
-        
-        # Get accuracy for this topic
-        accuracy_result = await db.execute(
-            select(
-                func.count(SessionAnswer.id).label("total"),
-                func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-            )
-            .select_from(SessionAnswer)
-            .join(Question, SessionAnswer.question_id == Question.id)
-            .where(
-                and_(
-                    Question.certification_id == certification_id,
-                    Question.topic == row.topic if row.topic else Question.topic.is_(None),
-                    SessionAnswer.is_correct.isnot(None)
-                )
-            )
-        )
-        acc_row = accuracy_result.one()
         accuracy = None
-        if acc_row.total and acc_row.total > 0:
-            accuracy = round((acc_row.correct / acc_row.total) * 100, 1)
-        
+        if row.answered:
+            accuracy = round((row.correct / row.answered) * 100, 1)
         topics.append(TopicInfo(
-            topic=topic_name,
+            topic=row.topic or "Uncategorized",
             question_count=row.question_count,
             accuracy=accuracy
         ))
     
+    await set_cached(cache_key, [t.model_dump() for t in topics], ttl=TOPICS_CACHE_TTL)
     return topics
 
 
+def stratified_session_query(certification_id: uuid.UUID, question_count: int):
+    """Build the single statement that picks a stratified session.
+    
+    Topics are ranked by priority (never answered first, then lowest
+    accuracy); each gets ``question_count // topics`` questions (at least
+    one), the highest-priority topics one extra until the count is reached,
+    capped by the topic's size. Questions are drawn at random within each
+    topic and the result is cut to ``question_count`` in priority order.
+    """
+    topic_key = func.coalesce(Question.topic, "")
+    
+    topic_totals = (
+        select(topic_key.label("topic"), func.count().label("total"))
+        .where(Question.certification_id == certification_id)
+        .group_by(topic_key)
+        .cte("topic_totals")
+    )
+    topic_accuracy = (
+        select(
+            TopicStats.topic,
+            TopicStats.answered,
+            TopicStats.correct
+        )
+        .where(TopicStats.certification_id == certification_id)
+        .cte("topic_accuracy")
+    )
+    
+    answered = func.coalesce(topic_accuracy.c.answered, 0)
+    priority = case(
+        (answered == 0, 1000.0),
+        else_=100.0 - 100.0 * topic_accuracy.c.correct / func.nullif(answered, 0)
+    )
+    ranked_topics = (
+        select(
+            topic_totals.c.topic,
+            topic_totals.c.total,
+            func.row_number().over(order_by=(priority.desc(), topic_totals.c.topic)).label("priority_rank"),
+            func.count().over().label("topic_count")
+        )
+        .select_from(topic_totals)
+        .outerjoin(topic_accuracy, topic_accuracy.c.topic == topic_totals.c.topic)
+        .cte("ranked_topics")
+    )
+    
+    base_per_topic = func.greatest(1, literal(question_count) // ranked_topics.c.topic_count)
+    remaining = literal(question_count) - base_per_topic * ranked_topics.c.topic_count
+    quotas = (
+        select(
+            ranked_topics.c.topic,
+            ranked_topics.c.priority_rank,
+            func.least(
+                ranked_topics.c.total,
+                base_per_topic + case((ranked_topics.c.priority_rank <= remaining, 1), else_=0)
+            ).label("quota")
+        )
+        .cte("quotas")
+    )
+    
+    picked = (
+        select(
+            Question.id,
+            quotas.c.priority_rank,
+            quotas.c.quota,
+            func.row_number().over(partition_by=topic_key, order_by=func.random()).label("draw")
+        )
+        .join(quotas, quotas.c.topic == topic_key)
+        .where(Question.certification_id == certification_id)
+        .cte("picked")
+    )
+    
+    return (
+        select(picked.c.id)
+        .where(picked.c.draw <= picked.c.quota)
+        .order_by(picked.c.priority_rank, picked.c.draw)
+        .limit(question_count)
+    )
+
+
+async def build_stratified_question_ids(
+    db: AsyncSession,
+    certification_id: uuid.UUID,
+    question_count: int
+) -> List[uuid.UUID]:
+    """Pick a stratified session's questions in one round trip."""
+    result = await db.execute(stratified_session_query(certification_id, question_count))
+    return list(result.scalars().all())
+
+
 async def get_questions_for_session(
     db: AsyncSession,
     certification_id: uuid.UUID,
@@ -147,29 +200,10 @@ async def get_questions_for_session(
     """Get question IDs for a session based on type."""
     
     if session_type == "weak_areas":
-        # Get questions from weak topics
+        # Get questions from weak topics (all topics if none identified yet)
         weak_topics = await get_weak_topics(db, certification_id)
-        
-        if weak_topics:
-            result = await db.execute(
-                select(Question.id)
-                .where(
-                    and_(
-                        Question.certification_id == certification_id,
-                        Question.topic.in_(weak_topics)
-                    )
-                )
-                .order_by(func.random())
-                .limit(question_count)
-            )
-        else:
-            # No weak topics identified, use random
-            result = await db.execute(
-                select(Question.id)
-                .where(Question.certification_id == certification_id)
-                .order_by(func.random())
-                .limit(question_count)
-            )
+        index = await question_sampler.get_index(db, certification_id)
+        return index.sample(question_count, weak_topics or None)
         
     elif session_type == "review":
         # Get bookmarked questions
@@ -183,138 +217,34 @@ async def get_questions_for_session(
         
     elif session_type == "random":
         # Random questions
-        result = await db.execute(
-            select(Question.id)
-            .where(Question.certification_id == certification_id)
-            .order_by(func.random())
-            .limit(question_count)
-        )
+        index = await question_sampler.get_index(db, certification_id)
+        return index.sample(question_count)
         
     elif session_type == "stratified":
         # Stratified by topic - distribute question_count across topics
         # prioritizing topics with lower accuracy or not yet answered
-        question_ids = []
-        
-        # Get all topics with their stats
-        topics_result = await db.execute(
-            select(
-                Question.topic,
-                func.count(Question.id).label("total_questions")
-            )
-            .where(Question.certification_id == certification_id)
-            .group_by(Question.topic)
-        )
-        topics_data = []
-        
-        for row in topics_result:
-            topic_name = row.topic
-            total_in_topic = row.total_questions
-            
-            # Get accuracy for this topic (lower accuracy = higher priority)
-            if topic_name is not None:
-                acc_result = await db.execute(
-                    select(
-                        func.count(SessionAnswer.id).label("answered"),
-                        func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-                    )
-                    .select_from(SessionAnswer)
-                    .join(Question, SessionAnswer.question_id == Question.id)
-                    .where(
-                        and_(
-                            Question.certification_id == certification_id,
-                            Question.topic == topic_name,
-                            SessionAnswer.is_correct.isnot(None)
-                        )
-                    )
-                )
-            else:
-                acc_result = await db.execute(
-                    select(
-                        func.count(SessionAnswer.id).label("answered"),
-                        func.sum(case((SessionAnswer.is_correct == True, 1), else_=0)).label("correct")
-                    )
-                    .select_from(SessionAnswer)
-                    .join(Question, SessionAnswer.question_id == Question.id)
-                    .where(
-                        and_(
-                            Question.certification_id == certification_id,
-                            Question.topic.is_(None),
-                            SessionAnswer.is_correct.isnot(None)
-                        )
-                    )
-                )
-            
-            acc_row = acc_result.one()
-            answered = acc_row.answered or 0
-            correct = acc_row.correct or 0
-            
-            # Calculate priority score (lower accuracy = higher priority, never answered = highest)
-            if answered == 0:
-                priority = 1000  # Highest priority for unanswered topics
-            else:
-                accuracy = (correct / answered) * 100
-                priority = 100 - accuracy  # Lower accuracy = higher priority
-            
-            topics_data.append({
-                "topic": topic_name,
-                "total": total_in_topic,
-                "answered": answered,
-                "priority": priority
-            })
-        
-        # Sort by priority (highest first = topics that need more work)
-        topics_data.sort(key=lambda x: x["priority"], reverse=True)
-        
-        # Distribute questions proportionally across topics
-        num_topics = len(topics_data)
-        if num_topics == 0:
-            return []
-        
-        # Calculate how many questions per topic (at least 1 per topic if possible)
-        base_per_topic = max(1, question_count // num_topics)
-        remaining = question_count - (base_per_topic * num_topics)
-        
-        # Collect questions from each topic
-        for i, topic_info in enumerate(topics_data):
-            # Give extra questions to higher priority topics
-            extra = 1 if i < remaining else 0
-            count_for_topic = min(base_per_topic + extra, topic_info["total"])
-            
-            topic_name = topic_info["topic"]
-            if topic_name is not None:
-                topic_result = await db.execute(
-                    select(Question.id)
-                    .where(
-                        and_(
-                            Question.certification_id == certification_id,
-                            Question.topic == topic_name
-                        )
-                    )
-                    .order_by(func.random())
-                    .limit(count_for_topic)
-                )
-            else:
-                topic_result = await db.execute(
-                    select(Question.id)
-                    .where(
-                        and_(
-                            Question.certification_id == certification_id,
-                            Question.topic.is_(None)
-                        )
-                    )
-                    .order_by(func.random())
-                    .limit(count_for_topic)
-                )
-            question_ids.extend([row[0] for row in topic_result.all()])
-        
-        # Shuffle the final list
+        question_ids = await build_stratified_question_ids(db, certification_id, question_count)
         random.shuffle(question_ids)
+        return question_ids
         
-        # Ensure we don't exceed the requested count
-        if len(question_ids) > question_count:
-            question_ids = question_ids[:question_count]
+    elif session_type == "adaptive":
+        # Weighted by each question's error rate, recency and topic weakness
+        index = await adaptive_sampler.get_index(db, certification_id)
+        return index.sample(question_count)
         
-        return question_ids
+    elif session_type == "due":
+        # Spaced repetition: questions whose review is due, most overdue first
+        result = await db.execute(
+            select(QuestionStats.question_id)
+            .where(
+                and_(
+                    QuestionStats.certification_id == certification_id,
+                    QuestionStats.due_at <= datetime.utcnow()
+                )
+            )
+            .order_by(QuestionStats.due_at)
+            .limit(question_count)
+        )
         
     elif session_type == "full":
         # All questions in order
@@ -360,60 +290,350 @@ async def create_session(
         if existing_session:
             return existing_session
     
-    # Get questions for session
+    # Get questions for session (only questions committed so far while processing)
     question_ids = await get_questions_for_session(
         db, certification_id, session_type, question_count, questions_per_topic
     )
     
     if not question_ids:
+        certification = await db.get(Certification, certification_id)
+        if certification and certification.processing_status in ("pending", "processing"):
+            raise ValueError("Certification is still processing; no questions are available yet")
+        if session_type == "due":
+            raise ValueError("No questions are due for review")
         raise ValueError("No questions available for this session type")
     
     # Create session
     session = QuizSession(
+        id=uuid.uuid4(),
         certification_id=certification_id,
         session_type=session_type,
         total_questions=len(question_ids),
-        question_ids=[str(qid) for qid in question_ids],
         status="in_progress"
     )
     
     db.add(session)
+    await db.flush()
+    await add_session_questions(db, session.id, question_ids)
     await db.commit()
     await db.refresh(session)
+    await invalidate_suggestions_cache(certification_id)
     
     return session
 
 
-async def get_session(db: AsyncSession, session_id: uuid.UUID) -> Optional[QuizSession]:
-    """Get quiz session by ID."""
+async def add_session_questions(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    question_ids: List[uuid.UUID],
+    start: int = 0
+) -> None:
+    """Append questions to a session's ordered membership, from position ``start``."""
+    if question_ids:
+        await db.execute(insert(SessionQuestion), [
+            {"session_id": session_id, "position": start + i, "question_id": qid}
+            for i, qid in enumerate(question_ids)
+        ])
+
+
+async def get_session_question_ids(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    start: int = 0,
+    end: Optional[int] = None
+) -> List[uuid.UUID]:
+    """Get the question IDs at positions ``[start, end)`` of a session, in order."""
+    query = (
+        select(SessionQuestion.question_id)
+        .where(SessionQuestion.session_id == session_id, SessionQuestion.position >= start)
+        .order_by(SessionQuestion.position)
+    )
+    if end is not None:
+        query = query.where(SessionQuestion.position < end)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def get_session_positions(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    question_ids: List[uuid.UUID]
+) -> Dict[uuid.UUID, int]:
+    """Map the given question IDs that belong to a session to their positions."""
+    if not question_ids:
+        return {}
     result = await db.execute(
-        select(QuizSession)
-        .options(selectinload(QuizSession.answers))
-        .where(QuizSession.id == session_id)
+        select(SessionQuestion.question_id, SessionQuestion.position)
+        .where(SessionQuestion.session_id == session_id, SessionQuestion.question_id.in_(question_ids))
     )
-    return result.scalar_one_or_none()
+    return {row.question_id: row.position for row in result}
 
 
-async def get_session_questions(
+async def get_session(
     db: AsyncSession,
-    session: QuizSession
-) -> List[Question]:
-    """Get questions for a session with answer status."""
-    question_ids = [uuid.UUID(qid) for qid in session.question_ids]
+    session_id: uuid.UUID,
+    with_answers: bool = True
+) -> Optional[QuizSession]:
+    """Get quiz session by ID, optionally with its answers loaded."""
+    query = select(QuizSession).where(QuizSession.id == session_id)
+    if with_answers:
+        query = query.options(selectinload(QuizSession.answers))
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def extend_full_session(db: AsyncSession, session: QuizSession) -> None:
+    """Append questions ingested since a "full" session was created.
+    
+    Sessions started while a certification is still processing only cover the
+    questions committed at that time; new questions become eligible as they land.
+    """
+    if session.session_type != "full" or session.status != "in_progress":
+        return
+    
+    certification = await db.get(Certification, session.certification_id)
+    if not certification or certification.total_questions <= session.total_questions:
+        return
+    
+    # Concurrent question reads can both get here; under the row lock the
+    # later one sees the rows and total the earlier one committed
+    total_questions = await db.scalar(
+        select(QuizSession.total_questions)
+        .where(QuizSession.id == session.id)
+        .with_for_update()
+    )
+    set_committed_value(session, "total_questions", total_questions)
+    if certification.total_questions <= total_questions:
+        await db.commit()
+        return
     
     result = await db.execute(
-        select(Question)
-        .options(
-            selectinload(Question.images),
-            selectinload(Question.bookmark)
+        select(Question.id)
+        .where(
+            Question.certification_id == session.certification_id,
+            ~select(SessionQuestion.position)
+            .where(
+                SessionQuestion.session_id == session.id,
+                SessionQuestion.question_id == Question.id
+            )
+            .exists()
         )
-        .where(Question.id.in_(question_ids))
+        .order_by(Question.question_number)
     )
+    new_ids = list(result.scalars().all())
+    if not new_ids:
+        await db.commit()
+        return
+    
+    await add_session_questions(db, session.id, new_ids, start=session.total_questions)
+    session.total_questions += len(new_ids)
+    await db.commit()
+    await invalidate_suggestions_cache(session.certification_id)
+
+
+async def merge_session_question_state(
+    db: AsyncSession,
+    session: QuizSession,
+    question_ids: List[uuid.UUID],
+    answers: Optional[Dict[uuid.UUID, str]] = None
+) -> List[Dict[str, Any]]:
+    """Get payloads for some of a session's questions merged with answer and bookmark state.
     
-    questions = {q.id: q for q in result.scalars().all()}
+    Question content is served from the payload cache; answers (unless
+    passed in from a live session) and bookmarks are read with two narrow
+    queries limited to ``question_ids``.
+    """
+    payloads = await get_question_payloads(db, question_ids)
+    
+    if answers is None:
+        answers_result = await db.execute(
+            select(SessionAnswer.question_id, SessionAnswer.user_answer)
+            .where(
+                and_(
+                    SessionAnswer.session_id == session.id,
+                    SessionAnswer.question_id.in_(question_ids)
+                )
+            )
+        )
+        answers = {row.question_id: row.user_answer for row in answers_result}
+    
+    bookmarks_result = await db.execute(
+        select(BookmarkedQuestion.question_id)
+        .where(BookmarkedQuestion.question_id.in_(question_ids))
+    )
+    bookmarked = set(bookmarks_result.scalars().all())
     
     # Return in session order
-    return [questions[qid] for qid in question_ids if qid in questions]
+    return [
+        {
+            **payloads[qid],
+            "is_bookmarked": qid in bookmarked,
+            "user_answer": answers.get(qid),
+            "is_answered": qid in answers,
+        }
+        for qid in question_ids if qid in payloads
+    ]
+
+
+async def get_session_question_payloads(
+    db: AsyncSession,
+    session: QuizSession,
+    answers: Optional[Dict[uuid.UUID, str]] = None
+) -> List[Dict[str, Any]]:
+    """Get all of a session's questions in order with answer and bookmark state.
+    
+    Live sessions pass their answers from Redis.
+    """
+    await extend_full_session(db, session)
+    
+    question_ids = await get_session_question_ids(db, session.id)
+    return await merge_session_question_state(db, session, question_ids, answers)
+
+
+def question_window_bounds(
+    session: QuizSession,
+    offset: Optional[int],
+    limit: int
+) -> Tuple[int, int]:
+    """Resolve a window's ``[start, end)`` positions in the session.
+    
+    Without an offset the window starts at the current question, pulled back
+    so the last window of a finished session is still full.
+    """
+    total = session.total_questions
+    if offset is None:
+        offset = min(session.current_question_index, max(total - limit, 0))
+    start = max(0, min(offset, total))
+    return start, min(start + limit, total)
+
+
+async def get_session_question_window(
+    db: AsyncSession,
+    session: QuizSession,
+    offset: Optional[int],
+    limit: int,
+    prefetch: int,
+    load_answers: Optional[Callable[[List[uuid.UUID]], Awaitable[Optional[Dict[uuid.UUID, str]]]]] = None
+) -> Dict[str, Any]:
+    """Get a constant-size window of a session's questions.
+    
+    Also returns the IDs of the next ``prefetch`` questions so the client
+    can request them ahead of time; their payloads are warmed by the caller.
+    Live sessions pass ``load_answers`` to read the window's answers from Redis.
+    """
+    await extend_full_session(db, session)
+    
+    start, end = question_window_bounds(session, offset, limit)
+    window_ids = await get_session_question_ids(db, session.id, start, end + prefetch)
+    question_ids, prefetch_ids = window_ids[:end - start], window_ids[end - start:]
+    
+    questions = []
+    if question_ids:
+        answers = await load_answers(question_ids) if load_answers else None
+        questions = await merge_session_question_state(db, session, question_ids, answers)
+    
+    return {
+        "session_id": session.id,
+        "total_questions": session.total_questions,
+        "current_question_index": session.current_question_index,
+        "offset": start,
+        "questions": questions,
+        "next_offset": end if end < session.total_questions else None,
+        "prefetch_ids": prefetch_ids,
+    }
+
+
+def grade_answer(user_answer: str, payload: Dict[str, Any]) -> bool:
+    """Grade an answer against a cached question payload's answer key."""
+    correct_letters = payload.get("correct_letters")
+    if correct_letters is None:
+        return extract_answer_letters(user_answer) == extract_answer_letters(payload["correct_answer"])
+    return extract_answer_letters(user_answer) == set(correct_letters)
+
+
+# Upserts the answer and applies the session and topic counter deltas in one
+# statement. All CTEs share one snapshot, so ``previous`` sees the row as it
+# was before the upsert; ``xmax = 0`` tells a fresh insert from an update.
+# Callers hold the session row lock (``lock_session_row``), so two first
+# answers to the same question cannot both see no previous row.
+SUBMIT_ANSWER_SQL = text(f"""
+WITH previous AS (
+    SELECT is_correct FROM session_answers
+    WHERE session_id = :session_id AND question_id = :question_id
+),
+upserted AS (
+    INSERT INTO session_answers
+        (id, session_id, question_id, user_answer, is_correct, answered_at, time_spent_seconds)
+    VALUES
+        (:answer_id, :session_id, :question_id, :user_answer, :is_correct,
+         CAST(:answered_at AS timestamp), :time_spent_seconds)
+    ON CONFLICT (session_id, question_id) DO UPDATE SET
+        user_answer = EXCLUDED.user_answer,
+        is_correct = EXCLUDED.is_correct,
+        answered_at = EXCLUDED.answered_at,
+        time_spent_seconds = EXCLUDED.time_spent_seconds
+    RETURNING id, answered_at, (xmax = 0) AS inserted
+),
+deltas AS (
+    SELECT
+        upserted.inserted::int AS answered_delta,
+        CAST(:is_correct AS boolean)::int
+            - COALESCE((SELECT is_correct::int FROM previous), 0) AS correct_delta
+    FROM upserted
+),
+session_update AS (
+    UPDATE quiz_sessions SET
+        correct_answers = GREATEST(0, correct_answers + deltas.correct_delta),
+        current_question_index = CAST(:position AS integer) + 1
+    FROM deltas
+    WHERE quiz_sessions.id = :session_id
+    RETURNING correct_answers, current_question_index
+),
+topic_update AS (
+    INSERT INTO topic_stats (certification_id, topic, answered, correct, updated_at)
+    SELECT CAST(:certification_id AS uuid), CAST(:topic AS varchar), answered_delta, correct_delta,
+           CAST(:answered_at AS timestamp)
+    FROM deltas
+    WHERE answered_delta <> 0 OR correct_delta <> 0
+    ON CONFLICT (certification_id, topic) DO UPDATE SET
+        answered = topic_stats.answered + EXCLUDED.answered,
+        correct = topic_stats.correct + EXCLUDED.correct,
+        updated_at = EXCLUDED.updated_at
+),
+-- Same rules as quiz.stats.record_question_answers
+question_update AS (
+    INSERT INTO question_stats
+        (question_id, certification_id, attempts, correct, last_answered_at, last_result, streak,
+         ease, interval_days, due_at)
+    SELECT CAST(:question_id AS uuid), CAST(:certification_id AS uuid), answered_delta,
+           correct_delta, upserted.answered_at, CAST(:is_correct AS boolean),
+           CAST(:is_correct AS boolean)::int, CAST(:first_ease AS double precision),
+           CAST(:first_interval AS double precision),
+           upserted.answered_at + CAST(:first_interval AS double precision) * INTERVAL '1 day'
+    FROM deltas, upserted
+    ON CONFLICT (question_id) DO UPDATE SET
+        {question_stats_set_clause()}
+)
+SELECT upserted.id, upserted.answered_at,
+       session_update.correct_answers, session_update.current_question_index,
+       deltas.answered_delta, deltas.correct_delta
+FROM upserted, session_update, deltas
+""")
+
+
+async def lock_session_row(db: AsyncSession, session: QuizSession) -> None:
+    """Lock a session's row until the transaction ends and reload its counters.
+    
+    Serializes answer writes per session: previous answers and counters are
+    read after any concurrent writer has committed, so deltas apply once.
+    """
+    row = (await db.execute(
+        select(QuizSession.correct_answers, QuizSession.current_question_index)
+        .where(QuizSession.id == session.id)
+        .with_for_update()
+    )).one()
+    set_committed_value(session, "correct_answers", row.correct_answers)
+    set_committed_value(session, "current_question_index", row.current_question_index)
 
 
 async def submit_answer(
@@ -422,62 +642,233 @@ async def submit_answer(
     question_id: uuid.UUID,
     user_answer: str,
     time_spent_seconds: Optional[int] = None
-) -> SessionAnswer:
-    """Submit an answer for a question in a session."""
+) -> Dict[str, Any]:
+    """Submit an answer for a question in a session.
     
-    # Get the question to validate answer
-    question = await db.get(Question, question_id)
-    if not question:
+    The answer is graded against the cached question payload and stored,
+    together with the session and topic counters, by a single upsert
+    statement under the session row lock, so concurrent submits of the same
+    question cannot create duplicate rows or count an answer twice.
+    """
+    payloads = await get_question_payloads(db, [question_id])
+    payload = payloads.get(question_id)
+    if not payload:
         raise ValueError("Question not found")
     
-    # Check if already answered
-    existing = await db.execute(
-        select(SessionAnswer)
+    is_correct = grade_answer(user_answer, payload)
+    first_ease, first_interval = first_review(is_correct)
+    await lock_session_row(db, session)
+    # Answers to foreign questions would corrupt the session and stats counters
+    position = await db.scalar(
+        select(SessionQuestion.position)
+        .where(SessionQuestion.session_id == session.id, SessionQuestion.question_id == question_id)
+    )
+    if position is None:
+        await db.rollback()
+        raise ValueError("Question is not part of this session")
+    row = (await db.execute(SUBMIT_ANSWER_SQL, {
+        "answer_id": uuid.uuid4(),
+        "session_id": session.id,
+        "question_id": question_id,
+        "user_answer": user_answer,
+        "is_correct": is_correct,
+        "time_spent_seconds": time_spent_seconds,
+        "certification_id": session.certification_id,
+        "topic": topic_key(payload.get("topic")),
+        "position": position,
+        "first_ease": first_ease,
+        "first_interval": first_interval,
+        # Naive UTC like every other timestamp the app writes
+        "answered_at": datetime.utcnow(),
+    })).one()
+    await db.commit()
+    
+    # Keep the loaded session in step with the row without marking it dirty
+    set_committed_value(session, "correct_answers", row.correct_answers)
+    set_committed_value(session, "current_question_index", row.current_question_index)
+    adaptive_sampler.record_answers(session.certification_id, [{
+        "question_id": question_id,
+        "answered": row.answered_delta,
+        "correct": row.correct_delta,
+        "answered_at": row.answered_at,
+    }])
+    await invalidate_topics_cache(session.certification_id)
+    
+    return {
+        "question_id": question_id,
+        "user_answer": user_answer,
+        "is_correct": is_correct,
+        "correct_answer": payload["correct_answer"],
+        "explanation": payload["explanation"],
+    }
+
+
+async def store_graded_answers(
+    db: AsyncSession,
+    session: QuizSession,
+    graded: Dict[uuid.UUID, Dict[str, Any]]
+) -> Tuple[int, int]:
+    """Write graded answers with one multi-row upsert and apply topic and question deltas.
+    
+    ``graded`` maps question IDs to ``user_answer``, ``is_correct``,
+    ``answered_at``, ``time_spent_seconds`` and ``topic``. Counters are
+    adjusted by the difference with answers already stored, so replaying the
+    same answers is harmless. Answers to questions outside the session are
+    skipped. Does not commit; returns the change in correct answers and the
+    furthest answered position in the session.
+    """
+    await lock_session_row(db, session)
+    positions = await get_session_positions(db, session.id, list(graded))
+    graded = {qid: item for qid, item in graded.items() if qid in positions}
+    if not graded:
+        return 0, -1
+    question_ids = list(graded)
+    previous_result = await db.execute(
+        select(SessionAnswer.question_id, SessionAnswer.is_correct)
         .where(
             and_(
                 SessionAnswer.session_id == session.id,
-                SessionAnswer.question_id == question_id
+                SessionAnswer.question_id.in_(question_ids)
             )
         )
     )
-    existing_answer = existing.scalar_one_or_none()
-    
-    if existing_answer:
-        # Update existing answer
-        existing_answer.user_answer = user_answer
-        existing_answer.is_correct = check_answer_correct(user_answer, question.correct_answer)
-        existing_answer.answered_at = datetime.utcnow()
-        existing_answer.time_spent_seconds = time_spent_seconds
-        answer = existing_answer
-    else:
-        # Create new answer
-        is_correct = check_answer_correct(user_answer, question.correct_answer)
-        
-        answer = SessionAnswer(
-            session_id=session.id,
-            question_id=question_id,
-            user_answer=user_answer,
-            is_correct=is_correct,
-            time_spent_seconds=time_spent_seconds
-        )
-        db.add(answer)
-        
-        # Update session stats
-        if is_correct:
-            session.correct_answers += 1
-    
-    # Update current question index
-    question_ids = [uuid.UUID(qid) for qid in session.question_ids]
-    try:
-        current_idx = question_ids.index(question_id)
-        session.current_question_index = current_idx + 1
-    except ValueError:
-        pass
+    previous = {row.question_id: bool(row.is_correct) for row in previous_result}
+    
+    rows = []
+    topic_deltas: Dict[str, List[int]] = {}
+    question_deltas = []
+    correct_delta = 0
+    for qid, item in graded.items():
+        rows.append({
+            "id": uuid.uuid4(),
+            "session_id": session.id,
+            "question_id": qid,
+            "user_answer": item["user_answer"],
+            "is_correct": item["is_correct"],
+            "answered_at": item["answered_at"],
+            "time_spent_seconds": item.get("time_spent_seconds"),
+        })
+        delta = int(item["is_correct"]) - int(previous.get(qid, False))
+        correct_delta += delta
+        topic = topic_deltas.setdefault(topic_key(item.get("topic")), [0, 0])
+        topic[0] += 0 if qid in previous else 1
+        topic[1] += delta
+        question_deltas.append({
+            "question_id": qid,
+            "answered": 0 if qid in previous else 1,
+            "correct": delta,
+            "is_correct": item["is_correct"],
+            "answered_at": item["answered_at"],
+        })
+    
+    stmt = pg_insert(SessionAnswer).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SessionAnswer.session_id, SessionAnswer.question_id],
+        set_={
+            "user_answer": stmt.excluded.user_answer,
+            "is_correct": stmt.excluded.is_correct,
+            "answered_at": stmt.excluded.answered_at,
+            "time_spent_seconds": stmt.excluded.time_spent_seconds,
+        }
+    )
+    await db.execute(stmt)
+    
+    await record_topic_answers(
+        db, session.certification_id,
+        {topic: (answered, correct) for topic, (answered, correct) in topic_deltas.items()}
+    )
+    await record_question_answers(db, session.certification_id, question_deltas)
+    # Applied before the caller commits; a rolled back batch only skews the
+    # in-memory weights until the index is next reloaded
+    adaptive_sampler.record_answers(session.certification_id, question_deltas)
+    
+    return correct_delta, max(positions[qid] for qid in question_ids)
+
+
+async def submit_answers_batch(
+    db: AsyncSession,
+    session: QuizSession,
+    answers: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Grade and store many answers for a session in one transaction.
+    
+    Answers are graded in memory against cached answer keys and written with
+    a single multi-row upsert; session and topic counters are adjusted by
+    the difference with any earlier answers to the same questions. When a
+    question appears twice in the batch the last answer wins.
+    """
+    latest: Dict[uuid.UUID, Dict[str, Any]] = {}
+    for item in answers:
+        latest[item["question_id"]] = item
+    
+    payloads = await get_question_payloads(db, list(latest))
+    missing = [str(qid) for qid in latest if qid not in payloads]
+    if missing:
+        raise ValueError(f"Questions not found: {', '.join(missing)}")
+    positions = await get_session_positions(db, session.id, list(latest))
+    outside = [str(qid) for qid in latest if qid not in positions]
+    if outside:
+        raise ValueError(f"Questions not part of this session: {', '.join(outside)}")
+    
+    now = datetime.utcnow()
+    graded = {}
+    results = []
+    for qid, item in latest.items():
+        payload = payloads[qid]
+        is_correct = grade_answer(item["user_answer"], payload)
+        graded[qid] = {
+            "user_answer": item["user_answer"],
+            "is_correct": is_correct,
+            "answered_at": now,
+            "time_spent_seconds": item.get("time_spent_seconds"),
+            "topic": payload.get("topic"),
+        }
+        results.append({
+            "question_id": qid,
+            "user_answer": item["user_answer"],
+            "is_correct": is_correct,
+            "correct_answer": payload["correct_answer"],
+            "explanation": payload["explanation"],
+        })
+    
+    correct_delta, furthest = await store_graded_answers(db, session, graded)
+    
+    # Advance past the furthest answered question
+    session.correct_answers = max(0, session.correct_answers + correct_delta)
+    session.current_question_index = max(session.current_question_index, furthest + 1)
     
     await db.commit()
-    await db.refresh(answer)
+    await invalidate_topics_cache(session.certification_id)
+    
+    return {
+        "session_id": session.id,
+        "answered": len(results),
+        "correct": sum(1 for r in results if r["is_correct"]),
+        "correct_answers": session.correct_answers,
+        "results": results,
+    }
+
+
+async def ensure_explanation(db: AsyncSession, question: Question) -> str:
+    """Return a question's explanation, generating and storing it on first use.
     
-    return answer
+    Questions ingested with deferred explanations have an empty explanation
+    until the background phase reaches them. The LLM call shares the
+    dispatcher's capacity as a low-priority on-demand job.
+    """
+    if question.explanation:
+        return question.explanation
+    
+    from certifications.tasks import generate_explanation
+    explanation = await generate_explanation(
+        question.question_text, list(question.options), question.correct_answer
+    )
+    if explanation:
+        question.explanation = explanation
+        await db.commit()
+        await invalidate_question_payloads([question.id])
+    
+    return question.explanation
 
 
 async def complete_session(db: AsyncSession, session: QuizSession) -> QuizSession:
@@ -500,6 +891,7 @@ async def complete_session(db: AsyncSession, session: QuizSession) -> QuizSessio
     
     await db.commit()
     await db.refresh(session)
+    await invalidate_suggestions_cache(session.certification_id)
     
     # Trigger analytics recalculation
     from analytics.services import refresh_analytics
@@ -557,95 +949,124 @@ async def build_session_results(db: AsyncSession, session: QuizSession):
     )
 
 
+def suggestion_inputs_query(certification_id: uuid.UUID, threshold: float = 60.0):
+    """Build the single statement that reads every suggestion input.
+    
+    Returns one row with the weak topics (accuracy below ``threshold`` in
+    topic_stats) and their question count, the latest in-progress session,
+    the bookmark count and the total question count.
+    """
+    weak_topics = (
+        select(TopicStats.topic)
+        .where(
+            and_(
+                TopicStats.certification_id == certification_id,
+                TopicStats.topic != "",
+                TopicStats.answered > 0,
+                TopicStats.correct * 100 < threshold * TopicStats.answered
+            )
+        )
+        .cte("weak_topics")
+    )
+    incomplete_session = (
+        select(QuizSession.id, QuizSession.total_questions, QuizSession.current_question_index)
+        .where(
+            and_(
+                QuizSession.certification_id == certification_id,
+                QuizSession.status == "in_progress"
+            )
+        )
+        .order_by(QuizSession.started_at.desc())
+        .limit(1)
+        .cte("incomplete_session")
+    )
+    
+    return select(
+        select(func.array_agg(aggregate_order_by(weak_topics.c.topic, weak_topics.c.topic)))
+        .scalar_subquery().label("weak_topics"),
+        select(func.count())
+        .select_from(Question)
+        .where(
+            and_(
+                Question.certification_id == certification_id,
+                Question.topic.in_(select(weak_topics.c.topic))
+            )
+        )
+        .scalar_subquery().label("weak_count"),
+        select(incomplete_session.c.id).scalar_subquery().label("session_id"),
+        select(incomplete_session.c.total_questions).scalar_subquery().label("session_total"),
+        select(incomplete_session.c.current_question_index).scalar_subquery().label("session_index"),
+        select(func.count())
+        .select_from(BookmarkedQuestion)
+        .join(Question, BookmarkedQuestion.question_id == Question.id)
+        .where(Question.certification_id == certification_id)
+        .scalar_subquery().label("bookmark_count"),
+        select(func.count())
+        .select_from(Question)
+        .where(Question.certification_id == certification_id)
+        .scalar_subquery().label("total_count"),
+    )
+
+
 async def get_suggestions(
     db: AsyncSession,
     certification_id: uuid.UUID
 ) -> List[QuizSuggestion]:
-    """Get smart study suggestions for a certification."""
+    """Get smart study suggestions for a certification.
+    
+    All inputs are read in one round trip; the result is cached until an
+    answer is submitted, a session starts or completes, a bookmark changes
+    or questions are added.
+    """
+    cache_key = suggestions_cache_key(certification_id)
+    cached = await get_cached(cache_key)
+    if cached is not None:
+        return [QuizSuggestion(**s) for s in cached]
+    
+    row = (await db.execute(suggestion_inputs_query(certification_id))).one()
     suggestions = []
     
     # Check for weak areas
-    weak_topics = await get_weak_topics(db, certification_id)
-    if weak_topics:
-        # Count questions in weak topics
-        result = await db.execute(
-            select(func.count())
-            .select_from(Question)
-            .where(
-                and_(
-                    Question.certification_id == certification_id,
-                    Question.topic.in_(weak_topics)
-                )
-            )
-        )
-        weak_count = result.scalar() or 0
-        
+    if row.weak_topics:
         suggestions.append(QuizSuggestion(
             type="weak_areas",
             title="🎯 Focus on Weak Areas",
             description=f"Practice questions from topics where you scored below 60%",
-            question_count=min(weak_count, 25),
-            data={"topics": weak_topics}
+            question_count=min(row.weak_count, 25),
+            data={"topics": list(row.weak_topics)}
         ))
     
     # Check for incomplete session
-    result = await db.execute(
-        select(QuizSession)
-        .where(
-            and_(
-                QuizSession.certification_id == certification_id,
-                QuizSession.status == "in_progress"
-            )
-        )
-        .order_by(QuizSession.started_at.desc())
-        .limit(1)
-    )
-    incomplete_session = result.scalar_one_or_none()
-    
-    if incomplete_session:
-        remaining = incomplete_session.total_questions - incomplete_session.current_question_index
+    if row.session_id:
+        remaining = row.session_total - row.session_index
         suggestions.append(QuizSuggestion(
             type="continue",
             title="▶️ Continue Where You Left Off",
-            description=f"Resume from question {incomplete_session.current_question_index + 1}",
+            description=f"Resume from question {row.session_index + 1}",
             question_count=remaining,
-            data={"session_id": str(incomplete_session.id)}
+            data={"session_id": str(row.session_id)}
         ))
     
     # Check for bookmarked questions
-    result = await db.execute(
-        select(func.count())
-        .select_from(BookmarkedQuestion)
-        .join(Question, BookmarkedQuestion.question_id == Question.id)
-        .where(Question.certification_id == certification_id)
-    )
-    bookmark_count = result.scalar() or 0
-    
-    if bookmark_count > 0:
+    if row.bookmark_count > 0:
         suggestions.append(QuizSuggestion(
             type="review",
             title="🔖 Review Marked Questions",
-            description=f"Study the {bookmark_count} questions you marked for review",
-            question_count=bookmark_count,
+            description=f"Study the {row.bookmark_count} questions you marked for review",
+            question_count=row.bookmark_count,
             data=None
         ))
     
     # Always add random option
-    result = await db.execute(
-        select(func.count())
-        .select_from(Question)
-        .where(Question.certification_id == certification_id)
-    )
-    total_count = result.scalar() or 0
-    
     suggestions.append(QuizSuggestion(
         type="random",
         title="🎲 Random Practice",
         description="Practice 20 random questions from all topics",
-        question_count=min(total_count, 20),
+        question_count=min(row.total_count, 20),
         data=None
     ))
     
+    await set_cached(cache_key, [s.model_dump() for s in suggestions], ttl=SUGGESTIONS_CACHE_TTL)
     return suggestions
 
 
@@ -672,22 +1093,30 @@ async def add_bookmark(
     await db.commit()
     await db.refresh(bookmark)
     
+    certification_id = await db.scalar(
+        select(Question.certification_id).where(Question.id == question_id)
+    )
+    if certification_id:
+        await invalidate_suggestions_cache(certification_id)
+    
     return bookmark
 
 
 async def remove_bookmark(db: AsyncSession, question_id: uuid.UUID) -> bool:
     """Remove a bookmark for a question."""
     result = await db.execute(
-        select(BookmarkedQuestion)
+        select(BookmarkedQuestion, Question.certification_id)
+        .join(Question, BookmarkedQuestion.question_id == Question.id)
         .where(BookmarkedQuestion.question_id == question_id)
     )
-    bookmark = result.scalar_one_or_none()
+    row = result.one_or_none()
     
-    if not bookmark:
+    if not row:
         return False
     
-    await db.delete(bookmark)
+    await db.delete(row.BookmarkedQuestion)
     await db.commit()
+    await invalidate_suggestions_cache(row.certification_id)
     
     return True
 
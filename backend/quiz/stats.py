@@ -0,0 +1,187 @@
+"""
+Incrementally maintained answer statistics and the caches built on them.
+"""
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Tuple, List, Any
+
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared import cache
+from shared.models import TopicStats, QuestionStats
+
+TOPICS_CACHE_PREFIX = "quiz_topics"
+SUGGESTIONS_CACHE_PREFIX = "quiz_suggestions"
+# Safety net in case an invalidation is missed
+TOPICS_CACHE_TTL = 300
+SUGGESTIONS_CACHE_TTL = 300
+
+
+# SM-2 style review scheduling with pass/fail grading: a failed question is
+# due again right away; passes are due after 1 day, 6 days, then the previous
+# interval times the ease (capped at a year). Ease moves up on passes and
+# down on failures.
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+MAX_EASE = 3.0
+EASE_STEP_CORRECT = 0.1
+EASE_STEP_WRONG = 0.2
+MAX_INTERVAL_DAYS = 365
+
+# Conflict updates of question_stats, shared by record_question_answers and the
+# single-answer statement in quiz.services. The incoming row (EXCLUDED) carries
+# the answer: attempts is 0 when a session changes its answer, which replaces
+# the last result instead of counting as a new attempt.
+_NEW_STREAK = (
+    "CASE WHEN NOT EXCLUDED.last_result THEN 0 "
+    "WHEN EXCLUDED.attempts > 0 THEN question_stats.streak + 1 "
+    "WHEN question_stats.last_result THEN question_stats.streak "
+    "ELSE 1 END"
+)
+_NEW_INTERVAL = (
+    f"CASE WHEN ({_NEW_STREAK}) = 0 THEN 0 "
+    f"WHEN ({_NEW_STREAK}) = 1 THEN 1 "
+    f"WHEN ({_NEW_STREAK}) = 2 THEN 6 "
+    f"ELSE LEAST({MAX_INTERVAL_DAYS}, question_stats.interval_days * question_stats.ease) END"
+)
+_NEW_EASE = (
+    f"CASE WHEN EXCLUDED.last_result THEN LEAST({MAX_EASE}, question_stats.ease + {EASE_STEP_CORRECT}) "
+    f"ELSE GREATEST({MIN_EASE}, question_stats.ease - {EASE_STEP_WRONG}) END"
+)
+# Re-submitting the same result within a session leaves the schedule alone
+_UNCHANGED = (
+    "EXCLUDED.attempts = 0 AND "
+    "question_stats.last_result IS NOT DISTINCT FROM EXCLUDED.last_result"
+)
+QUESTION_STATS_UPDATES: Dict[str, str] = {
+    "attempts": "question_stats.attempts + EXCLUDED.attempts",
+    "correct": "GREATEST(0, question_stats.correct + EXCLUDED.correct)",
+    "last_answered_at": "EXCLUDED.last_answered_at",
+    "last_result": "EXCLUDED.last_result",
+    "streak": _NEW_STREAK,
+    "ease": f"CASE WHEN {_UNCHANGED} THEN question_stats.ease ELSE {_NEW_EASE} END",
+    "interval_days": f"CASE WHEN {_UNCHANGED} THEN question_stats.interval_days ELSE {_NEW_INTERVAL} END",
+    "due_at": (
+        f"CASE WHEN {_UNCHANGED} THEN question_stats.due_at "
+        f"ELSE EXCLUDED.last_answered_at + ({_NEW_INTERVAL}) * INTERVAL '1 day' END"
+    ),
+}
+
+
+def question_stats_set_clause() -> str:
+    """Render ``QUESTION_STATS_UPDATES`` as the SET list of a raw upsert."""
+    return ",\n        ".join(f"{column} = {expression}" for column, expression in QUESTION_STATS_UPDATES.items())
+
+
+def topic_key(topic: Optional[str]) -> str:
+    """Key of a topic in topic_stats (questions without a topic use "")."""
+    return topic or ""
+
+
+def topics_cache_key(certification_id: uuid.UUID) -> str:
+    """Redis key of a certification's cached topic list."""
+    return f"{TOPICS_CACHE_PREFIX}:{certification_id}"
+
+
+def suggestions_cache_key(certification_id: uuid.UUID) -> str:
+    """Redis key of a certification's cached study suggestions."""
+    return f"{SUGGESTIONS_CACHE_PREFIX}:{certification_id}"
+
+
+async def record_topic_answers(
+    db: AsyncSession,
+    certification_id: uuid.UUID,
+    deltas: Dict[str, Tuple[int, int]]
+) -> None:
+    """Apply (answered, correct) deltas for several topics with one multi-row upsert.
+    
+    Runs in the caller's transaction, so counters commit with the answers.
+    """
+    rows = [
+        {
+            "certification_id": certification_id,
+            "topic": topic,
+            "answered": answered,
+            "correct": correct,
+        }
+        for topic, (answered, correct) in deltas.items()
+        if answered or correct
+    ]
+    if not rows:
+        return
+    stmt = pg_insert(TopicStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TopicStats.certification_id, TopicStats.topic],
+        set_={
+            "answered": TopicStats.answered + stmt.excluded.answered,
+            "correct": TopicStats.correct + stmt.excluded.correct,
+            "updated_at": datetime.utcnow(),
+        }
+    )
+    await db.execute(stmt)
+
+
+def first_review(is_correct: bool) -> Tuple[float, float]:
+    """Ease and interval in days after a question's first attempt."""
+    if is_correct:
+        return min(MAX_EASE, INITIAL_EASE + EASE_STEP_CORRECT), 1.0
+    return max(MIN_EASE, INITIAL_EASE - EASE_STEP_WRONG), 0.0
+
+
+async def record_question_answers(
+    db: AsyncSession,
+    certification_id: uuid.UUID,
+    answers: List[Dict[str, Any]]
+) -> None:
+    """Fold answers into question_stats with one multi-row upsert.
+    
+    Each answer has ``question_id``, ``answered`` (1 for a new attempt, 0
+    when a session changes its answer), ``correct`` (the change in correct
+    attempts), ``is_correct`` and ``answered_at``. Runs in the caller's
+    transaction.
+    """
+    if not answers:
+        return
+    rows = []
+    for answer in answers:
+        answered_at = answer.get("answered_at") or datetime.utcnow()
+        ease, interval_days = first_review(answer["is_correct"])
+        rows.append({
+            "question_id": answer["question_id"],
+            "certification_id": certification_id,
+            "attempts": answer["answered"],
+            "correct": answer["correct"],
+            "last_answered_at": answered_at,
+            "last_result": answer["is_correct"],
+            "streak": int(answer["is_correct"]),
+            "ease": ease,
+            "interval_days": interval_days,
+            "due_at": answered_at + timedelta(days=interval_days),
+        })
+    stmt = pg_insert(QuestionStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuestionStats.question_id],
+        set_={column: literal_column(expression) for column, expression in QUESTION_STATS_UPDATES.items()}
+    )
+    await db.execute(stmt)
+
+
+async def invalidate_topics_cache(certification_id: uuid.UUID, client=None) -> None:
+    """Drop a certification's cached topic list and suggestions.
+    
+    Both are built on topic_stats and question counts, so answers and new
+    questions stale them together. Background jobs run their own event loop
+    and pass a client bound to it.
+    """
+    client = client or cache.redis_client
+    if client:
+        await client.delete(topics_cache_key(certification_id), suggestions_cache_key(certification_id))
+
+
+async def invalidate_suggestions_cache(certification_id: uuid.UUID, client=None) -> None:
+    """Drop a certification's cached suggestions, e.g. after session or bookmark changes."""
+    client = client or cache.redis_client
+    if client:
+        await client.delete(suggestions_cache_key(certification_id))
@@ -0,0 +1,77 @@
+"""
+Helpers for parsing answer letters out of answer and option strings and
+detecting multi-select questions.
+"""
+import re
+from typing import List, Dict, Any
+
+
+def extract_answer_letters(answer: str) -> set[str]:
+    """Extract answer letters from an answer string.
+    Handles formats like 'B', 'A,C', 'A, C', 'A. Foo, C. Bar', 'AC',
+    'A. Foo\\nC. Bar', 'A. Foo and C. Bar'."""
+    # Split by comma, newline, or ' and '
+    parts = re.split(r'[,\n]| and ', answer)
+    letters = set()
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        m = re.match(r'^([A-Za-z])(?:\.|\b)', part)
+        if m:
+            letters.add(m.group(1).upper())
+    if letters:
+        return letters
+    # Fallback: consecutive uppercase letters (e.g. "AC")
+    stripped = answer.strip().upper()
+    if stripped.isalpha() and len(stripped) <= 6:
+        return set(stripped)
+    # Last resort: first character
+    if stripped:
+        return {stripped[0]}
+    return set()
+
+
+def extract_option_letters(options: List[str]) -> set[str]:
+    """Extract the letter labels of options like 'A. Foo' or '(B) Bar'."""
+    letters = set()
+    for option in options:
+        m = re.match(r'^\s*\(?([A-Za-z])[\.\):]', str(option))
+        if m:
+            letters.add(m.group(1).upper())
+    return letters
+
+
+# Question wording that asks for more than one answer
+MULTI_SELECT_PATTERNS = [
+    r'choose\s+(two|three|four|five|2|3|4|5)',
+    r'select\s+(two|three|four|five|2|3|4|5)',
+    r'select\s+all\s+that\s+apply',
+    r'choose\s+all\s+that\s+apply',
+    r'pick\s+(two|three|four|five|2|3|4|5)',
+    r'\(choose\s+\d+\)',
+    r'\(select\s+\d+\)',
+]
+
+
+def is_multi_select_question(question_text: str, correct_answer: str) -> bool:
+    """Detect if a question requires multiple answers."""
+    text_lower = question_text.lower()
+    # Check question text for multi-select indicators
+    for pattern in MULTI_SELECT_PATTERNS:
+        if re.search(pattern, text_lower):
+            return True
+    # Check correct_answer for multiple letters
+    letters = re.findall(r'(?:^|,\s*)([A-Za-z])(?:\.|\b)', correct_answer)
+    return len(letters) > 1
+
+
+def answer_metadata(question_text: str, correct_answer: str) -> Dict[str, Any]:
+    """Precompute the answer columns stored on a question at ingestion.
+    
+    ``correct_letters`` holds the sorted correct-answer letters (e.g. "AC").
+    """
+    return {
+        "correct_letters": "".join(sorted(extract_answer_letters(correct_answer))),
+        "is_multi_select": is_multi_select_question(question_text, correct_answer),
+    }
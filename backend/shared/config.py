@@ -26,7 +26,47 @@ class Settings(BaseSettings):
     cors_origins: str = "http://localhost:3000"
     
     # LLM Settings
-    llm_provider: str = "openai"  # or "gemini"
+    llm_provider: str = "openai"  # "gemini", or "local" for any OpenAI-compatible server
+    
+    # Local OpenAI-compatible backend (e.g. a llama.cpp server on the same host)
+    llm_local_base_url: str = "http://localhost:8080/v1"
+    llm_local_model: str = "local-model"
+    llm_local_api_key: str = "not-needed"
+    llm_local_max_concurrency: int = 2
+    llm_local_timeout: int = 300
+    
+    # Tiered model routing: try the fast model first, escalate on validation failure
+    llm_tiered_routing: bool = False
+    llm_fast_model: str = ""  # defaults to the provider's fast tier
+    llm_strong_model: str = ""  # defaults to the provider's strong tier
+    
+    # Shared LLM capacity across concurrent ingestion jobs
+    llm_max_concurrency: int = 8  # concurrent calls allowed by the provider
+    llm_job_window: int = 4  # blocks a single job keeps in flight
+    
+    # LLM record/replay for reproducible ingestion runs
+    llm_archive_mode: str = "off"  # "off", "record" or "replay"
+    llm_archive_path: str = ""  # defaults to {data_path}/llm_archive.jsonl
+    llm_replay_latency_scale: float = 0.0  # 1.0 replays recorded latency, 0 serves instantly
+    
+    # Two-phase ingestion: extract questions first, generate explanations afterwards
+    llm_deferred_explanations: bool = False
+    
+    # Strip headers, footers and page numbers repeated across PDF pages
+    boilerplate_stripping_enabled: bool = True
+    
+    # Blocks scoring below this are skipped before any LLM call (0 disables the prefilter)
+    question_prefilter_threshold: float = 0.35
+    
+    # Serialized question payload cache (Redis plus in-process LRU)
+    question_payload_cache_ttl: int = 7 * 24 * 3600  # Redis TTL in seconds
+    question_payload_lru_size: int = 5000  # payloads kept per process
+    question_payload_lru_ttl: int = 300  # seconds before re-checking Redis
+    
+    # Live session state in Redis, written behind to Postgres
+    live_sessions_enabled: bool = False
+    live_session_flush_interval: int = 30  # seconds between write-behind passes
+    live_session_idle_timeout: int = 900  # seconds before an idle session leaves Redis
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -34,7 +34,8 @@ async def init_db():
     """Initialize database tables."""
     from shared.models import (
         Certification, Question, QuestionImage,
-        QuizSession, SessionAnswer, BookmarkedQuestion, AnalyticsCache
+        QuizSession, SessionAnswer, BookmarkedQuestion, AnalyticsCache,
+        TopicStats, SessionQuestion, QuestionStats
     )
     
     async with engine.begin() as conn:
@@ -42,6 +43,9 @@ async def init_db():
         await conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
+        # Add columns introduced after tables were first created
+        from shared.migrations import run_migrations
+        await run_migrations(conn)
 
 
 async def get_db() -> AsyncSession:
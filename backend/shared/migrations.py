@@ -0,0 +1,204 @@
+"""
+Idempotent schema migrations applied at startup after ``create_all``.
+
+``create_all`` only creates missing tables, so columns added to existing
+tables are declared here with ``IF NOT EXISTS`` together with any backfill.
+"""
+import uuid
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from shared.answers import answer_metadata
+
+# Rows updated per backfill round trip
+BACKFILL_BATCH_SIZE = 1000
+
+# Review interval approximated from the correct streak (1 day, 6 days, then
+# growing by the default ease, capped at a year) for stats built from history
+SCHEDULE_INTERVAL_SQL = (
+    "CASE WHEN streak = 0 THEN 0 WHEN streak = 1 THEN 1 "
+    "ELSE LEAST(365, 6 * power(2.5, streak - 2)) END"
+)
+
+MIGRATIONS: List[str] = [
+    # Answer metadata precomputed at ingestion
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS correct_letters VARCHAR(16)",
+    "ALTER TABLE questions ADD COLUMN IF NOT EXISTS is_multi_select BOOLEAN NOT NULL DEFAULT false",
+    # One answer per question and session (required by answer upserts); keep the latest duplicate
+    "DELETE FROM session_answers a USING session_answers b "
+    "WHERE a.session_id = b.session_id AND a.question_id = b.question_id "
+    "AND (a.answered_at, a.id) < (b.answered_at, b.id) "
+    "AND NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_answers_session_question')",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_answers_session_question "
+    "ON session_answers (session_id, question_id)",
+    # Spaced-repetition schedule per question
+    "ALTER TABLE question_stats ADD COLUMN IF NOT EXISTS ease DOUBLE PRECISION NOT NULL DEFAULT 2.5",
+    "ALTER TABLE question_stats ADD COLUMN IF NOT EXISTS interval_days DOUBLE PRECISION NOT NULL DEFAULT 0",
+    "ALTER TABLE question_stats ADD COLUMN IF NOT EXISTS due_at TIMESTAMP",
+    "CREATE INDEX IF NOT EXISTS idx_question_stats_due ON question_stats (certification_id, due_at)",
+    f"UPDATE question_stats SET interval_days = {SCHEDULE_INTERVAL_SQL}, "
+    f"due_at = last_answered_at + {SCHEDULE_INTERVAL_SQL} * INTERVAL '1 day' "
+    "WHERE due_at IS NULL AND last_answered_at IS NOT NULL",
+]
+
+
+async def backfill_answer_metadata(conn: AsyncConnection) -> int:
+    """Fill correct_letters / is_multi_select for questions ingested before they existed."""
+    updated = 0
+    while True:
+        result = await conn.execute(
+            text(
+                "SELECT id, question_text, correct_answer FROM questions "
+                "WHERE correct_letters IS NULL LIMIT :limit"
+            ),
+            {"limit": BACKFILL_BATCH_SIZE}
+        )
+        rows = result.all()
+        if not rows:
+            break
+        await conn.execute(
+            text(
+                "UPDATE questions SET correct_letters = :correct_letters, "
+                "is_multi_select = :is_multi_select WHERE id = :id"
+            ),
+            [{"id": row.id, **answer_metadata(row.question_text, row.correct_answer)} for row in rows]
+        )
+        updated += len(rows)
+    return updated
+
+
+def _certification_filter(column: str, certification_id: Optional[uuid.UUID]) -> str:
+    return f"AND {column} = :certification_id " if certification_id else ""
+
+
+async def rebuild_question_stats(conn: AsyncConnection, certification_id: Optional[uuid.UUID] = None) -> int:
+    """Recompute question_stats from answer history, for one or all certifications.
+    
+    The streak counts the answers after the question's last incorrect one;
+    the review schedule is approximated from it with the default ease.
+    """
+    params = {"certification_id": certification_id} if certification_id else {}
+    await conn.execute(text(
+        "DELETE FROM question_stats WHERE true "
+        + _certification_filter("certification_id", certification_id)
+    ), params)
+    result = await conn.execute(text(
+        "INSERT INTO question_stats "
+        "(question_id, certification_id, attempts, correct, last_answered_at, last_result, streak) "
+        "SELECT sa.question_id, q.certification_id, COUNT(*), COUNT(*) FILTER (WHERE sa.is_correct), "
+        "MAX(sa.answered_at), (array_agg(sa.is_correct ORDER BY sa.answered_at DESC))[1], "
+        "COUNT(*) FILTER (WHERE sa.answered_at > COALESCE(last_wrong.at, '-infinity')) "
+        "FROM session_answers sa "
+        "JOIN questions q ON q.id = sa.question_id "
+        "LEFT JOIN ("
+        "  SELECT question_id, MAX(answered_at) AS at FROM session_answers "
+        "  WHERE is_correct = false GROUP BY question_id"
+        ") last_wrong ON last_wrong.question_id = sa.question_id "
+        "WHERE sa.is_correct IS NOT NULL "
+        + _certification_filter("q.certification_id", certification_id)
+        + "GROUP BY sa.question_id, q.certification_id"
+    ), params)
+    await conn.execute(text(
+        f"UPDATE question_stats SET interval_days = {SCHEDULE_INTERVAL_SQL}, "
+        f"due_at = last_answered_at + {SCHEDULE_INTERVAL_SQL} * INTERVAL '1 day' "
+        "WHERE true " + _certification_filter("certification_id", certification_id)
+    ), params)
+    return result.rowcount or 0
+
+
+async def rebuild_topic_stats(conn: AsyncConnection, certification_id: Optional[uuid.UUID] = None) -> int:
+    """Recompute topic_stats from question_stats, for one or all certifications."""
+    params = {"certification_id": certification_id} if certification_id else {}
+    await conn.execute(text(
+        "DELETE FROM topic_stats WHERE true "
+        + _certification_filter("certification_id", certification_id)
+    ), params)
+    result = await conn.execute(text(
+        "INSERT INTO topic_stats (certification_id, topic, answered, correct, updated_at) "
+        "SELECT qs.certification_id, COALESCE(q.topic, ''), SUM(qs.attempts), SUM(qs.correct), timezone('utc', now()) "
+        "FROM question_stats qs JOIN questions q ON q.id = qs.question_id "
+        "WHERE true "
+        + _certification_filter("qs.certification_id", certification_id)
+        + "GROUP BY qs.certification_id, COALESCE(q.topic, '')"
+    ), params)
+    return result.rowcount or 0
+
+
+async def backfill_answer_stats(conn: AsyncConnection) -> Tuple[int, int]:
+    """Seed question_stats and topic_stats from existing answers the first time they are used."""
+    has_answers = await conn.scalar(text("SELECT EXISTS (SELECT 1 FROM session_answers)"))
+    if not has_answers:
+        return 0, 0
+    questions = topics = 0
+    if not await conn.scalar(text("SELECT EXISTS (SELECT 1 FROM question_stats)")):
+        questions = await rebuild_question_stats(conn)
+    if not await conn.scalar(text("SELECT EXISTS (SELECT 1 FROM topic_stats)")):
+        topics = await rebuild_topic_stats(conn)
+    return questions, topics
+
+
+async def migrate_session_questions(conn: AsyncConnection) -> int:
+    """Move session membership from the quiz_sessions.question_ids JSONB array to session_questions.
+    
+    Duplicate and since-deleted questions are dropped and positions renumbered
+    so they stay contiguous, with total_questions set to the rows kept; the
+    column is dropped once copied.
+    """
+    exists = await conn.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = 'quiz_sessions' AND column_name = 'question_ids')"
+    ))
+    if not exists:
+        return 0
+    result = await conn.execute(text(
+        "INSERT INTO session_questions (session_id, position, question_id) "
+        "SELECT session_id, ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY ord) - 1, question_id "
+        "FROM ("
+        "  SELECT DISTINCT ON (s.id, q.id) s.id AS session_id, q.id AS question_id, e.ord "
+        "  FROM quiz_sessions s "
+        "  CROSS JOIN LATERAL jsonb_array_elements_text(s.question_ids) WITH ORDINALITY AS e(value, ord) "
+        "  JOIN questions q ON q.id = e.value::uuid "
+        "  ORDER BY s.id, q.id, e.ord"
+        ") members "
+        "ON CONFLICT DO NOTHING"
+    ))
+    # Dropped questions shrink sessions; keep counts and cursors in range
+    await conn.execute(text(
+        "UPDATE quiz_sessions s SET "
+        "total_questions = m.members, "
+        "current_question_index = LEAST(s.current_question_index, m.members) "
+        "FROM ("
+        "  SELECT s2.id, COUNT(sq.position) AS members "
+        "  FROM quiz_sessions s2 "
+        "  LEFT JOIN session_questions sq ON sq.session_id = s2.id "
+        "  WHERE s2.question_ids IS NOT NULL "
+        "  GROUP BY s2.id"
+        ") m "
+        "WHERE s.id = m.id AND s.total_questions IS DISTINCT FROM m.members"
+    ))
+    await conn.execute(text("ALTER TABLE quiz_sessions DROP COLUMN question_ids"))
+    return result.rowcount or 0
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    """Apply column migrations and backfills."""
+    for statement in MIGRATIONS:
+        await conn.execute(text(statement))
+    
+    backfilled = await backfill_answer_metadata(conn)
+    if backfilled:
+        print(f"[MIGRATION] Backfilled answer metadata for {backfilled} questions", flush=True)
+    
+    seeded_questions, seeded_topics = await backfill_answer_stats(conn)
+    if seeded_questions or seeded_topics:
+        print(
+            f"[MIGRATION] Seeded answer stats for {seeded_questions} questions "
+            f"and {seeded_topics} topics",
+            flush=True
+        )
+    
+    moved = await migrate_session_questions(conn)
+    if moved:
+        print(f"[MIGRATION] Moved {moved} session questions to session_questions", flush=True)
@@ -5,7 +5,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 from sqlalchemy import (
-    String, Text, Integer, Boolean, DateTime, ForeignKey, Index, JSON
+    String, Text, Integer, Float, Boolean, DateTime, ForeignKey, Index, JSON
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -45,6 +45,14 @@ class Certification(Base):
         "AnalyticsCache", back_populates="certification", cascade="all, delete-orphan"
     )
     
+    @property
+    def quizzable(self) -> bool:
+        """Whether questions can already be studied (possibly while still processing)."""
+        return (
+            self.processing_status in ("processing", "paused", "completed", "cancelled")
+            and (self.total_questions or 0) > 0
+        )
+    
     __table_args__ = (
         Index("idx_certifications_slug", "slug"),
         Index("idx_certifications_status", "processing_status"),
@@ -65,6 +73,9 @@ class Question(Base):
     question_text: Mapped[str] = mapped_column(Text, nullable=False)
     options: Mapped[dict] = mapped_column(JSONB, nullable=False)
     correct_answer: Mapped[str] = mapped_column(Text, nullable=False)
+    # Precomputed from correct_answer at ingestion (see shared.answers.answer_metadata)
+    correct_letters: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    is_multi_select: Mapped[bool] = mapped_column(Boolean, default=False)
     explanation: Mapped[str] = mapped_column(Text, nullable=False)
     has_images: Mapped[bool] = mapped_column(Boolean, default=False)
     topic: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
@@ -134,7 +145,6 @@ class QuizSession(Base):
     correct_answers: Mapped[int] = mapped_column(Integer, default=0)
     status: Mapped[str] = mapped_column(String(50), default="in_progress")
     current_question_index: Mapped[int] = mapped_column(Integer, default=0)
-    question_ids: Mapped[dict] = mapped_column(JSONB, default=list)
     
     # Relationships
     certification: Mapped["Certification"] = relationship(
@@ -151,6 +161,24 @@ class QuizSession(Base):
     )
 
 
+class SessionQuestion(Base):
+    """Ordered membership of questions in a quiz session."""
+    __tablename__ = "session_questions"
+    
+    session_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("quiz_sessions.id", ondelete="CASCADE"), primary_key=True
+    )
+    # 0-based, contiguous; matches QuizSession.current_question_index
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    question_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False
+    )
+    
+    __table_args__ = (
+        Index("idx_session_questions_question", "session_id", "question_id", unique=True),
+    )
+
+
 class SessionAnswer(Base):
     """Individual answers within a quiz session."""
     __tablename__ = "session_answers"
@@ -175,6 +203,7 @@ class SessionAnswer(Base):
     
     __table_args__ = (
         Index("idx_answers_session", "session_id"),
+        Index("idx_answers_session_question", "session_id", "question_id", unique=True),
         Index("idx_answers_question", "question_id"),
         Index("idx_answers_correct", "is_correct"),
     )
@@ -201,6 +230,50 @@ class BookmarkedQuestion(Base):
     )
 
 
+class TopicStats(Base):
+    """Answer counters per certification topic, maintained as answers are submitted."""
+    __tablename__ = "topic_stats"
+    
+    certification_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("certifications.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Empty string for questions without a topic
+    topic: Mapped[str] = mapped_column(String(200), primary_key=True)
+    answered: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    correct: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class QuestionStats(Base):
+    """Answer history summary per question, maintained as answers are submitted."""
+    __tablename__ = "question_stats"
+    
+    question_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True
+    )
+    certification_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("certifications.id", ondelete="CASCADE"), nullable=False
+    )
+    # One attempt per session that answered the question
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    correct: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_answered_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_result: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+    # Consecutive correct attempts up to the last one
+    streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Spaced-repetition schedule (see quiz.stats)
+    ease: Mapped[float] = mapped_column(Float, default=2.5, nullable=False)
+    interval_days: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    due_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("idx_question_stats_cert", "certification_id"),
+        Index("idx_question_stats_due", "certification_id", "due_at"),
+    )
+
+
 class AnalyticsCache(Base):
     """Pre-calculated analytics metrics."""
     __tablename__ = "analytics_cache"
@@ -0,0 +1,191 @@
+"""
+Serialized question payload cache: an in-process LRU in front of Redis.
+
+Question content does not change after ingestion except for explanations
+generated later, which invalidate the entry. Per-user state (bookmarks,
+answers) is never cached here and is merged in by the caller.
+"""
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from shared import cache
+from shared.config import settings
+from shared.database import async_session
+from shared.models import Question, QuestionImage
+
+QUESTION_PAYLOAD_PREFIX = "question_payload"
+
+
+def question_payload_key(question_id) -> str:
+    """Redis key of a question payload."""
+    return f"{QUESTION_PAYLOAD_PREFIX}:{question_id}"
+
+
+def build_question_payload(
+    question: Question,
+    images: Optional[Iterable[QuestionImage]] = None
+) -> Dict[str, Any]:
+    """Serialize a question's content.
+    
+    ``images`` defaults to ``question.images``, which must then be loaded.
+    """
+    if images is None:
+        images = question.images
+    return {
+        "id": str(question.id),
+        "question_number": question.question_number,
+        "question_text": question.question_text,
+        "options": question.options if isinstance(question.options, list) else list(question.options),
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation,
+        "has_images": question.has_images,
+        "topic": question.topic,
+        "is_multi_select": bool(question.is_multi_select),
+        "correct_letters": question.correct_letters,
+        "images": [
+            {
+                "id": str(img.id),
+                "image_path": img.image_path,
+                "image_order": img.image_order,
+                "position_in_pdf": img.position_in_pdf,
+                "width": img.width,
+                "height": img.height
+            }
+            for img in images
+        ],
+    }
+
+
+class PayloadLRU:
+    """Thread-safe LRU of payloads with a per-entry TTL.
+    
+    The TTL bounds how long another worker's invalidation can go unnoticed.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, payload = entry
+            if time.monotonic() - stored_at > settings.question_payload_lru_ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+    
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.question_payload_lru_size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# Shared by request handlers and ingestion threads in this process
+payload_lru = PayloadLRU()
+
+
+async def store_question_payloads(payloads: List[Dict[str, Any]], client=None) -> None:
+    """Write payloads to the LRU and Redis.
+    
+    Background jobs run their own event loop and pass a client bound to it.
+    """
+    if not payloads:
+        return
+    for payload in payloads:
+        payload_lru.put(payload["id"], payload)
+    
+    client = client or cache.redis_client
+    if not client:
+        return
+    async with client.pipeline(transaction=False) as pipe:
+        for payload in payloads:
+            pipe.set(
+                question_payload_key(payload["id"]),
+                json.dumps(payload),
+                ex=settings.question_payload_cache_ttl
+            )
+        await pipe.execute()
+
+
+async def invalidate_question_payloads(question_ids: Iterable[uuid.UUID], client=None) -> None:
+    """Drop cached payloads after question content changed."""
+    ids = [str(qid) for qid in question_ids]
+    if not ids:
+        return
+    for qid in ids:
+        payload_lru.discard(qid)
+    
+    client = client or cache.redis_client
+    if client:
+        await client.delete(*(question_payload_key(qid) for qid in ids))
+
+
+async def get_question_payloads(
+    db: AsyncSession,
+    question_ids: List[uuid.UUID]
+) -> Dict[uuid.UUID, Dict[str, Any]]:
+    """Get payloads by question ID from the LRU, then Redis, then the database.
+    
+    Questions that no longer exist are missing from the result.
+    """
+    found: Dict[uuid.UUID, Dict[str, Any]] = {}
+    missing: List[uuid.UUID] = []
+    for qid in question_ids:
+        payload = payload_lru.get(str(qid))
+        if payload is not None:
+            found[qid] = payload
+        else:
+            missing.append(qid)
+    
+    client = cache.redis_client
+    if missing and client:
+        values = await client.mget([question_payload_key(qid) for qid in missing])
+        still_missing = []
+        for qid, value in zip(missing, values):
+            if value:
+                payload = json.loads(value)
+                payload_lru.put(str(qid), payload)
+                found[qid] = payload
+            else:
+                still_missing.append(qid)
+        missing = still_missing
+    
+    if missing:
+        result = await db.execute(
+            select(Question)
+            .options(selectinload(Question.images))
+            .where(Question.id.in_(missing))
+        )
+        payloads = [build_question_payload(q) for q in result.scalars().all()]
+        await store_question_payloads(payloads)
+        for payload in payloads:
+            found[uuid.UUID(payload["id"])] = payload
+    
+    return found
+
+
+async def warm_question_payloads(question_ids: List[uuid.UUID]) -> None:
+    """Load payloads into the caches ahead of use, with a session of its own.
+    
+    Meant to run after a response has been sent.
+    """
+    async with async_session() as db:
+        await get_question_payloads(db, question_ids)
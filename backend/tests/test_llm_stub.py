@@ -0,0 +1,82 @@
+"""
+End-to-end LLM calls against the bundled OpenAI-compatible stub server.
+"""
+import time
+import asyncio
+
+import pytest
+
+from shared.config import settings
+from certifications.llm_stub_server import start_stub_server
+from certifications.tasks import parse_question_with_llm, generate_explanation
+
+BLOCK = """Question 7
+Which storage layer adds ACID transactions to a data lake?
+A. Delta Lake
+B. CSV files
+C. A message queue
+D. An in-memory cache"""
+
+
+@pytest.fixture
+def stub_provider(monkeypatch):
+    """Point the ``local`` provider at a stub server for the test."""
+    server = start_stub_server(port=0)
+    host, port = server.server_address[:2]
+    monkeypatch.setattr(settings, "llm_provider", "local")
+    monkeypatch.setattr(settings, "llm_local_base_url", f"http://{host}:{port}/v1")
+    monkeypatch.setattr(settings, "llm_archive_mode", "off")
+    monkeypatch.setattr(settings, "llm_tiered_routing", False)
+    monkeypatch.setattr(settings, "llm_local_timeout", 10)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_question_with_llm(stub_provider):
+    result = asyncio.run(parse_question_with_llm(BLOCK, existing_topics=["Delta Lake"]))
+
+    assert result is not None
+    assert "Which storage layer" in result["question"]
+    assert result["options"] == [
+        "A. Delta Lake", "B. CSV files", "C. A message queue", "D. An in-memory cache",
+    ]
+    assert result["correct_answer"] == "A. Delta Lake"
+    assert result["explanation"] == "Stub explanation."
+
+
+def test_parse_question_without_explanation(stub_provider):
+    result = asyncio.run(parse_question_with_llm(BLOCK, include_explanation=False))
+
+    assert result is not None
+    assert result["correct_answer"] == "A. Delta Lake"
+    assert result["explanation"] == ""
+
+
+def test_generate_explanation(stub_provider):
+    explanation = asyncio.run(generate_explanation(
+        "Which storage layer adds ACID transactions to a data lake?",
+        ["A. Delta Lake", "B. CSV files"],
+        "A. Delta Lake",
+    ))
+
+    assert explanation == "Stub explanation."
+
+
+def test_client_timeout_ends_slow_calls(stub_provider, monkeypatch):
+    slow = start_stub_server(port=0, latency_ms=3000)
+    host, port = slow.server_address[:2]
+    monkeypatch.setattr(settings, "llm_local_base_url", f"http://{host}:{port}/v1")
+    monkeypatch.setattr(settings, "llm_local_timeout", 1)
+    try:
+        started = time.perf_counter()
+        explanation = asyncio.run(generate_explanation("Slow question?", ["A. Yes", "B. No"], "A. Yes"))
+        elapsed = time.perf_counter() - started
+    finally:
+        slow.shutdown()
+        slow.server_close()
+
+    # The client gave up at its own timeout instead of leaving the request
+    # running in a worker thread
+    assert explanation is None
+    assert elapsed < 2.5
@@ -0,0 +1,36 @@
+"""
+Quality floors for the local preprocessing stages, measured on their labeled
+fixture sets.
+"""
+from shared.config import settings
+from certifications.preprocessing import (
+    evaluate_prefilter, load_prefilter_fixtures, evaluate_boilerplate, load_boilerplate_fixtures,
+)
+
+# A dropped question is lost for good while a kept non-question only costs an
+# LLM call, so recall has the stricter floor
+PREFILTER_MIN_PRECISION = 0.9
+PREFILTER_MIN_RECALL = 0.95
+
+
+def test_prefilter_meets_precision_and_recall_floors():
+    report = evaluate_prefilter(load_prefilter_fixtures())
+
+    assert report["true_positives"] + report["false_negatives"] > 0
+    assert report["true_negatives"] + report["false_positives"] > 0
+    assert report["precision"] >= PREFILTER_MIN_PRECISION, report
+    assert report["recall"] >= PREFILTER_MIN_RECALL, report
+
+
+def test_prefilter_defaults_to_configured_threshold(monkeypatch):
+    samples = load_prefilter_fixtures()
+    expected = evaluate_prefilter(samples, threshold=0.0)
+
+    monkeypatch.setattr(settings, "question_prefilter_threshold", 0.0)
+    assert evaluate_prefilter(samples) == expected
+    assert expected["recall"] == 1.0
+
+
+def test_boilerplate_stripping_keeps_question_markers():
+    for layout in evaluate_boilerplate(load_boilerplate_fixtures()):
+        assert layout["ok"], layout
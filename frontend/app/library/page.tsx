@@ -89,7 +89,8 @@ export default function LibraryPage() {
           message: status.message || ''
         });
 
-        if (status.status === 'pending' || status.status === 'processing') {
+        // Keep polling while paused so the resume is picked up
+        if (status.status === 'pending' || status.status === 'processing' || status.status === 'paused') {
           setTimeout(poll, 1000);
         } else if (status.status === 'completed') {
           // Refresh certifications list
@@ -97,7 +98,7 @@ export default function LibraryPage() {
             setUploadProgress(null);
             window.location.reload(); // Simple refresh to get updated data
           }, 1500);
-        } else if (status.status === 'failed') {
+        } else if (status.status === 'failed' || status.status === 'cancelled') {
           setTimeout(() => setUploadProgress(null), 3000);
         }
       } catch (error) {
@@ -172,6 +173,8 @@ export default function LibraryPage() {
                 <LoadingSpinner size="md" />
               ) : uploadProgress.status === 'completed' ? (
                 <span className="text-2xl">✅</span>
+              ) : uploadProgress.status === 'paused' ? (
+                <span className="text-2xl">⏸️</span>
               ) : (
                 <span className="text-2xl">❌</span>
               )}
@@ -183,8 +186,12 @@ export default function LibraryPage() {
                         ? 'Preparing to process...'
                         : uploadProgress.status === 'processing'
                         ? uploadProgress.message || 'Processing PDF...'
+                        : uploadProgress.status === 'paused'
+                        ? 'Processing paused'
                         : uploadProgress.status === 'completed'
                         ? 'Processing complete!'
+                        : uploadProgress.status === 'cancelled'
+                        ? 'Processing cancelled'
                         : 'Processing failed'}
                     </span>
                     {uploadProgress.status === 'processing' && uploadProgress.totalBlocks > 0 && (
@@ -12,8 +12,9 @@ export interface Certification {
   total_questions: number;
   created_at: string;
   updated_at: string;
-  processing_status: 'pending' | 'processing' | 'completed' | 'failed';
+  processing_status: 'pending' | 'processing' | 'paused' | 'completed' | 'failed' | 'cancelled';
   processing_progress: number;
+  quizzable: boolean;
   last_studied?: string;
   accuracy?: number;
 }
@@ -24,6 +25,7 @@ export interface CertificationListItem {
   slug: string;
   total_questions: number;
   processing_status: string;
+  quizzable: boolean;
   created_at: string;
   last_studied?: string;
   accuracy?: number;
@@ -57,7 +59,7 @@ export interface Question {
 }
 
 // Quiz session types
-export type SessionType = 'weak_areas' | 'continue' | 'review' | 'random' | 'full' | 'stratified';
+export type SessionType = 'weak_areas' | 'continue' | 'review' | 'random' | 'full' | 'stratified' | 'due' | 'adaptive';
 
 export interface TopicInfo {
   topic: string;
@@ -196,9 +198,10 @@ export interface UploadResponse {
 
 export interface ProcessingStatus {
   certification_id: string;
-  status: 'pending' | 'processing' | 'completed' | 'failed';
+  status: 'pending' | 'processing' | 'paused' | 'completed' | 'failed' | 'cancelled';
   progress: number;
   message: string;
+  quizzable: boolean;
   total_questions?: number;
   questions_extracted?: number;
   total_blocks?: number;